@@ -16,7 +16,7 @@ dependencies = [
     'pep8==1.5.7',
     'phonenumbers==6.2.0',
     'psycopg2==2.5.3',
-    'requests==2.3.0',
+    'requests==2.4.3',
     'wsgiref==0.1.2',
     'fig==1.0.1'
 ]
@@ -32,7 +32,7 @@ setup(
     license='',
     zip_safe=False,
     package_data={
-        'whats_fresh.whats_fresh_api.tests.testdata': ['*.json', 'media/*'],
+        'whats_fresh.whats_fresh_api.tests.testdata': ['*.json', '*.csv', 'media/*'],
         'whats_fresh.whats_fresh_api': ['templates/*', 'static/*.png', 'static/css/*']},
     description="What's Fresh API implementation",
     long_description=open('README.rst').read()
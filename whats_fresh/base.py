@@ -97,9 +97,105 @@ DEFAULT_PROXIMITY = 20
 
 PAGE_LENGTH = 15
 
+# Entry lists of tables with more rows than this, by the database's
+# statistics, show an estimated number of pages instead of counting rows.
+PAGE_COUNT_ESTIMATE = 100000
+
+# Keep the row counts of entry lists in the default cache for this many
+# seconds, unless a row is saved or deleted first.
+PAGE_COUNT_TIMEOUT = 300
+
+# Largest number of results returned in one page of the /1/vendors,
+# /1/products, /1/stories and /1/products/vendors lists. Further pages are
+# linked from each page's next link.
+MAX_PAGE_SIZE = 1000
+
 LOGIN_URL = '/login'
 
 DEFAULT_GROUP_NAME = 'Data Entry Users'
 
 # Title for the application UI
 SITE_TITLE = "Oregon's Catch"
+
+# Stream the /1/vendors, /1/products and /1/stories lists, fetching and
+# encoding STREAM_CHUNK_SIZE objects at a time rather than the whole list
+STREAM_RESPONSES = False
+STREAM_CHUNK_SIZE = 100
+
+# Fetch EXPORT_CHUNK_SIZE rows at a time when exporting the catalogue
+EXPORT_CHUNK_SIZE = 1000
+
+# Answer vendor location searches from a grid index of vendor coordinates
+# held in memory by each worker, with cells of SPATIAL_INDEX_CELL_SIZE
+# degrees, rebuilt whenever vendors change and at least every
+# SPATIAL_INDEX_TTL seconds. Changes made by other workers are looked for at
+# most every SPATIAL_INDEX_CHECK_INTERVAL seconds
+SPATIAL_INDEX = False
+SPATIAL_INDEX_CELL_SIZE = 0.25
+SPATIAL_INDEX_TTL = 300
+SPATIAL_INDEX_CHECK_INTERVAL = 5
+
+# Answer the vendors-by-product and products-by-vendor lookups, and list
+# vendors' products, from an index of vendor product preparations held in
+# memory by each worker, rebuilt whenever the data changes and at least every
+# AVAILABILITY_INDEX_TTL seconds
+AVAILABILITY_INDEX = False
+AVAILABILITY_INDEX_TTL = 300
+
+# Largest number of locations searched in one /1/vendors/nearby request
+NEARBY_MAX_LOCATIONS = 50
+
+# Cache public API responses in the named cache from CACHES for
+# API_CACHE_TIMEOUT seconds. Saving or deleting data invalidates them.
+API_CACHE = None
+API_CACHE_TIMEOUT = 600
+
+# Keep each product's and story's encoded API dictionary in the API_CACHE
+# cache for FRAGMENT_CACHE_TIMEOUT seconds, so lists only serialize the
+# objects which have changed since
+FRAGMENT_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Keep geocoded vendor addresses for GEOCODE_CACHE_TTL seconds, and addresses
+# the geocoder could not find for GEOCODE_NEGATIVE_TTL seconds. Each worker
+# also holds the GEOCODE_CACHE_SIZE most recently used addresses in memory.
+GEOCODE_CACHE_TTL = 30 * 24 * 60 * 60
+GEOCODE_NEGATIVE_TTL = 24 * 60 * 60
+GEOCODE_CACHE_SIZE = 1000
+
+# The geocoder used to find vendor coordinates from their addresses. Lookups
+# time out after GEOCODER_CONNECT_TIMEOUT seconds connecting or
+# GEOCODER_READ_TIMEOUT seconds waiting for an answer, and failed lookups are
+# retried GEOCODER_RETRIES times, waiting GEOCODER_BACKOFF seconds and then
+# twice as long each time. After GEOCODER_FAILURE_THRESHOLD failed lookups in
+# a row, lookups fail immediately for GEOCODER_RESET_TIMEOUT seconds. Each
+# worker keeps up to GEOCODER_POOL_SIZE connections to the geocoder open.
+GEOCODER_URL = 'https://maps.googleapis.com/maps/api/geocode/json'
+GEOCODER_CONNECT_TIMEOUT = 3.05
+GEOCODER_READ_TIMEOUT = 10
+GEOCODER_RETRIES = 2
+GEOCODER_BACKOFF = 0.5
+GEOCODER_FAILURE_THRESHOLD = 5
+GEOCODER_RESET_TIMEOUT = 60
+GEOCODER_POOL_SIZE = 10
+
+# Save vendors without waiting for their address to be geocoded, unless it
+# already has been, and geocode it in one of GEOCODE_WORKERS background
+# threads instead
+GEOCODE_ASYNC = False
+GEOCODE_WORKERS = 2
+
+# An offline gazetteer of ZIP code and city centroids, as a CSV file with
+# zip, city, state, lat and lng columns. GAZETTEER_POLICY is 'first' to look
+# addresses up in it before asking the geocoder, 'fallback' to use it when
+# the geocoder can not find an address, or None. GAZETTEER_PRECISION is
+# 'zip' to only accept ZIP code centroids, or 'city' to accept city centroids
+GAZETTEER_FILE = None
+GAZETTEER_POLICY = None
+GAZETTEER_PRECISION = 'zip'
+
+# Offline bundles of the public dataset are written to BUNDLE_ROOT, which
+# keeps the BUNDLE_KEEP most recent. Each bundle version never changes, so
+# clients may cache it for BUNDLE_MAX_AGE seconds.
+BUNDLE_ROOT = os.path.join(MEDIA_ROOT, 'bundles')
+BUNDLE_KEEP = 3
+BUNDLE_MAX_AGE = 365 * 24 * 60 * 60
@@ -0,0 +1,241 @@
+"""
+An in-process index of the product preparations each vendor sells.
+
+When AVAILABILITY_INDEX is enabled, /vendors/products/<id> and
+/products/vendors/<id> look up their vendors and products in an index of
+the VendorProduct rows held in memory by each worker, and vendors are
+serialized with their products from it, rather than joining VendorProduct,
+ProductPreparation, Product and Preparation on every request.
+
+The index is updated in place when those rows are saved or deleted in this
+process (see signals.py), outside of transactions which could still be
+rolled back. Each index records the generation of the data it was built
+from, and is rebuilt as soon as the generation moves on, so that changes
+made by other workers are picked up, and at least every
+AVAILABILITY_INDEX_TTL seconds.
+"""
+from django.conf import settings
+from django.db import connection
+
+from whats_fresh.whats_fresh_api.models import (VendorProduct,
+                                                ProductPreparation, Product,
+                                                Preparation)
+from whats_fresh.whats_fresh_api.conditional import get_generation
+
+from array import array
+import bisect
+import threading
+import time
+
+
+def insert(arrays, key, value):
+    """
+    Add value to the sorted array of ids under key, if it is not there.
+    """
+    values = arrays.setdefault(key, array('l'))
+    position = bisect.bisect_left(values, value)
+    if position == len(values) or values[position] != value:
+        values.insert(position, value)
+
+
+def remove(arrays, key, value):
+    """
+    Remove value from the sorted array of ids under key, dropping the array
+    once it is empty.
+    """
+    values = arrays.get(key)
+    if values is None:
+        return
+    position = bisect.bisect_left(values, value)
+    if position < len(values) and values[position] == value:
+        values.pop(position)
+    if not values:
+        del arrays[key]
+
+
+class AvailabilityIndex(object):
+
+    """
+    Holds the vendors selling each product preparation, and the product
+    preparations each vendor sells, as sorted arrays of ids. Each offer
+    (a VendorProduct row) keeps its availability and vendor price, and each
+    product preparation its product and preparation.
+    """
+
+    def __init__(self, offers, product_preparations, products, preparations):
+        # Offer id: (vendor id, product preparation id, available, price)
+        self.offers = {}
+        # (vendor id, product preparation id): number of offers
+        self.counts = {}
+        # Product preparation id: vendor ids
+        self.vendors = {}
+        # Vendor id: product preparation ids
+        self.sold = {}
+        # Product preparation id: (product id, preparation id)
+        self.product_preparations = {}
+        # Product id: product preparation ids
+        self.preparations_of = {}
+
+        self.product_names = dict(products)
+        self.preparation_names = dict(preparations)
+
+        for id, product, preparation in product_preparations:
+            self.set_product_preparation(id, product, preparation)
+        for id, vendor, product_preparation, available, price in offers:
+            self.set_offer(id, vendor, product_preparation, available, price)
+
+    def __len__(self):
+        return len(self.offers)
+
+    def set_offer(self, id, vendor, product_preparation, available, price):
+        self.remove_offer(id)
+        self.offers[id] = (vendor, product_preparation, available, price)
+
+        pair = (vendor, product_preparation)
+        self.counts[pair] = self.counts.get(pair, 0) + 1
+        insert(self.vendors, product_preparation, vendor)
+        insert(self.sold, vendor, product_preparation)
+
+    def remove_offer(self, id):
+        if id not in self.offers:
+            return
+        vendor, product_preparation = self.offers.pop(id)[:2]
+
+        # A vendor may offer the same product preparation more than once
+        pair = (vendor, product_preparation)
+        self.counts[pair] -= 1
+        if not self.counts[pair]:
+            del self.counts[pair]
+            remove(self.vendors, product_preparation, vendor)
+            remove(self.sold, vendor, product_preparation)
+
+    def set_product_preparation(self, id, product, preparation):
+        self.remove_product_preparation(id)
+        self.product_preparations[id] = (product, preparation)
+        insert(self.preparations_of, product, id)
+
+    def remove_product_preparation(self, id):
+        if id in self.product_preparations:
+            product = self.product_preparations.pop(id)[0]
+            remove(self.preparations_of, product, id)
+
+    def set_product(self, id, name):
+        self.product_names[id] = name
+
+    def set_preparation(self, id, name):
+        self.preparation_names[id] = name
+
+    def vendors_selling(self, product):
+        """
+        Return the ids of the vendors selling any preparation of a product.
+        """
+        vendors = set()
+        for product_preparation in self.preparations_of.get(product, []):
+            vendors.update(self.vendors.get(product_preparation, []))
+        return sorted(vendors)
+
+    def products_sold_by(self, vendor):
+        """
+        Return the ids of the products a vendor sells.
+        """
+        return sorted(set(
+            self.product_preparations[product_preparation][0]
+            for product_preparation in self.sold.get(vendor, [])
+            if product_preparation in self.product_preparations))
+
+    def vendor_products(self, vendor):
+        """
+        Return the products field of a vendor's API dictionary.
+        """
+        products = []
+        for product_preparation in self.sold.get(vendor, []):
+            if product_preparation not in self.product_preparations:
+                continue
+            product, preparation = self.product_preparations[
+                product_preparation]
+            products.append({
+                'name': self.product_names.get(product),
+                'preparation': self.preparation_names.get(preparation),
+                'product_id': product,
+                'preparation_id': preparation
+            })
+        return products
+
+
+MODELS = [VendorProduct, ProductPreparation, Product, Preparation]
+
+_lock = threading.Lock()
+_index = None
+_generation = None
+_expires = 0
+
+
+def generation():
+    """
+    Return the generation of the data the index is built from (see
+    conditional.get_generation).
+    """
+    return get_generation(MODELS)
+
+
+def build_index():
+    """
+    Build an AvailabilityIndex of every vendor's product preparations.
+    """
+    return AvailabilityIndex(
+        VendorProduct.objects.values_list(
+            'id', 'vendor', 'product_preparation', 'available',
+            'vendor_price'),
+        ProductPreparation.objects.values_list(
+            'id', 'product', 'preparation'),
+        Product.objects.values_list('id', 'name'),
+        Preparation.objects.values_list('id', 'name'))
+
+
+def availability_index():
+    """
+    Return this worker's availability index, building it if it has been
+    invalidated, if its data has changed since, or if it is older than
+    AVAILABILITY_INDEX_TTL.
+    """
+    global _index, _generation, _expires
+
+    with _lock:
+        current = generation()
+        if (_index is None or current != _generation or
+                time.time() >= _expires):
+            _index = build_index()
+            _generation = current
+            _expires = time.time() + settings.AVAILABILITY_INDEX_TTL
+        return _index
+
+
+def update(change):
+    """
+    Apply a change to this worker's availability index, if it has been
+    built, by calling change with the index.
+
+    Changes made inside a transaction drop the index instead, as they may
+    yet be rolled back.
+    """
+    global _index, _generation
+
+    with _lock:
+        if _index is None:
+            return
+        if connection.in_atomic_block:
+            _index = None
+            return
+        change(_index)
+        # Already committed, and the response cache versions moved on
+        _generation = generation()
+
+
+def invalidate():
+    """
+    Drop the availability index, so it is rebuilt on the next lookup.
+    """
+    global _index
+
+    with _lock:
+        _index = None
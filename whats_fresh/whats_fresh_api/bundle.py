@@ -0,0 +1,229 @@
+"""
+An offline bundle of the public dataset for mobile clients.
+
+The bundle is a single gzipped JSON file holding the /vendors, /products,
+/stories and /locations responses, exactly as the API serves them, under
+the names of those endpoints. It is versioned by the state of the models
+each section is built from (see conditional.get_states), so it changes
+whenever data is saved or deleted, and is rebuilt on the next request for
+it. Each section is kept under its own version in BUNDLE_ROOT, so only the
+sections whose data changed are built again.
+
+Bundles are written to BUNDLE_ROOT under their version, and served from
+there with long-lived caching, as each version never changes. The
+BUNDLE_KEEP most recent bundles are kept, so clients in the middle of a
+download are not cut off when a new version is built.
+"""
+from django.conf import settings
+from django.core.urlresolvers import reverse
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+
+from whats_fresh.whats_fresh_api.models import (Vendor, Product, Story,
+                                                Preparation, Image, Video,
+                                                ProductPreparation,
+                                                VendorProduct)
+from whats_fresh.whats_fresh_api.conditional import (get_states,
+                                                     tombstone_sources)
+from whats_fresh.whats_fresh_api.views.vendor import vendor_list
+from whats_fresh.whats_fresh_api.views.product import product_list
+from whats_fresh.whats_fresh_api.views.story import story_list
+from whats_fresh.whats_fresh_api.views.location import locations
+from whats_fresh.whats_fresh_api.serializers import encode
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# The name, URL name, view and models of each section of the bundle. The
+# models are those the view's responses are built from.
+SECTIONS = [
+    ('vendors', 'vendors-list', vendor_list,
+     [Vendor, VendorProduct, ProductPreparation, Product, Preparation]),
+    ('products', 'products-list', product_list, [Product, Image]),
+    ('stories', 'stories-list', story_list,
+     [Story, Image, Video, Story.images.through, Story.videos.through]),
+    ('locations', 'locations', locations, [Vendor]),
+]
+
+_lock = threading.Lock()
+
+
+def section_sources(models):
+    """
+    Return the state sources for a section: its models and their
+    tombstones, as for the list view's validators.
+    """
+    sources = [(model, {}) for model in models]
+    sources += tombstone_sources(models)
+    return sources
+
+
+def section_versions():
+    """
+    Return the current version of each section, from the states of the
+    models it is built from. All sections are read in a single query.
+    """
+    sources = []
+    for name, url_name, view, models in SECTIONS:
+        sources += [source for source in section_sources(models)
+                    if source not in sources]
+    states = get_states(sources)
+
+    versions = {}
+    for name, url_name, view, models in SECTIONS:
+        section_states = [states[sources.index(source)]
+                          for source in section_sources(models)]
+        versions[name] = hashlib.md5(
+            repr((name, section_states))).hexdigest()[:12]
+    return versions
+
+
+def bundle_version(versions):
+    return hashlib.md5(repr(sorted(versions.items()))).hexdigest()[:16]
+
+
+def bundle_path(version):
+    return os.path.join(settings.BUNDLE_ROOT, '%s.json.gz' % version)
+
+
+def section_path(name, version):
+    return os.path.join(
+        settings.BUNDLE_ROOT, 'sections', '%s-%s.json' % (name, version))
+
+
+def write_file(path, write):
+    """
+    Write a file by calling write with a file object, replacing the file
+    only once it is complete, so readers never see part of it.
+    """
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    descriptor, temporary = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as output:
+            write(output)
+        os.chmod(temporary, 0644)
+        os.rename(temporary, path)
+    except Exception:
+        os.remove(temporary)
+        raise
+
+
+def render_section(name, url_name, view):
+    """
+    Return the content of the view's response to a plain GET request, with
+    the lists of any further pages of the response added to the first.
+    """
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = reverse(url_name)
+
+    data = None
+    while True:
+        response = view(request)
+        if response.streaming:
+            content = ''.join(response.streaming_content)
+        else:
+            content = response.content
+
+        page = json.loads(content)
+        next_page = page.pop('next', None)
+        if data is None:
+            if not next_page:
+                return content
+            data = page
+        else:
+            data[name] += page[name]
+
+        if not next_page:
+            return encode(data)
+        request.GET = QueryDict(next_page.split('?', 1)[1])
+
+
+def section_content(name, url_name, view, version):
+    """
+    Return a section's content at the given version, rendering it if it has
+    not been rendered already.
+    """
+    path = section_path(name, version)
+    try:
+        with open(path, 'rb') as section:
+            return section.read()
+    except IOError:
+        pass
+
+    content = render_section(name, url_name, view)
+    write_file(path, lambda output: output.write(content))
+    return content
+
+
+def build(versions):
+    """
+    Write the bundle for the given section versions if it does not exist,
+    and return its version.
+    """
+    version = bundle_version(versions)
+    path = bundle_path(version)
+    if os.path.exists(path):
+        return version
+
+    parts = [
+        '"version": %s' % json.dumps(version),
+        '"generated": %s' % json.dumps(timezone.now().isoformat()),
+    ]
+    for name, url_name, view, models in SECTIONS:
+        parts.append('"%s": %s' % (
+            name, section_content(name, url_name, view, versions[name])))
+    content = '{%s}' % ', '.join(parts)
+
+    def write(output):
+        with gzip.GzipFile(filename='', mode='wb', fileobj=output) as bundle:
+            bundle.write(content)
+
+    write_file(path, write)
+    prune()
+    return version
+
+
+def modified_time(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        # Removed by another worker
+        return 0
+
+
+def prune():
+    """
+    Remove all but the BUNDLE_KEEP newest bundles, and newest versions of
+    each section.
+    """
+    patterns = [bundle_path('*')]
+    patterns += [section_path(name, '*') for name, url_name, view, models
+                 in SECTIONS]
+
+    for pattern in patterns:
+        paths = sorted(glob.glob(pattern), key=modified_time, reverse=True)
+        for path in paths[settings.BUNDLE_KEEP:]:
+            try:
+                os.remove(path)
+            except OSError:
+                # Removed by another worker
+                pass
+
+
+def current():
+    """
+    Return the version of the bundle of the current data, building it first
+    if it has not been built.
+    """
+    versions = section_versions()
+    with _lock:
+        return build(versions)
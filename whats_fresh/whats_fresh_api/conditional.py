@@ -0,0 +1,204 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpResponseNotModified
+from django.utils.cache import quote_etag
+from django.utils.decorators import available_attrs
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from whats_fresh.whats_fresh_api.models import Tombstone
+from whats_fresh.whats_fresh_api.response_cache import get_versions
+
+from calendar import timegm
+from functools import wraps
+import hashlib
+
+
+def latest_field(model):
+    """
+    Return the name of the field recording when a model's rows last changed,
+    or None if it has none.
+    """
+    names = [field.name for field in model._meta.fields]
+    for name in ('modified', 'deleted'):
+        if name in names:
+            return name
+
+
+def query_states(sources):
+    """
+    Return the latest modified time and the number of rows for each
+    (model, filters) source, where filters maps column names to the values
+    the rows must have.
+
+    Together these change whenever a row is added, changed or deleted, so
+    they stand in for the data itself. Models without a modified field are
+    only counted. All sources are read in a single query.
+    """
+    qn = connection.ops.quote_name
+    selects = []
+    params = []
+
+    for position, (model, filters) in enumerate(sources):
+        table = qn(model._meta.db_table)
+        field = latest_field(model)
+        if field:
+            latest = 'MAX(%s.%s)' % (table, qn(field))
+        else:
+            latest = 'CAST(NULL AS timestamp with time zone)'
+
+        select = 'SELECT %d, %s, COUNT(*) FROM %s' % (position, latest, table)
+        if filters:
+            select += ' WHERE ' + ' AND '.join(
+                '%s.%s = %%s' % (table, qn(column))
+                for column in sorted(filters))
+            params += [filters[column] for column in sorted(filters)]
+        selects.append(select)
+
+    cursor = connection.cursor()
+    cursor.execute(' UNION ALL '.join(selects), params)
+    return [tuple(row[1:]) for row in sorted(cursor.fetchall())]
+
+
+def get_states(sources):
+    """
+    Return the states of the sources, from the API_CACHE if it is enabled.
+
+    States are cached against the same model versions as cached responses,
+    so saving or deleting a row invalidates them in the same way.
+    """
+    if not settings.API_CACHE:
+        return query_states(sources)
+
+    cache = caches[settings.API_CACHE]
+    versions = get_versions(cache, [model for model, filters in sources])
+    names = [(model._meta.model_name, sorted(filters.items()))
+             for model, filters in sources]
+    key = 'api:validators:%s' % hashlib.md5(
+        repr((names, versions))).hexdigest()
+
+    states = cache.get(key)
+    if states is None:
+        states = query_states(sources)
+        cache.set(key, states, settings.API_CACHE_TIMEOUT)
+    return states
+
+
+def tombstone_sources(models):
+    """
+    Return the sources for the tombstones of the models, so that deleting
+    one of their rows moves Last-Modified on as well as the ETag. The
+    automatic join tables of many-to-many fields have no tombstones.
+    """
+    return [(Tombstone, {'model': model._meta.model_name})
+            for model in models if not model._meta.auto_created]
+
+
+def get_generation(models):
+    """
+    Return the generation of the models' data, for in-memory indexes built
+    from it: the states of the models and their tombstones, along with the
+    models' response cache versions if API_CACHE is set, which also move on
+    when a row is changed without changing those states, such as a price.
+    """
+    states = get_states([(model, {}) for model in models] +
+                        tombstone_sources(models))
+    if settings.API_CACHE:
+        return states, get_versions(caches[settings.API_CACHE], models)
+    return states
+
+
+def not_modified(request, etag, last_modified):
+    """
+    Return whether the client already has the current response, according
+    to its If-None-Match or, failing that, its If-Modified-Since header.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        return (if_none_match.strip() == '*' or
+                etag in parse_etags(if_none_match))
+
+    if_modified_since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'))
+    return bool(if_modified_since and last_modified and
+                last_modified <= if_modified_since)
+
+
+def conditional_response(view, request, sources, *args, **kwargs):
+    """
+    Compute an ETag and Last-Modified time for the request from the state of
+    its sources, without serializing anything, and answer 304 Not Modified
+    if the client already has the response. Otherwise call the view and add
+    the validators to its response.
+
+    If required is given, and the first source has no rows (such as a
+    detail view's object that does not exist), the view is called without
+    validators, so that it answers with its 404.
+    """
+    required = kwargs.pop('required', False)
+    states = get_states(sources)
+    if required and not states[0][1]:
+        return view(request, *args, **kwargs)
+
+    params = sorted(
+        (key, request.GET.getlist(key)) for key in request.GET.keys())
+    etag = hashlib.md5(repr((request.path, params, states))).hexdigest()
+
+    modified = [latest for latest, count in states if latest]
+    last_modified = None
+    if modified:
+        last_modified = timegm(max(modified).utctimetuple())
+
+    if not_modified(request, etag, last_modified):
+        response = HttpResponseNotModified()
+    else:
+        response = view(request, *args, **kwargs)
+
+    response['ETag'] = quote_etag(etag)
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def conditional_list(*models):
+    """
+    Add ETag and Last-Modified validators to a list view, from the latest
+    modified time and row count of each model its responses are built from.
+
+    The models' tombstones are included too, so deleting one of their rows
+    also moves Last-Modified on.
+    """
+    def decorator(view):
+        @wraps(view, assigned=available_attrs(view))
+        def wrapped_view(request, *args, **kwargs):
+            sources = [(model, {}) for model in models]
+            sources += tombstone_sources(models)
+            return conditional_response(
+                view, request, sources, *args, **kwargs)
+        return wrapped_view
+    return decorator
+
+
+def conditional_detail(model, *related_models):
+    """
+    Add ETag and Last-Modified validators to a detail view, from the
+    modified time of the object being viewed and the latest modified time
+    and row count of each related model included in its response, along
+    with the related models' tombstones.
+
+    Objects which do not exist are passed on to the view, which answers
+    with a 404.
+    """
+    def decorator(view):
+        @wraps(view, assigned=available_attrs(view))
+        def wrapped_view(request, *args, **kwargs):
+            sources = [(model, {'id': int(kwargs['id'])})]
+            sources += [(related, {}) for related in related_models]
+            sources += tombstone_sources(related_models)
+            return conditional_response(
+                view, request, sources, required=True, *args, **kwargs)
+        return wrapped_view
+    return decorator
@@ -0,0 +1,65 @@
+"""
+Stored API documents of vendors.
+
+Each vendor's document column holds its encoded API dictionary, exactly as
+the serializer makes it, so vendor lists are read from the vendor table
+alone and the documents joined into the response as they are (see
+vendor_documents() in views/serializer.py). Only the distance added for
+?nearest= searches is filled in when the document is read.
+
+Documents are refreshed, in a transaction, whenever the vendor, the product
+preparations it sells, or their products or preparations are saved or
+deleted (see signals.py). Vendors without a document, such as those loaded
+from fixtures or created before documents were stored, are serialized when
+they are listed; the refresh_vendor_documents command fills them in.
+"""
+from django.db import transaction
+
+from whats_fresh.whats_fresh_api.models import Vendor, VendorProduct
+from whats_fresh.whats_fresh_api.serializers import (
+    serialize, encode, prefetch_vendor_products, iterate_chunks)
+
+
+def refresh(vendors):
+    """
+    Store the current document of each vendor in the vendors queryset.
+    Vendors are locked while their documents are built, so a document
+    built from older data can not replace a newer one.
+    """
+    with transaction.atomic():
+        vendors = prefetch_vendor_products(
+            vendors.select_for_update(), indexed=False)
+
+        for vendor in vendors:
+            if vendor.location is None:
+                # Not listed until its address has been geocoded
+                document = ''
+            else:
+                document = encode(serialize([vendor], indexed=False)[0])
+            Vendor.objects.filter(id=vendor.id).update(document=document)
+
+
+def refresh_vendors(ids):
+    refresh(Vendor.objects.filter(id__in=ids))
+
+
+def refresh_selling(**filters):
+    """
+    Refresh the documents of the vendors selling the product preparations
+    matching the filters, such as product=<id>.
+    """
+    refresh(Vendor.objects.filter(id__in=VendorProduct.objects.filter(**{
+        'product_preparation__%s' % lookup: value
+        for lookup, value in filters.items()}).values('vendor')))
+
+
+def refresh_all(chunk_size=None):
+    """
+    Refresh the documents of every vendor, chunk_size vendors at a time.
+    Returns the number of vendors refreshed.
+    """
+    refreshed = 0
+    for chunk in iterate_chunks(Vendor.objects.only('id'), None, chunk_size):
+        refresh_vendors([vendor.id for vendor in chunk])
+        refreshed += len(chunk)
+    return refreshed
@@ -0,0 +1,93 @@
+"""
+Export of the catalogue as the vendor by product preparation availability
+matrix: one row for each product preparation a vendor sells, with the
+vendor's price and whether it is available.
+
+The rows are fetched EXPORT_CHUNK_SIZE at a time and encoded as they are
+fetched, as newline-delimited JSON or CSV, so exporting the whole catalogue
+holds no more than one chunk in memory. They are used by the
+export_catalogue management command and the /entry/export view.
+"""
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from whats_fresh.whats_fresh_api.models import VendorProduct
+from whats_fresh.whats_fresh_api.serializers import iterate_chunks
+
+from collections import OrderedDict
+from StringIO import StringIO
+import csv
+import json
+
+COLUMNS = [
+    'vendor_id', 'vendor_name', 'vendor_city', 'vendor_state', 'lat', 'lng',
+    'product_id', 'product_name', 'preparation_id', 'preparation_name',
+    'vendor_price', 'available',
+]
+
+
+def row(vendor_product):
+    vendor = vendor_product.vendor
+    product = vendor_product.product_preparation.product
+    preparation = vendor_product.product_preparation.preparation
+    location = vendor.location
+
+    return OrderedDict(zip(COLUMNS, [
+        vendor.id, vendor.name, vendor.city, vendor.state,
+        location.y if location else None, location.x if location else None,
+        product.id, product.name, preparation.id, preparation.name,
+        vendor_product.vendor_price, vendor_product.available,
+    ]))
+
+
+def rows(chunk_size=None):
+    """
+    Yield the rows of the matrix, in lists of at most chunk_size rows.
+    """
+    queryset = VendorProduct.objects.select_related(
+        'vendor', 'product_preparation__product',
+        'product_preparation__preparation')
+
+    for chunk in iterate_chunks(
+            queryset, chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE):
+        yield [row(vendor_product) for vendor_product in chunk]
+
+
+def to_ndjson(chunks):
+    for chunk in chunks:
+        yield ''.join(
+            json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in chunk)
+
+
+def to_csv(chunks):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+
+    for chunk in chunks:
+        for row in chunk:
+            writer.writerow([
+                '' if value is None else unicode(value).encode('utf-8')
+                for value in row.values()])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # The header, if there were no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+# The encoder and content type of each export format
+FORMATS = {
+    'ndjson': (to_ndjson, 'application/x-ndjson'),
+    'csv': (to_csv, 'text/csv'),
+}
+
+
+def export(format, chunk_size=None):
+    """
+    Yield the matrix encoded in the given format, a chunk at a time.
+    """
+    encoder, content_type = FORMATS[format]
+    return encoder(rows(chunk_size))
@@ -7,7 +7,7 @@ class VendorForm(forms.ModelForm):
 
     class Meta:
         model = Vendor
-        exclude = []
+        exclude = ['location_pending']
         widgets = {
             'name': forms.TextInput(attrs={'required': 'true'}),
             'description': forms.Textarea(attrs={'required': 'true'}),
@@ -1,8 +1,19 @@
-import requests
+from datetime import datetime
 from django.conf import settings
 
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.gis.geos import fromstr
+from django.contrib.gis.measure import D
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_http_date_safe
+
+from whats_fresh.whats_fresh_api.models import Tombstone, VendorProduct
+from whats_fresh.whats_fresh_api import geocode_cache, geocoder, gazetteer
+
+import base64
+import json
 
 
 class BadAddressException(Exception):
@@ -12,34 +23,96 @@ class BadAddressException(Exception):
     """
 
 
-def coordinates_from_address(street, city, state, zip):
+def geocode_address(full_address):
     """
-    This function returns a list of the coordinates from the address
-    passed using the Google Geocoding API. If the address given does not
-    return an exact coordinates (for instance, if the address can only be
-    located down to the city), a BadAddressException is thrown.
+    Look up the coordinates of an address using the Google Geocoding API,
+    through this worker's geocoder client.
 
-    TODO: this should probably return a tuple, rather than a list.
+    Returns a [lat, long] list, or None if the address could not be found
+    exactly (for instance, if it can only be located down to the city). A
+    BadAddressException is raised if the geocoder could not be reached or
+    its response could not be read.
     """
     try:
-        full_address = street + ", " + city + ", " + state + " " + zip
-        base_url = "https://maps.googleapis.com/maps/api/geocode/json?address="
+        location_data = geocoder.client().geocode(full_address)
+    except geocoder.GeocoderError:
+        raise BadAddressException("Address %s not found" % full_address)
+
+    # Other failed statuses, such as OVER_QUERY_LIMIT, are failures of the
+    # lookup rather than of the address, so are raised below instead
+    if location_data.get('status') == 'ZERO_RESULTS':
+        return None
+
+    try:
+        geometry = location_data['results'][0]['geometry']
+        if geometry['location_type'] == 'APPROXIMATE':
+            return None
+
+        lat = float(geometry['location']['lat'])
+        long = float(geometry['location']['lng'])
+    except Exception:
+        raise BadAddressException("Address %s not found" % full_address)
+
+    return [lat, long]
 
-        response = requests.get(base_url + full_address)
-        location_data = response.json()
 
-        if location_data['results'][0][
-                'geometry']['location_type'] == 'APPROXIMATE':
-            raise BadAddressException("Address %s not found" % full_address)
+def geocoded_coordinates(street, city, state, zip, cached_only=False):
+    """
+    Return the geocoder's coordinates for an address, as a [lat, long] list.
+
+    Results, including addresses that could not be found, are cached by
+    geocode_cache, so the same address is not looked up again until the
+    cached result expires. Failures to reach the geocoder are not cached.
+    If cached_only is set, None is returned rather than asking the geocoder
+    about an address that is not cached.
+    """
+    full_address = street + ", " + city + ", " + state + " " + zip
+    address = geocode_cache.normalize_address(street, city, state, zip)
 
-        lat = float(location_data['results'][0]['geometry']['location']['lat'])
-        long = float(
-            location_data['results'][0]['geometry']['location']['lng'])
+    coordinates = geocode_cache.lookup(address)
+    if coordinates is None and cached_only:
+        return None
+    if coordinates is None:
+        coordinates = geocode_address(full_address)
+        if coordinates is None:
+            coordinates = geocode_cache.NOT_FOUND
+        geocode_cache.store(address, coordinates)
 
-        return [lat, long]
-    except:
+    if coordinates is geocode_cache.NOT_FOUND:
         raise BadAddressException("Address %s not found" % full_address)
 
+    return list(coordinates)
+
+
+def coordinates_from_address(street, city, state, zip, cached_only=False):
+    """
+    This function returns a list of the coordinates from the address
+    passed using the Google Geocoding API. If the address given does not
+    return an exact coordinates (for instance, if the address can only be
+    located down to the city), a BadAddressException is thrown.
+
+    Depending on GAZETTEER_POLICY, the offline gazetteer is tried first, or
+    used when the geocoder can not find the address (see gazetteer.py). If
+    cached_only is set, None is returned rather than asking the geocoder
+    about an address it has not already found.
+
+    TODO: this should probably return a tuple, rather than a list.
+    """
+    if settings.GAZETTEER_POLICY == 'first':
+        coordinates = gazetteer.coordinates(city, state, zip)
+        if coordinates is not None:
+            return coordinates
+
+    try:
+        return geocoded_coordinates(street, city, state, zip, cached_only)
+    except BadAddressException:
+        if settings.GAZETTEER_POLICY != 'fallback':
+            raise
+        coordinates = gazetteer.coordinates(city, state, zip)
+        if coordinates is None:
+            raise
+        return coordinates
+
 
 def group_required(*group_names):
     """
@@ -73,37 +146,57 @@ def get_lat_long_prox(request, error=None):
     point = None
 
     if lat or lng:
-        if proximity:
-            try:
-                proximity = int(proximity)
-            except Exception as e:
-                error = {
-                    "level": "Warning",
-                    "status": True,
-                    "name": "Bad proximity",
-                    "text": "There was an error finding vendors "
-                            "within {0} miles".format(proximity),
-                    'debug': "{0}: {1}".format(type(e).__name__, str(e))
-                }
-                proximity = settings.DEFAULT_PROXIMITY
-        else:
-            proximity = settings.DEFAULT_PROXIMITY
-
-        try:
-            point = fromstr('POINT(%s %s)' % (lng, lat), srid=4326)
-        except Exception as e:
-            error = {
-                "level": "Warning",
-                "status": True,
-                "name": "Bad location",
-                "text": "There was an error with the given "
-                        "coordinates {0}, {1}".format(lat, lng),
-                'debug': "{0}: {1}".format(type(e).__name__, str(e))
-            }
+        proximity, error = get_proximity(proximity, error)
+        point, error = get_point(lat, lng, error)
 
     return [point, proximity, limit, error]
 
 
+def get_proximity(proximity, error=None):
+    """
+    Return the proximity given as an integer number of miles, or the default
+    proximity if none was given.
+
+    If the proximity results in an error, the error block is updated to
+    reflect that error and the default proximity is returned.
+    """
+    if not proximity:
+        return [settings.DEFAULT_PROXIMITY, error]
+    try:
+        return [int(proximity), error]
+    except Exception as e:
+        error = {
+            "level": "Warning",
+            "status": True,
+            "name": "Bad proximity",
+            "text": "There was an error finding vendors "
+                    "within {0} miles".format(proximity),
+            'debug': "{0}: {1}".format(type(e).__name__, str(e))
+        }
+        return [settings.DEFAULT_PROXIMITY, error]
+
+
+def get_point(lat, lng, error=None):
+    """
+    Return a point for the latitude and longitude given.
+
+    If the coordinates result in an error, the error block is updated to
+    reflect that error and None is returned.
+    """
+    try:
+        return [fromstr('POINT(%s %s)' % (lng, lat), srid=4326), error]
+    except Exception as e:
+        error = {
+            "level": "Warning",
+            "status": True,
+            "name": "Bad location",
+            "text": "There was an error with the given "
+                    "coordinates {0}, {1}".format(lat, lng),
+            'debug': "{0}: {1}".format(type(e).__name__, str(e))
+        }
+        return [None, error]
+
+
 def get_limit(request, error=None):
     """
     Return the limit requested by the user.
@@ -125,3 +218,313 @@ def get_limit(request, error=None):
             'name': 'Bad Limit'
         }
         return [None, error]
+
+
+def get_page_size(limit):
+    """
+    Return the number of results to return in a page, given the limit
+    requested: the limit, but no more than MAX_PAGE_SIZE.
+    """
+    if limit is None or limit > settings.MAX_PAGE_SIZE:
+        return settings.MAX_PAGE_SIZE
+    return limit
+
+
+def encode_cursor(position):
+    """
+    Encode the position of the last result of a page, as a list of the
+    values the results are ordered by, as an opaque cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps(position)).rstrip('=')
+
+
+def decode_cursor(cursor, length, kinds=None):
+    """
+    Decode a cursor made by encode_cursor(), checking that it holds a
+    position of length values, of the types given for each in kinds, or
+    numbers.
+    """
+    kinds = kinds or [(int, long, float)] * length
+    cursor = str(cursor)
+    position = json.loads(
+        base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+
+    if (not isinstance(position, list) or len(position) != length or
+            not all(isinstance(value, kind)
+                    for value, kind in zip(position, kinds))):
+        raise ValueError("%s is not a valid cursor" % cursor)
+    return position
+
+
+def get_cursor(request, error=None, length=1):
+    """
+    Return the position given in ?after=, from the next link of an earlier
+    page. Positions are ids, or for lists ordered by distance, the distance
+    and id.
+
+    If the cursor results in an error, the error block is updated to reflect
+    that error.
+    """
+    cursor = request.GET.get('after', None)
+    if cursor is None:
+        return [cursor, error]
+    try:
+        return [decode_cursor(cursor, length), error]
+    except Exception as e:
+        error = {
+            'debug': "{0}: {1}".format(type(e).__name__, str(e)),
+            'status': True,
+            'level': 'Warning',
+            'text': 'Invalid cursor. Returning the first page.',
+            'name': 'Bad Cursor'
+        }
+        return [None, error]
+
+
+def order_by_id(queryset, after=None):
+    """
+    Order a queryset by id, starting after the position given by a cursor.
+    Results are found through the primary key index, so later pages cost
+    no more than the first.
+    """
+    queryset = queryset.order_by('pk')
+    if after:
+        queryset = queryset.filter(pk__gt=after[0])
+    return queryset
+
+
+def paginate(results, page_size, position=lambda obj: [obj.pk]):
+    """
+    Return the first page_size results, and the cursor of the next page, or
+    None if there are no more results. position gives the values the
+    results are ordered by.
+    """
+    if page_size < 1:
+        return [[], None]
+
+    page = list(results[:page_size + 1])
+    if len(page) > page_size:
+        return [page[:page_size], encode_cursor(position(page[page_size - 1]))]
+    return [page, None]
+
+
+def next_link(request, cursor):
+    """
+    Return the link to the page after cursor: the request's own path and
+    parameters, with ?after= set to the cursor.
+    """
+    params = request.GET.copy()
+    params['after'] = cursor
+    return '%s?%s' % (request.path, params.urlencode())
+
+
+def get_nearest(request, error=None):
+    """
+    Return the number of nearest vendors requested by the user.
+
+    If the value results in an error, the error block is updated to reflect
+    that error.
+    """
+    nearest = request.GET.get('nearest', None)
+    if nearest is None:
+        return [nearest, error]
+    try:
+        nearest = int(nearest)
+        if nearest < 1:
+            raise ValueError("nearest must be at least 1")
+        return [nearest, error]
+    except Exception as e:
+        error = {
+            'debug': "{0}: {1}".format(type(e).__name__, str(e)),
+            'status': True,
+            'level': 'Warning',
+            'text': 'Invalid nearest. Returning all results.',
+            'name': 'Bad Nearest'
+        }
+        return [None, error]
+
+
+def get_ids(request, name, error=None):
+    """
+    Return the ids given in ?<name>=, as a comma-separated list such as
+    ?products=1,2,3.
+
+    If the value results in an error, the error block is updated to reflect
+    that error.
+    """
+    ids = request.GET.get(name, None)
+    if ids is None:
+        return [ids, error]
+    try:
+        ids = sorted(set(int(id) for id in ids.split(',')))
+        return [ids, error]
+    except Exception as e:
+        error = {
+            'debug': "{0}: {1}".format(type(e).__name__, str(e)),
+            'status': True,
+            'level': 'Warning',
+            'text': 'Invalid %s. Returning all results.' % name,
+            'name': 'Bad %s' % name.title()
+        }
+        return [None, error]
+
+
+def get_match(request, error=None):
+    """
+    Return whether vendors must sell all of the products given in
+    ?products=, or any of them, from ?match=all (the default) or ?match=any.
+
+    If the value results in an error, the error block is updated to reflect
+    that error.
+    """
+    match = request.GET.get('match', 'all')
+    if match in ('all', 'any'):
+        return [match, error]
+
+    error = {
+        'debug': "ValueError: match must be all or any, not %s" % match,
+        'status': True,
+        'level': 'Warning',
+        'text': 'Invalid match. Returning vendors selling all products.',
+        'name': 'Bad Match'
+    }
+    return ['all', error]
+
+
+def filter_by_products(queryset, products, preparations=None, match='all'):
+    """
+    Restrict a queryset of vendors to those selling all of the products, or
+    any of them if match is 'any', in one of the preparations if given.
+
+    This is a single semi-join on the vendors' product preparations, so each
+    vendor is returned once. To match all of the products, the product
+    preparations are grouped by vendor, and the distinct products each
+    vendor sells are counted.
+    """
+    sold = VendorProduct.objects.filter(
+        product_preparation__product__in=products)
+    if preparations:
+        sold = sold.filter(
+            product_preparation__preparation__in=preparations)
+
+    if match == 'all':
+        sold = sold.values('vendor').annotate(
+            sold_products=Count('product_preparation__product',
+                                distinct=True)
+        ).filter(sold_products=len(products))
+
+    return queryset.filter(id__in=sold.values('vendor'))
+
+
+def filter_by_proximity(queryset, point, proximity):
+    """
+    Filter a queryset of vendors to those within proximity miles of the
+    point.
+
+    The distance is checked with ST_DWithin on the vendor location cast to
+    geography, which matches the geography index added in migration 0004,
+    rather than computing the spherical distance to every vendor.
+    """
+    return queryset.extra(
+        where=[
+            'ST_DWithin("%s"."location"::geography, '
+            'ST_GeogFromText(%%s), %%s)' % queryset.model._meta.db_table
+        ],
+        params=[point.ewkt, D(mi=proximity).m])
+
+
+def order_by_distance(queryset, point, after=None):
+    """
+    Order a queryset of vendors by their distance from the point, closest
+    first, starting after the (distance, id) position given by a cursor.
+
+    The distance is measured between geographies, in miles, as the
+    proximity filter and the spatial index measure it. Comparing the
+    geometries directly would order by planar degrees, in which a degree of
+    longitude counts as much as a degree of latitude. The queryset should
+    already be restricted with filter_by_proximity(), whose ST_DWithin
+    filter uses the geography index, so only the vendors it finds are
+    measured. The distance is selected as knn, and ties are broken by id.
+
+    This is not an index-assisted nearest neighbour search: the supported
+    PostGIS has no geography <->, and a geometry <-> prefilter could miss
+    the true nearest vendors at a page boundary. Every vendor within the
+    proximity is measured and sorted before a limit is applied, so the cost
+    grows with the number of vendors in the radius rather than with the
+    page size (see the benchmark_proximity command).
+    """
+    table = queryset.model._meta.db_table
+    knn = ('ST_Distance("%s"."location"::geography, '
+           'ST_GeogFromText(%%s)) / %%s' % table)
+    knn_params = [point.ewkt, D(mi=1).m]
+
+    if after:
+        queryset = queryset.extra(
+            where=['(%s, "%s"."id") > (%%s, %%s)' % (knn, table)],
+            params=knn_params + list(after))
+
+    return queryset.extra(
+        select={'knn': knn},
+        select_params=knn_params,
+        order_by=['knn', 'id'])
+
+
+def get_modified_since(request, error=None):
+    """
+    Return the time given in ?modified_since=, as an aware datetime.
+
+    The time may be given in ISO 8601 format, or as an HTTP date such as the
+    Last-Modified header of an earlier response. ISO 8601 times without a
+    time zone are taken to be in UTC.
+
+    If the value results in an error, the error block is updated to reflect
+    that error.
+    """
+    modified_since = request.GET.get('modified_since', None)
+    if modified_since is None:
+        return [modified_since, error]
+    try:
+        timestamp = parse_http_date_safe(modified_since)
+        if timestamp is not None:
+            return [datetime.fromtimestamp(timestamp, timezone.utc), error]
+
+        parsed = parse_datetime(modified_since)
+        if parsed is None:
+            raise ValueError("%s is not a valid time" % modified_since)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, timezone.utc)
+        return [parsed, error]
+    except Exception as e:
+        error = {
+            'debug': "{0}: {1}".format(type(e).__name__, str(e)),
+            'status': True,
+            'level': 'Warning',
+            'text': 'Invalid modified_since. Returning all results.',
+            'name': 'Bad Modified Since'
+        }
+        return [None, error]
+
+
+def filter_modified_since(queryset, modified_since, *related):
+    """
+    Restrict a queryset to the rows modified after modified_since.
+
+    Rows are also included if an object they embed in their response has
+    been modified since; the related arguments are the lookups to those
+    objects, such as 'image' for products.
+    """
+    changed = Q(modified__gt=modified_since)
+    for lookup in related:
+        changed |= Q(pk__in=queryset.model._default_manager.filter(**{
+            '%s__modified__gt' % lookup: modified_since}).values('pk'))
+    return queryset.filter(changed)
+
+
+def get_deleted(model, modified_since):
+    """
+    Return the ids of the objects of a model deleted after modified_since,
+    from their tombstones.
+    """
+    return list(Tombstone.objects.filter(
+        model=model._meta.model_name, deleted__gt=modified_since
+    ).order_by('deleted').values_list('object_id', flat=True))
@@ -0,0 +1,119 @@
+"""
+An offline gazetteer of ZIP code and city centroids.
+
+The gazetteer is loaded from the CSV file named by GAZETTEER_FILE, with
+zip, city, state, lat and lng columns, and indexed in memory by each worker
+the first time it is used. Cities are placed at the mean of their ZIP
+codes' centroids.
+
+GAZETTEER_POLICY decides how coordinates_from_address uses it: 'first' to
+try it before the geocoder, so no network call is made for addresses it
+knows, 'fallback' to use it when the geocoder is unavailable or cannot find
+an address, or None not to use it. GAZETTEER_PRECISION is the coarsest
+match accepted: 'zip' for ZIP code centroids only, or 'city' to also accept
+city centroids.
+"""
+from django.conf import settings
+
+import csv
+import threading
+
+
+def normalize_zip(zip):
+    return zip.strip()[:5]
+
+
+def normalize_place(name):
+    return ' '.join(name.lower().replace('.', ' ').split())
+
+
+class Gazetteer(object):
+
+    """
+    Look up the centroids of ZIP codes and cities, given rows of
+    (zip, city, state, lat, lng).
+    """
+
+    def __init__(self, rows):
+        self.zips = {}
+        cities = {}
+
+        for zip, city, state, lat, lng in rows:
+            lat, lng = float(lat), float(lng)
+            self.zips[normalize_zip(zip)] = [lat, lng]
+
+            key = (normalize_place(city), normalize_place(state))
+            cities.setdefault(key, []).append((lat, lng))
+
+        self.cities = dict(
+            (key, [sum(lat for lat, lng in points) / len(points),
+                   sum(lng for lat, lng in points) / len(points)])
+            for key, points in cities.items())
+
+    def lookup(self, city, state, zip, precision='zip'):
+        """
+        Return the coordinates of the ZIP code, or if precision is 'city'
+        and the ZIP code is not known, of the city, as a [lat, lng] list.
+        Returns None if neither is known.
+        """
+        coordinates = self.zips.get(normalize_zip(zip))
+        if coordinates is None and precision == 'city':
+            coordinates = self.cities.get(
+                (normalize_place(city), normalize_place(state)))
+
+        if coordinates is None:
+            return None
+        return list(coordinates)
+
+
+def load(path):
+    """
+    Build a Gazetteer from a CSV file with a header row naming the zip,
+    city, state, lat and lng columns.
+    """
+    with open(path, 'rb') as gazetteer_file:
+        reader = csv.DictReader(gazetteer_file)
+        return Gazetteer(
+            (row['zip'], row['city'], row['state'], row['lat'], row['lng'])
+            for row in reader)
+
+
+_gazetteer = None
+_lock = threading.Lock()
+
+
+def gazetteer():
+    """
+    Return this worker's gazetteer, loading it from GAZETTEER_FILE on first
+    use, or None if there is no GAZETTEER_FILE.
+    """
+    global _gazetteer
+
+    if not settings.GAZETTEER_FILE:
+        return None
+
+    with _lock:
+        if _gazetteer is None:
+            _gazetteer = load(settings.GAZETTEER_FILE)
+        return _gazetteer
+
+
+def reset():
+    """
+    Drop this worker's gazetteer, so it is loaded again on next use.
+    """
+    global _gazetteer
+
+    with _lock:
+        _gazetteer = None
+
+
+def coordinates(city, state, zip):
+    """
+    Return the gazetteer's coordinates for an address, at no coarser than
+    GAZETTEER_PRECISION, or None if it has none.
+    """
+    index = gazetteer()
+    if index is None:
+        return None
+    return index.lookup(city, state, zip, settings.GAZETTEER_PRECISION)
@@ -0,0 +1,108 @@
+"""
+A cache of geocoded addresses.
+
+Geocoding results are kept in the GeocodedAddress table, shared by every
+worker, and in a least-recently-used cache of GEOCODE_CACHE_SIZE addresses
+held in memory by each worker. Addresses are looked up by a normalized form
+of the street, city, state and zip, so differences in case, spacing and
+punctuation do not cause a new lookup.
+
+Coordinates are kept for GEOCODE_CACHE_TTL seconds. Addresses the geocoder
+could not find are also kept, as negative results, for
+GEOCODE_NEGATIVE_TTL seconds.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from whats_fresh.whats_fresh_api.models import GeocodedAddress
+
+from collections import OrderedDict
+from datetime import timedelta
+import re
+import threading
+
+# Stands in for the coordinates of an address the geocoder could not find
+NOT_FOUND = object()
+
+_lock = threading.Lock()
+_recent = OrderedDict()
+
+
+def normalize_address(street, city, state, zip):
+    """
+    Return the cache key for an address: each part in lower case, with
+    punctuation removed and runs of whitespace collapsed to one space.
+    """
+    parts = []
+    for part in (street, city, state, zip):
+        part = re.sub(r'[^\w\s-]', ' ', part.lower(), flags=re.UNICODE)
+        parts.append(' '.join(part.split()))
+    return ', '.join(parts)
+
+
+def remember(address, coordinates, expires):
+    """
+    Add an address to this worker's cache, dropping the least recently used
+    address if the cache is full.
+    """
+    with _lock:
+        _recent.pop(address, None)
+        _recent[address] = (coordinates, expires)
+        while len(_recent) > settings.GEOCODE_CACHE_SIZE:
+            _recent.popitem(last=False)
+
+
+def lookup(address):
+    """
+    Return the cached coordinates of a normalized address as a [lat, lng]
+    list, NOT_FOUND if the geocoder could not find it, or None if it is not
+    cached or has expired.
+    """
+    now = timezone.now()
+
+    with _lock:
+        cached = _recent.pop(address, None)
+        if cached is not None and cached[1] > now:
+            _recent[address] = cached
+            return cached[0]
+
+    try:
+        geocoded = GeocodedAddress.objects.get(
+            address=address, expires__gt=now)
+    except GeocodedAddress.DoesNotExist:
+        return None
+
+    if geocoded.lat is None:
+        coordinates = NOT_FOUND
+    else:
+        coordinates = [geocoded.lat, geocoded.lng]
+
+    remember(address, coordinates, geocoded.expires)
+    return coordinates
+
+
+def store(address, coordinates):
+    """
+    Cache the coordinates of a normalized address, as a [lat, lng] list, or
+    NOT_FOUND if the geocoder could not find it.
+    """
+    if coordinates is NOT_FOUND:
+        lat = lng = None
+        ttl = settings.GEOCODE_NEGATIVE_TTL
+    else:
+        lat, lng = coordinates
+        ttl = settings.GEOCODE_CACHE_TTL
+
+    expires = timezone.now() + timedelta(seconds=ttl)
+    GeocodedAddress.objects.update_or_create(
+        address=address,
+        defaults={'lat': lat, 'lng': lng, 'expires': expires})
+    remember(address, coordinates, expires)
+
+
+def clear():
+    """
+    Empty this worker's cache. The GeocodedAddress table is left as it is.
+    """
+    with _lock:
+        _recent.clear()
@@ -0,0 +1,99 @@
+"""
+Background geocoding of vendor addresses.
+
+When GEOCODE_ASYNC is set, the vendor entry view saves vendors without
+waiting for the geocoder, unless their address is already in the geocode
+cache. Their location is marked as pending and their id is queued here, and
+GEOCODE_WORKERS threads in each process look up the addresses and save the
+locations found.
+
+The queue is held in memory, so vendors left pending by a restart, or by an
+address the geocoder could not find, are retried by the geocode_pending
+management command.
+"""
+from django.conf import settings
+from django.contrib.gis.geos import fromstr
+from django.db import connection
+from django.utils import timezone
+
+from whats_fresh.whats_fresh_api.models import Vendor
+from whats_fresh.whats_fresh_api.functions import (coordinates_from_address,
+                                                   BadAddressException)
+from whats_fresh.whats_fresh_api import spatial, documents, response_cache
+
+import logging
+import threading
+import Queue
+
+logger = logging.getLogger(__name__)
+
+_queue = Queue.Queue()
+_workers = []
+_lock = threading.Lock()
+
+
+def resolve(vendor_id):
+    """
+    Geocode a pending vendor's address and save its location. Returns
+    whether the location was saved.
+
+    The location is only saved if the vendor's address has not changed
+    while it was being geocoded; the newer address will have been queued
+    in its turn.
+    """
+    try:
+        vendor = Vendor.objects.get(id=vendor_id, location_pending=True)
+    except Vendor.DoesNotExist:
+        # Deleted, or resolved already
+        return False
+
+    try:
+        lat, lng = coordinates_from_address(
+            vendor.street, vendor.city, vendor.state, vendor.zip)
+    except BadAddressException as e:
+        logger.warning("Could not geocode vendor %s: %s", vendor_id, e)
+        return False
+
+    updated = Vendor.objects.filter(
+        id=vendor_id, location_pending=True, street=vendor.street,
+        city=vendor.city, state=vendor.state, zip=vendor.zip
+    ).update(
+        location=fromstr('POINT(%s %s)' % (lng, lat), srid=4326),
+        location_pending=False,
+        modified=timezone.now())
+
+    # update() sends no signals, so invalidate as a save would
+    if updated:
+        documents.refresh_vendors([vendor_id])
+        spatial.invalidate()
+        response_cache.invalidate(Vendor)
+    return bool(updated)
+
+
+def work():
+    while True:
+        vendor_id = _queue.get()
+        try:
+            resolve(vendor_id)
+        except Exception:
+            logger.exception("Error geocoding vendor %s", vendor_id)
+        finally:
+            # Each thread has its own database connection
+            connection.close()
+            _queue.task_done()
+
+
+def enqueue(vendor_id):
+    """
+    Queue a vendor to have its pending location geocoded, starting this
+    process's worker threads if they are not running.
+    """
+    with _lock:
+        _workers[:] = [worker for worker in _workers if worker.is_alive()]
+        while len(_workers) < settings.GEOCODE_WORKERS:
+            worker = threading.Thread(target=work, name='geocode-worker')
+            worker.daemon = True
+            worker.start()
+            _workers.append(worker)
+
+    _queue.put(vendor_id)
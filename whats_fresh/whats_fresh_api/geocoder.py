@@ -0,0 +1,230 @@
+"""
+The HTTP client used to look up vendor addresses with the geocoder.
+
+Requests share a pooled requests.Session, so connections to the geocoder
+are reused, and are bounded by GEOCODER_CONNECT_TIMEOUT and
+GEOCODER_READ_TIMEOUT. Connection errors, timeouts and server errors are
+retried up to GEOCODER_RETRIES times, with exponential backoff starting at
+GEOCODER_BACKOFF seconds.
+
+After GEOCODER_FAILURE_THRESHOLD lookups in a row have failed, a circuit
+breaker fails further lookups immediately for GEOCODER_RESET_TIMEOUT
+seconds, rather than tying up workers waiting on a geocoder that is down.
+A single lookup is then let through to test whether it has recovered.
+"""
+from django.conf import settings
+
+from requests.adapters import HTTPAdapter
+
+import requests
+import threading
+import time
+
+
+class GeocoderError(Exception):
+
+    """
+    The exception thrown if the geocoder could not be reached, did not
+    answer in time, or answered with an error.
+    """
+
+
+class CircuitBreaker(object):
+
+    """
+    Track failures of an upstream service, and open once failure_threshold
+    calls in a row have failed. While open, calls are refused until
+    reset_timeout seconds have passed, after which one trial call is
+    allowed; the breaker closes again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened is not None
+
+    def allow(self):
+        """
+        Return whether a call may be made now.
+        """
+        with self._lock:
+            if self.opened is None:
+                return True
+            if time.time() - self.opened >= self.reset_timeout:
+                # Let one trial call through, and hold the others back for
+                # another reset_timeout in case it fails too
+                self.opened = time.time()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened = time.time()
+
+
+class Metrics(object):
+
+    """
+    Count the geocoder lookups made by this worker and how long they took.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.failures = 0
+            self.retries = 0
+            self.rejected = 0
+            self.total_latency = 0.0
+            self.max_latency = 0.0
+
+    def record(self, latency, failed=False, retries=0):
+        with self._lock:
+            self.requests += 1
+            self.retries += retries
+            if failed:
+                self.failures += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        """
+        Return the counts, and the mean and maximum lookup latency in
+        seconds, as a dictionary.
+        """
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'failures': self.failures,
+                'retries': self.retries,
+                'rejected': self.rejected,
+                'mean_latency': (self.total_latency / self.requests
+                                 if self.requests else 0.0),
+                'max_latency': self.max_latency
+            }
+
+
+class GeocoderClient(object):
+
+    """
+    Look up addresses at a geocoder URL, answering in the Google Geocoding
+    API's JSON format.
+    """
+
+    def __init__(self, url, connect_timeout, read_timeout, retries=0,
+                 backoff=0, breaker=None, pool_size=10):
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker
+        self.metrics = Metrics()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, address):
+        response = self.session.get(
+            self.url, params={'address': address}, timeout=self.timeout)
+        if response.status_code >= 500:
+            raise GeocoderError(
+                "Geocoder returned HTTP %s" % response.status_code)
+        response.raise_for_status()
+        return response.json()
+
+    def geocode(self, address):
+        """
+        Return the geocoder's decoded JSON response for an address.
+
+        Raises GeocoderError if every attempt failed, or if the circuit
+        breaker is open.
+        """
+        if self.breaker and not self.breaker.allow():
+            self.metrics.record_rejected()
+            raise GeocoderError("Geocoder circuit breaker is open")
+
+        start = time.time()
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                data = self.request(address)
+            except (requests.ConnectionError, requests.Timeout,
+                    GeocoderError) as e:
+                error = e
+                continue
+            except (requests.RequestException, ValueError) as e:
+                # Client errors and unreadable responses will not be fixed
+                # by asking again
+                error = e
+                break
+
+            self.metrics.record(time.time() - start, retries=attempt)
+            if self.breaker:
+                self.breaker.record_success()
+            return data
+
+        self.metrics.record(time.time() - start, failed=True, retries=attempt)
+        if self.breaker:
+            self.breaker.record_failure()
+        raise GeocoderError(
+            "{0}: {1}".format(type(error).__name__, str(error)))
+
+
+_client = None
+_lock = threading.Lock()
+
+
+def client():
+    """
+    Return this worker's geocoder client, creating it from the GEOCODER_*
+    settings on first use.
+    """
+    global _client
+
+    with _lock:
+        if _client is None:
+            _client = GeocoderClient(
+                settings.GEOCODER_URL,
+                settings.GEOCODER_CONNECT_TIMEOUT,
+                settings.GEOCODER_READ_TIMEOUT,
+                retries=settings.GEOCODER_RETRIES,
+                backoff=settings.GEOCODER_BACKOFF,
+                breaker=CircuitBreaker(
+                    settings.GEOCODER_FAILURE_THRESHOLD,
+                    settings.GEOCODER_RESET_TIMEOUT),
+                pool_size=settings.GEOCODER_POOL_SIZE)
+        return _client
+
+
+def reset():
+    """
+    Drop this worker's geocoder client, so it is recreated from the current
+    settings on next use.
+    """
+    global _client
+
+    with _lock:
+        _client = None
@@ -0,0 +1,151 @@
+from optparse import make_option
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from whats_fresh.whats_fresh_api.models import (Vendor, Product, Preparation,
+                                                ProductPreparation,
+                                                VendorProduct)
+
+
+class Command(BaseCommand):
+
+    """
+    Time the queries behind /vendors/products/<id> and
+    /products/vendors/<id> against a large number of generated vendors and
+    products, comparing the joins the API used to use with the semi-joins it
+    uses now, and show the plans of the semi-joins.
+
+    Every product is made in several preparations, and vendors sell several
+    preparations of the same product, so the joins return each vendor or
+    product several times. The generated rows are created inside a
+    transaction which is rolled back afterwards, so nothing is left in the
+    database.
+    """
+
+    help = 'Benchmark the vendors-by-product and products-by-vendor queries'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--vendors', type='int', default=10000,
+                    help='Number of vendors to generate'),
+        make_option('--products', type='int', default=500,
+                    help='Number of products to generate'),
+        make_option('--preparations', type='int', default=5,
+                    help='Number of preparations of each product'),
+        make_option('--sold', type='int', default=4,
+                    help='Number of products each vendor sells, in every '
+                         'preparation'),
+        make_option('--queries', type='int', default=50,
+                    help='Number of lookups to time for each query'),
+    )
+
+    def handle(self, *args, **options):
+        random.seed(0)
+
+        queries = [
+            ('vendors join', lambda product, vendor: Vendor.objects.filter(
+                vendorproduct__product_preparation__product__id__exact=(
+                    product))),
+            ('vendors semi-join', lambda product, vendor:
+                Vendor.objects.filter(id__in=VendorProduct.objects.filter(
+                    product_preparation__product=product).values('vendor'))),
+            ('products join', lambda product, vendor: Product.objects.filter(
+                productpreparation__vendorproduct__vendor__id__exact=vendor)),
+            ('products semi-join', lambda product, vendor:
+                Product.objects.filter(
+                    id__in=ProductPreparation.objects.filter(
+                        vendorproduct__vendor=vendor).values('product'))),
+        ]
+
+        with transaction.atomic():
+            products, vendors = self.create_rows(options)
+            lookups = [(random.choice(products), random.choice(vendors))
+                       for i in range(options['queries'])]
+
+            for name, query in queries:
+                start = time.time()
+                rows = distinct = 0
+                for product, vendor in lookups:
+                    ids = list(query(product, vendor).values_list(
+                        'id', flat=True))
+                    rows += len(ids)
+                    distinct += len(set(ids))
+                elapsed = time.time() - start
+
+                self.stdout.write(
+                    '%-18s %8.2f ms/query, %d rows, %d distinct' % (
+                        name, elapsed * 1000 / len(lookups), rows, distinct))
+
+            product, vendor = lookups[0]
+            for name, query in queries:
+                if 'semi-join' in name:
+                    self.explain(name, query(product, vendor))
+
+            transaction.set_rollback(True)
+
+    def explain(self, name, queryset):
+        """
+        Write the plan of a query, and whether it is a semi-join read from
+        the join indexes.
+        """
+        sql, params = queryset.values('id').query.sql_with_params()
+        cursor = connection.cursor()
+        cursor.execute('EXPLAIN ' + sql, params)
+        plan = '\n'.join(row[0] for row in cursor.fetchall())
+
+        self.stdout.write('\n%s plan:\n%s' % (name, plan))
+        self.stdout.write('Semi-join: %s; indexes used: %s' % (
+            'yes' if re.search(r'Semi Join|Unique|HashAggregate', plan)
+            else 'NO',
+            ', '.join(sorted(set(re.findall(r'using (\S+)', plan)))) or
+            'none'))
+
+    def create_rows(self, options):
+        self.stdout.write(
+            'Generating %(vendors)d vendors and %(products)d products...' %
+            options)
+
+        preparations = [
+            Preparation.objects.create(name='Preparation %d' % i)
+            for i in range(options['preparations'])]
+
+        Product.objects.bulk_create(
+            (Product(name='Product %d' % i, description='', season='',
+                     market_price='')
+             for i in xrange(options['products'])),
+            batch_size=1000)
+        products = list(Product.objects.values_list('id', flat=True))
+
+        ProductPreparation.objects.bulk_create(
+            (ProductPreparation(product_id=product,
+                                preparation=preparation)
+             for product in products for preparation in preparations),
+            batch_size=1000)
+        product_preparations = {}
+        for id, product in ProductPreparation.objects.values_list(
+                'id', 'product'):
+            product_preparations.setdefault(product, []).append(id)
+
+        Vendor.objects.bulk_create(
+            (Vendor(name='Vendor %d' % i, description='', street='',
+                    city='', state='OR', zip='', contact_name='')
+             for i in xrange(options['vendors'])),
+            batch_size=1000)
+        vendors = list(Vendor.objects.values_list('id', flat=True))
+
+        VendorProduct.objects.bulk_create(
+            (VendorProduct(vendor_id=vendor, product_preparation_id=id)
+             for vendor in vendors
+             for product in random.sample(
+                 products, min(options['sold'], len(products)))
+             for id in product_preparations[product]),
+            batch_size=1000)
+
+        cursor = connection.cursor()
+        for model in (Vendor, Product, ProductPreparation, VendorProduct):
+            cursor.execute('ANALYZE "%s"' % model._meta.db_table)
+
+        return products, vendors
@@ -0,0 +1,91 @@
+from optparse import make_option
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.db import connection, transaction
+
+from whats_fresh.whats_fresh_api.models import Vendor
+from whats_fresh.whats_fresh_api.functions import (filter_by_proximity,
+                                                   order_by_distance)
+
+
+class Command(BaseCommand):
+
+    """
+    Time vendor proximity searches against a large number of generated
+    vendors, comparing the spherical distance filter the API used to use
+    (location__distance_lte) with the indexed ST_DWithin filter, and then
+    the first page of the ST_DWithin matches ordered by distance, as the
+    API lists them. Ordering measures every vendor within the radius before
+    the page is taken, so it costs more the more vendors the radius holds.
+
+    The generated vendors are created inside a transaction which is rolled
+    back afterwards, so nothing is left in the database.
+    """
+
+    help = 'Benchmark vendor proximity searches'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--vendors', type='int', default=100000,
+                    help='Number of vendors to generate'),
+        make_option('--queries', type='int', default=50,
+                    help='Number of searches to time for each filter'),
+        make_option('--proximity', type='int', default=20,
+                    help='Search radius in miles'),
+        make_option('--page-size', type='int', default=10,
+                    help='Number of vendors listed by ordered searches'),
+    )
+
+    # Roughly the state of Oregon
+    bounds = {'lat': (42.0, 46.2), 'lng': (-124.6, -116.5)}
+
+    def random_point(self):
+        return Point(random.uniform(*self.bounds['lng']),
+                     random.uniform(*self.bounds['lat']), srid=4326)
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        points = [self.random_point() for i in range(options['queries'])]
+        proximity = options['proximity']
+        page_size = options['page_size']
+
+        # Each search returns the number of vendors it found or listed
+        filters = [
+            ('distance_lte', lambda point: Vendor.objects.filter(
+                location__distance_lte=(point, D(mi=proximity))).count()),
+            ('ST_DWithin', lambda point: filter_by_proximity(
+                Vendor.objects.all(), point, proximity).count()),
+            ('ordered page', lambda point: len(order_by_distance(
+                filter_by_proximity(Vendor.objects.all(), point, proximity),
+                point)[:page_size])),
+        ]
+
+        with transaction.atomic():
+            self.create_vendors(options['vendors'])
+
+            for name, search in filters:
+                start = time.time()
+                found = sum(search(point) for point in points)
+                elapsed = time.time() - start
+
+                self.stdout.write(
+                    '%-14s %8.2f ms/query, %d vendors found' % (
+                        name, elapsed * 1000 / len(points), found))
+
+            transaction.set_rollback(True)
+
+    def create_vendors(self, count):
+        self.stdout.write('Generating %d vendors...' % count)
+
+        Vendor.objects.bulk_create(
+            (Vendor(name='Vendor %d' % i, description='', street='',
+                    city='', state='OR', zip='', contact_name='',
+                    location=self.random_point())
+             for i in xrange(count)),
+            batch_size=1000)
+
+        cursor = connection.cursor()
+        cursor.execute('ANALYZE "%s"' % Vendor._meta.db_table)
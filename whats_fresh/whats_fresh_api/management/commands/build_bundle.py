@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from whats_fresh.whats_fresh_api import bundle
+
+
+class Command(BaseCommand):
+
+    """
+    Build the offline bundle of the current data, if it has not been built,
+    so the first client to ask for it after a deployment or data import does
+    not have to wait for it.
+    """
+
+    help = 'Build the offline bundle of the public dataset'
+
+    def handle(self, *args, **options):
+        version = bundle.current()
+        self.stdout.write('Bundle %s: %s' % (
+            version, bundle.bundle_path(version)))
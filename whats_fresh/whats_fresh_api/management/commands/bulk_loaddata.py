@@ -0,0 +1,252 @@
+from optparse import make_option
+import codecs
+import gzip
+import json
+import re
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers import python, base
+from django.contrib.gis.db.models import GeometryField
+from django.contrib.gis.geos import GEOSGeometry, GEOSException
+from django.db import connection, transaction, IntegrityError
+
+from whats_fresh.whats_fresh_api.models import (Vendor, VendorProduct,
+                                                ProductPreparation, Product,
+                                                Preparation)
+from whats_fresh.whats_fresh_api import (spatial, availability, documents,
+                                         response_cache)
+
+WHITESPACE = re.compile(r'\s*')
+
+
+def read_objects(fixture, chunk_size=64 * 1024):
+    """
+    Yield the objects of a JSON fixture one at a time, reading the file in
+    chunks, so the whole fixture is never held in memory.
+    """
+    reader = codecs.getreader('utf-8')(fixture)
+    decoder = json.JSONDecoder()
+    buffer = u''
+    position = 0
+    expected = u'['
+    end_of_file = False
+    need_more = False
+
+    while True:
+        if need_more:
+            if end_of_file:
+                raise ValueError('Fixture ends before its closing ]')
+            chunk = reader.read(chunk_size)
+            end_of_file = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            need_more = False
+
+        position = WHITESPACE.match(buffer, position).end()
+        if position == len(buffer):
+            need_more = True
+            continue
+
+        character = buffer[position]
+        if expected == u'[':
+            if character != u'[':
+                raise ValueError('Fixture is not a JSON list')
+            position += 1
+            expected = u'{'
+        elif character == u']':
+            return
+        elif expected == u',':
+            if character != u',':
+                raise ValueError('Expected "," but found %r' % character)
+            position += 1
+            expected = u'{'
+        else:
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                # The object may go on in the next chunk
+                if end_of_file:
+                    raise
+                need_more = True
+                continue
+            expected = u','
+            yield item
+
+
+def dependencies(model):
+    """
+    Return the models a model's foreign keys point to.
+    """
+    return [field.rel.to for field in model._meta.local_fields
+            if field.rel and field.rel.to is not model]
+
+
+class Command(BaseCommand):
+
+    """
+    Load large fixtures in Django's JSON fixture format.
+
+    Unlike loaddata, the fixture is read one object at a time, and objects
+    are inserted in batches per model (and per many-to-many table) rather
+    than saved one by one. Before a model's batch is inserted, the pending
+    batches of the models its foreign keys point to are inserted, so
+    ProductPreparation rows go in before the VendorProduct rows that use
+    them. Everything is loaded in one transaction, as loaddata does, so
+    objects may still refer to objects later in the fixture.
+
+    As with loaddata, no signals are sent and created and modified times
+    are kept as they are in the fixture. Unlike loaddata, objects already in
+    the database are not updated: loading an object whose id is taken fails,
+    and nothing is loaded.
+    """
+
+    args = '<fixture fixture ...>'
+    help = 'Load large JSON fixtures in batches'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size', type='int', default=1000,
+                    help='Number of objects to insert at once'),
+    )
+
+    def deserialize(self, item):
+        """
+        Return the model instance for a fixture object, and the rows of its
+        many-to-many tables as unsaved instances of the through models.
+        """
+        for deserialized in python.Deserializer([item]):
+            instance = deserialized.object
+
+            for field in instance._meta.fields:
+                value = getattr(instance, field.attname)
+                if (isinstance(field, GeometryField) and
+                        isinstance(value, basestring)):
+                    geometry = GEOSGeometry(value)
+                    if geometry.srid is None:
+                        geometry.srid = field.srid
+                    setattr(instance, field.attname, geometry)
+
+            through_rows = []
+            for name, ids in (deserialized.m2m_data or {}).items():
+                field = instance._meta.get_field(name)
+                through = field.rel.through
+                if not through._meta.auto_created:
+                    # Such as Product.preparations, whose rows are loaded
+                    # as ProductPreparation objects
+                    continue
+                source = '%s_id' % field.m2m_field_name()
+                target = '%s_id' % field.m2m_reverse_field_name()
+                through_rows.extend(
+                    through(**{source: instance.pk, target: id})
+                    for id in ids)
+
+            return instance, through_rows
+
+    def add(self, instance):
+        model = type(instance)
+        self.pending.setdefault(model, []).append(instance)
+        if len(self.pending[model]) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model, flushing=()):
+        """
+        Insert a model's pending batch, after those of its dependencies.
+        """
+        if model in flushing:
+            # A cycle; the database checks the keys at the end instead
+            return
+        for dependency in dependencies(model):
+            if self.pending.get(dependency):
+                self.flush(dependency, flushing + (model,))
+
+        batch = self.pending.pop(model, [])
+        if not batch:
+            return
+
+        # bulk_create() would give the objects new created and modified
+        # times, so insert them raw, as loaddata saves them
+        fields = [field for field in model._meta.local_concrete_fields
+                  if not (field.primary_key and
+                          getattr(batch[0], field.attname) is None)]
+        model._base_manager._insert(batch, fields=fields, raw=True)
+
+        self.loaded[model] = self.loaded.get(model, 0) + len(batch)
+
+    def load(self, path):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as fixture:
+            for number, item in enumerate(read_objects(fixture), 1):
+                try:
+                    instance, through_rows = self.deserialize(item)
+                except (base.DeserializationError, ValidationError,
+                        GEOSException, ValueError) as e:
+                    raise CommandError(
+                        'Could not load object %d of %s: %s' % (
+                            number, path, e))
+
+                self.add(instance)
+                for row in through_rows:
+                    self.add(row)
+
+    def load_all(self, paths):
+        """
+        Load the fixtures in a single transaction.
+        """
+        with transaction.atomic():
+            for path in paths:
+                try:
+                    self.load(path)
+                except (IOError, ValueError) as e:
+                    raise CommandError('Could not read %s: %s' % (path, e))
+
+            while self.pending:
+                self.flush(next(iter(self.pending)))
+
+            # The objects were inserted with their ids, so move the id
+            # sequences past them
+            cursor = connection.cursor()
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), list(self.loaded)):
+                cursor.execute(sql)
+
+            # Vendor documents loaded from the fixtures, or built before the
+            # rows they are built from were loaded, may not match the data
+            if set(self.loaded) & set([Vendor, VendorProduct,
+                                       ProductPreparation, Product,
+                                       Preparation]):
+                documents.refresh_all()
+
+    def handle(self, *paths, **options):
+        if not paths:
+            raise CommandError('Give at least one JSON fixture')
+
+        self.batch_size = options['batch_size']
+        self.pending = {}
+        self.loaded = {}
+        start = time.time()
+
+        try:
+            self.load_all(paths)
+        except IntegrityError as e:
+            raise CommandError(
+                'Could not load the fixtures, so nothing was loaded: %s\n'
+                'bulk_loaddata only adds new objects, so load into an empty '
+                'database, or use loaddata to update objects already in '
+                'it.' % str(e).strip())
+
+        # Nothing was saved through the ORM, so invalidate as saves would
+        spatial.invalidate()
+        availability.invalidate()
+        for model in self.loaded:
+            response_cache.invalidate(model)
+
+        elapsed = time.time() - start
+        total = sum(self.loaded.values())
+        for model, count in sorted(
+                self.loaded.items(), key=lambda item: item[0]._meta.db_table):
+            self.stdout.write('%s.%s: %d' % (
+                model._meta.app_label, model._meta.object_name, count))
+        self.stdout.write('Loaded %d objects in %.2fs (%.0f objects/s)' % (
+            total, elapsed, total / elapsed if elapsed else 0))
@@ -0,0 +1,37 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from whats_fresh.whats_fresh_api import export
+
+
+class Command(BaseCommand):
+
+    """
+    Write the vendor by product preparation availability matrix, with each
+    vendor's price and whether the product is available, as newline-delimited
+    JSON or CSV. The rows are fetched and written a chunk at a time.
+    """
+
+    help = 'Export the catalogue as NDJSON or CSV'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--format', default='ndjson',
+                    choices=sorted(export.FORMATS),
+                    help='ndjson (the default) or csv'),
+        make_option('--output',
+                    help='File to write to, rather than standard output'),
+        make_option('--chunk-size', type='int',
+                    help='Number of rows to fetch at once'),
+    )
+
+    def handle(self, *args, **options):
+        chunks = export.export(options['format'], options['chunk_size'])
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
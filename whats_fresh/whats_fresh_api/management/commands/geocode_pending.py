@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from whats_fresh.whats_fresh_api.models import Vendor
+from whats_fresh.whats_fresh_api.geocode_queue import resolve
+
+
+class Command(BaseCommand):
+
+    """
+    Geocode the addresses of every vendor whose location is still pending,
+    such as those left queued when the server was restarted.
+    """
+
+    help = 'Geocode vendors whose location is pending'
+
+    def handle(self, *args, **options):
+        resolved = failed = 0
+        for vendor_id in Vendor.objects.filter(
+                location_pending=True).values_list('id', flat=True):
+            if resolve(vendor_id):
+                resolved += 1
+            else:
+                failed += 1
+
+        self.stdout.write('Resolved %d vendors, %d still pending' % (
+            resolved, failed))
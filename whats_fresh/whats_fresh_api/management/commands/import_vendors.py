@@ -0,0 +1,216 @@
+from optparse import make_option
+from multiprocessing.pool import ThreadPool
+import csv
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.gis.geos import fromstr
+from django.db import connection, transaction
+
+from whats_fresh.whats_fresh_api.models import (Vendor, VendorProduct,
+                                                ProductPreparation)
+from whats_fresh.whats_fresh_api.forms import VendorForm
+from whats_fresh.whats_fresh_api.functions import (coordinates_from_address,
+                                                   BadAddressException)
+from whats_fresh.whats_fresh_api import (spatial, availability, documents,
+                                         response_cache)
+
+
+def read_rows(path):
+    """
+    Return the vendors in a CSV file with a header row, or a JSON file
+    holding a list of objects, as dictionaries.
+    """
+    with open(path, 'rb') as vendor_file:
+        if os.path.splitext(path)[1].lower() == '.json':
+            return json.load(vendor_file)
+        return [
+            dict((key, value.decode('utf-8')) for key, value in row.items())
+            for row in csv.DictReader(vendor_file)]
+
+
+def parse_ids(ids):
+    """
+    Return a list of product preparation ids, given as a list or as a
+    comma-separated string like the entry form's preparation_ids.
+    """
+    if isinstance(ids, basestring):
+        ids = [id for id in ids.split(',') if id.strip()]
+    return sorted(set(int(id) for id in ids or []))
+
+
+def locate(row):
+    """
+    Return the coordinates of a vendor row, and an error message if they
+    could not be found. Rows may give their lat and lng, or are geocoded.
+    """
+    try:
+        if row.get('lat') not in (None, '') and row.get('lng') not in (
+                None, ''):
+            return [float(row['lat']), float(row['lng'])], None
+        return coordinates_from_address(
+            row.get('street', ''), row.get('city', ''), row.get('state', ''),
+            row.get('zip', '')), None
+    except (BadAddressException, ValueError) as e:
+        return None, 'Address not found: %s' % e
+    finally:
+        # Runs in a pool thread, which has its own database connection
+        connection.close()
+
+
+def allocate_ids(model, count):
+    """
+    Reserve count ids from a model's id sequence. bulk_create does not set
+    the ids of the objects it creates, so they are set beforehand instead.
+    """
+    cursor = connection.cursor()
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+        "FROM generate_series(1, %s)", [model._meta.db_table, count])
+    return [row[0] for row in cursor.fetchall()]
+
+
+class Command(BaseCommand):
+
+    """
+    Import vendors from CSV or JSON files.
+
+    Each vendor has the fields of the vendor entry form, and a
+    preparation_ids list of the product preparations it sells (in CSV, a
+    comma-separated string). Rows are validated with VendorForm, and the
+    addresses of the valid rows are then geocoded by a bounded pool of
+    threads, unless the row gives its lat and lng. The vendors and their
+    products are written with bulk_create, one transaction per batch. Rows
+    that fail are reported and skipped.
+    """
+
+    args = '<file file ...>'
+    help = 'Import vendors from CSV or JSON files'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--workers', type='int', default=4,
+                    help='Number of addresses to geocode at once'),
+        make_option('--batch-size', type='int', default=500,
+                    help='Number of vendors to write per transaction'),
+    )
+
+    def validate(self, row, preparation_ids):
+        """
+        Return an unsaved Vendor for a row, without its location, and the ids
+        of the product preparations it sells, or raise ValueError describing
+        what is wrong with the row.
+        """
+        ids = parse_ids(row.get('preparation_ids'))
+        if not ids:
+            raise ValueError("You must choose at least one product.")
+        unknown = [id for id in ids if id not in preparation_ids]
+        if unknown:
+            raise ValueError("Unknown product preparations: %s" % ', '.join(
+                str(id) for id in unknown))
+
+        data = dict(row)
+        # Needed for form validation to pass, as in the entry view. A plain
+        # dict is not a QueryDict, so the field must be given as a list
+        data['products_preparations'] = ids
+
+        vendor_form = VendorForm(data)
+        # Set once the address is geocoded, as for a pending location
+        vendor_form.fields['location'].required = False
+        if not vendor_form.is_valid():
+            raise ValueError('; '.join(
+                '%s: %s' % (field, ' '.join(messages))
+                for field, messages in sorted(vendor_form.errors.items())))
+
+        del vendor_form.cleaned_data['products_preparations']
+        del vendor_form.cleaned_data['location']
+        return Vendor(**vendor_form.cleaned_data), ids
+
+    def save(self, batch):
+        """
+        Write a batch of (vendor, preparation ids) pairs, and their vendor
+        documents, in one transaction.
+        """
+        with transaction.atomic():
+            for (vendor, ids), id in zip(
+                    batch, allocate_ids(Vendor, len(batch))):
+                vendor.id = id
+            Vendor.objects.bulk_create([vendor for vendor, ids in batch])
+
+            vendor_products = [
+                VendorProduct(vendor_id=vendor.id, product_preparation_id=id)
+                for vendor, ids in batch for id in ids]
+            VendorProduct.objects.bulk_create(vendor_products)
+
+            documents.refresh_vendors([vendor.id for vendor, ids in batch])
+
+        return len(vendor_products)
+
+    def handle(self, *paths, **options):
+        if not paths:
+            raise CommandError('Give at least one CSV or JSON vendor file')
+
+        rows = []
+        for path in paths:
+            try:
+                rows.extend((path, number, row) for number, row in
+                            enumerate(read_rows(path), 1))
+            except (IOError, ValueError) as e:
+                raise CommandError('Could not read %s: %s' % (path, e))
+
+        start = time.time()
+        preparation_ids = set(
+            ProductPreparation.objects.values_list('id', flat=True))
+        validated = []
+        errors = []
+        for path, number, row in rows:
+            try:
+                validated.append(
+                    (path, number, row, self.validate(row, preparation_ids)))
+            except ValueError as e:
+                errors.append('%s:%s: %s' % (path, number, e))
+
+        # Only the rows which passed validation are geocoded
+        geocoding = time.time()
+        pool = ThreadPool(options['workers'])
+        try:
+            located = pool.map(
+                locate, [row for path, number, row, vendor in validated])
+        finally:
+            pool.close()
+            pool.join()
+        geocoded = time.time()
+
+        valid = []
+        for (path, number, row, (vendor, ids)), (coordinates, error) in zip(
+                validated, located):
+            if error:
+                errors.append('%s:%s: %s' % (path, number, error))
+                continue
+            vendor.location = fromstr(
+                'POINT(%s %s)' % (coordinates[1], coordinates[0]), srid=4326)
+            valid.append((vendor, ids))
+
+        products = 0
+        batch_size = options['batch_size']
+        for first in range(0, len(valid), batch_size):
+            products += self.save(valid[first:first + batch_size])
+
+        # bulk_create sends no signals, so invalidate as saves would
+        if valid:
+            spatial.invalidate()
+            availability.invalidate()
+            response_cache.invalidate(Vendor)
+            response_cache.invalidate(VendorProduct)
+
+        for error in errors:
+            self.stderr.write(error)
+
+        elapsed = time.time() - start
+        self.stdout.write(
+            'Imported %d vendors and %d products from %d rows in %.2fs '
+            '(%.1f vendors/s, %.2fs geocoding); %d rows failed' % (
+                len(valid), products, len(rows), elapsed,
+                len(valid) / elapsed if elapsed else 0,
+                geocoded - geocoding, len(errors)))
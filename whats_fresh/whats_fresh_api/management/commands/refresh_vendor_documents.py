@@ -0,0 +1,31 @@
+from optparse import make_option
+import time
+
+from django.core.management.base import BaseCommand
+
+from whats_fresh.whats_fresh_api import documents, response_cache
+from whats_fresh.whats_fresh_api.models import Vendor
+
+
+class Command(BaseCommand):
+
+    """
+    Build the stored API document of every vendor, such as after upgrading,
+    or after changing vendors' data outside the API and entry interface.
+    Vendors are refreshed a chunk at a time, each chunk in a transaction.
+    """
+
+    help = 'Rebuild the stored API documents of all vendors'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--chunk-size', type='int',
+                    help='Number of vendors to refresh in each transaction'),
+    )
+
+    def handle(self, *args, **options):
+        start = time.time()
+        refreshed = documents.refresh_all(options['chunk_size'])
+        response_cache.invalidate(Vendor)
+
+        self.stdout.write('Refreshed %d vendor documents in %.2fs' % (
+            refreshed, time.time() - start))
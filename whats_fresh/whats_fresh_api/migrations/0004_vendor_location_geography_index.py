@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    """
+    Index vendor locations as geography, so that proximity searches in miles
+    can use ST_DWithin on the index instead of computing the spherical
+    distance to every vendor.
+    """
+
+    dependencies = [
+        ('whats_fresh_api', '0003_auto_20141121_1945'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX "whats_fresh_api_vendor_location_geography_id" '
+            'ON "whats_fresh_api_vendor" '
+            'USING GIST (("location"::geography));',
+            reverse_sql='DROP INDEX '
+                        '"whats_fresh_api_vendor_location_geography_id";'),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whats_fresh_api', '0004_vendor_location_geography_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='preparation',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, null=True),
+            preserve_default=True,
+        ),
+    ]
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whats_fresh_api', '0005_preparation_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id',
+                    models.AutoField(verbose_name='ID',
+                                     serialize=False,
+                                     auto_created=True,
+                                     primary_key=True)),
+                ('model', models.TextField()),
+                ('object_id', models.IntegerField()),
+                ('deleted', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterIndexTogether(
+            name='tombstone',
+            index_together=set([('model', 'deleted')]),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='preparation',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, null=True,
+                                       db_index=True),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='story',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='vendor',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='video',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+            preserve_default=True,
+        ),
+    ]
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.contrib.gis.db.models.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whats_fresh_api', '0007_geocodedaddress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='location_pending',
+            field=models.BooleanField(default=False),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='vendor',
+            name='location',
+            field=django.contrib.gis.db.models.fields.PointField(
+                srid=4326, null=True),
+            preserve_default=True,
+        ),
+    ]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whats_fresh_api', '0008_vendor_location_pending'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='image',
+            index_together=set([('name', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='preparation',
+            index_together=set([('name', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='product',
+            index_together=set([('name', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='story',
+            index_together=set([('name', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='vendor',
+            index_together=set([('name', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='video',
+            index_together=set([('name', 'id')]),
+        ),
+    ]
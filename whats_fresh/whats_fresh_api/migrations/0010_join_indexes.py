@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whats_fresh_api', '0009_name_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='productpreparation',
+            index_together=set([('product', 'preparation')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='vendorproduct',
+            index_together=set([('vendor', 'product_preparation')]),
+        ),
+    ]
@@ -1,7 +1,6 @@
 from django.contrib.gis.db import models
 import os
 from phonenumber_field.modelfields import PhoneNumberField
-import whats_fresh.whats_fresh_api.signals  # NOQA
 
 
 class Image(models.Model):
@@ -28,7 +27,7 @@ class Image(models.Model):
     caption = models.TextField(blank=True)
 
     created = models.DateTimeField(auto_now_add=True)
-    modified = models.DateTimeField(auto_now=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
 
     def natural_key(self):
         return {
@@ -37,6 +36,9 @@ class Image(models.Model):
             'link': self.image.url
         }
 
+    class Meta:
+        index_together = [['name', 'id']]
+
 
 class Vendor(models.Model):
 
@@ -69,7 +71,13 @@ class Vendor(models.Model):
     phone = PhoneNumberField(blank=True, null=True)
 
     # Geo Django field to store a point
-    location = models.PointField()
+    # While location_pending is set, the address is waiting to be geocoded
+    # (see geocode_queue.py), and location is null for a new vendor
+    location = models.PointField(null=True)
+    location_pending = models.BooleanField(default=False)
+    # The vendor's API dictionary, encoded, refreshed whenever it changes
+    # (see documents.py)
+    document = models.TextField(blank=True, editable=False)
     objects = models.GeoManager()
 
     story = models.ForeignKey('Story', null=True, blank=True)
@@ -80,7 +88,10 @@ class Vendor(models.Model):
         blank=True)
 
     created = models.DateTimeField(auto_now_add=True)
-    modified = models.DateTimeField(auto_now=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        index_together = [['name', 'id']]
 
 
 class Product(models.Model):
@@ -114,7 +125,10 @@ class Product(models.Model):
         'Preparation', related_name='products', through='ProductPreparation')
 
     created = models.DateTimeField(auto_now_add=True)
-    modified = models.DateTimeField(auto_now=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        index_together = [['name', 'id']]
 
 
 class Story(models.Model):
@@ -139,7 +153,10 @@ class Story(models.Model):
     images = models.ManyToManyField('Image', null=True, blank=True)
     videos = models.ManyToManyField('Video', null=True, blank=True)
     created = models.DateTimeField(auto_now_add=True)
-    modified = models.DateTimeField(auto_now=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        index_together = [['name', 'id']]
 
 
 class Preparation(models.Model):
@@ -159,6 +176,12 @@ class Preparation(models.Model):
     description = models.TextField(blank=True)
     additional_info = models.TextField(blank=True)
 
+    # Preparations added before this field existed have no modified time
+    modified = models.DateTimeField(auto_now=True, null=True, db_index=True)
+
+    class Meta:
+        index_together = [['name', 'id']]
+
 
 class ProductPreparation(models.Model):
 
@@ -176,6 +199,9 @@ class ProductPreparation(models.Model):
     product = models.ForeignKey(Product)
     preparation = models.ForeignKey(Preparation)
 
+    class Meta:
+        index_together = [['product', 'preparation']]
+
 
 class VendorProduct(models.Model):
 
@@ -200,6 +226,9 @@ class VendorProduct(models.Model):
     vendor_price = models.TextField(blank=True)
     available = models.NullBooleanField()
 
+    class Meta:
+        index_together = [['vendor', 'product_preparation']]
+
 
 class Video(models.Model):
     """
@@ -221,7 +250,7 @@ class Video(models.Model):
     name = models.TextField(default='')
 
     created = models.DateTimeField(auto_now_add=True)
-    modified = models.DateTimeField(auto_now=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
 
     def natural_key(self):
         return {
@@ -229,3 +258,52 @@ class Video(models.Model):
             'name': self.name,
             'link': self.video
         }
+
+    class Meta:
+        index_together = [['name', 'id']]
+
+
+class Tombstone(models.Model):
+
+    """
+    A Tombstone records the deletion of an object served by the API, so
+    that clients syncing changes with ?modified_since=<time> can delete
+    their copies too, and so that deletions move the Last-Modified time of
+    the responses built from the object on (see conditional.py).
+
+    The model field holds the model name of the deleted object, as in
+    Vendor._meta.model_name.
+    """
+
+    def __unicode__(self):
+        return "Deleted %s %s" % (self.model, self.object_id)
+
+    model = models.TextField()
+    object_id = models.IntegerField()
+    deleted = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        index_together = [['model', 'deleted']]
+
+
+class GeocodedAddress(models.Model):
+
+    """
+    The GeocodedAddress model caches the coordinates the geocoder returned
+    for a normalized address (see geocode_cache.py), until the expires time.
+
+    Addresses the geocoder could not find are kept with null coordinates, so
+    they are not looked up again until they expire.
+    """
+
+    def __unicode__(self):
+        return self.address
+
+    address = models.TextField(unique=True)
+    lat = models.FloatField(null=True)
+    lng = models.FloatField(null=True)
+    expires = models.DateTimeField()
+
+
+# The signal receivers refer to the models above, so are imported last
+import whats_fresh.whats_fresh_api.signals  # NOQA
@@ -0,0 +1,219 @@
+"""
+Keyset pagination for the entry interface's lists.
+
+The lists are ordered by name, and each page's Previous and Next links
+carry the (name, id) of the row they continue from, rather than an offset.
+Pages are then read from the (name, id) index of each model, so the last
+page costs no more than the first. A plain ?page=N, from a bookmark or an
+older link, is still read by offset.
+
+The number of pages is shown from the model's row count, or for tables
+larger than PAGE_COUNT_ESTIMATE rows, from the database's statistics. Either
+is kept in the default cache for PAGE_COUNT_TIMEOUT seconds, or until a row
+is saved or deleted (see signals.py).
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.utils.functional import cached_property
+from django.utils.http import urlencode
+
+from whats_fresh.whats_fresh_api.functions import (encode_cursor,
+                                                   decode_cursor)
+
+import math
+
+POSITION_KINDS = [basestring, (int, long)]
+
+
+def count_key(model):
+    return 'entry:count:%s' % model._meta.model_name
+
+
+def count_rows(model):
+    """
+    Return the number of rows of a model's table, and whether it is an
+    estimate, from the default cache if it has been counted already.
+    """
+    cache = caches['default']
+    counted = cache.get(count_key(model))
+    if counted is not None:
+        return counted
+
+    cursor = connection.cursor()
+    cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                   [connection.ops.quote_name(model._meta.db_table)])
+    row = cursor.fetchone()
+    if row and row[0] > settings.PAGE_COUNT_ESTIMATE:
+        counted = [int(row[0]), True]
+    else:
+        counted = [model._default_manager.count(), False]
+
+    cache.set(count_key(model), counted, settings.PAGE_COUNT_TIMEOUT)
+    return counted
+
+
+def invalidate(model):
+    """
+    Forget a model's row count, so it is counted again for the next page.
+    """
+    caches['default'].delete(count_key(model))
+
+
+def get_position(params, name):
+    """
+    Return the (name, id) position given in a Previous or Next link, or None
+    if there is none or it is not valid.
+    """
+    cursor = params.get(name)
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor, 2, POSITION_KINDS)
+    except Exception:
+        return None
+
+
+def get_number(params):
+    try:
+        return int(params.get('page', 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+class KeysetPaginator(object):
+
+    """
+    Split a model's rows into pages of per_page rows, ordered by name and
+    id. It offers the parts of Django's Paginator used by list.html.
+    """
+
+    def __init__(self, model, per_page):
+        self.model = model
+        self.per_page = per_page
+
+    @cached_property
+    def counted(self):
+        return count_rows(self.model)
+
+    @property
+    def count(self):
+        return self.counted[0]
+
+    @property
+    def estimated(self):
+        return self.counted[1]
+
+    @property
+    def num_pages(self):
+        return max(1, int(math.ceil(self.count / float(self.per_page))))
+
+    def after(self, position, operator='>'):
+        """
+        Return the model's rows after (or before) a position, ordered from
+        it.
+        """
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        queryset = self.model._default_manager.extra(
+            where=['(%s.%s, %s.%s) %s (%%s, %%s)' % (
+                table, qn('name'), table, qn('id'), operator)],
+            params=position)
+
+        if operator == '<':
+            return queryset.order_by('-name', '-id')
+        return queryset.order_by('name', 'id')
+
+    def page(self, params):
+        """
+        Return the page requested by the query parameters of a list view:
+        the page after ?after=, the page before ?before=, or page number
+        ?page=. The page number is only used to number pages reached from a
+        link. Invalid or out of range requests get the first or last page.
+        """
+        number = get_number(params)
+        after = get_position(params, 'after')
+        before = get_position(params, 'before')
+
+        if before:
+            rows = list(self.after(before, '<')[:self.per_page + 1])
+            if len(rows) > self.per_page:
+                return KeysetPage(rows[self.per_page - 1::-1], max(number, 2),
+                                  self, True, True)
+            # Fewer rows than a page before the position: show a full first
+            # page instead.
+            return self.numbered_page(1)
+
+        if after:
+            rows = list(self.after(after)[:self.per_page + 1])
+            if rows:
+                return KeysetPage(rows[:self.per_page], max(number, 2), self,
+                                  True, len(rows) > self.per_page)
+            # Everything after the position has been deleted
+            number = self.num_pages
+
+        return self.numbered_page(number)
+
+    def numbered_page(self, number):
+        number = min(max(number, 1), self.num_pages)
+        queryset = self.model._default_manager.order_by('name', 'id')
+        offset = (number - 1) * self.per_page
+
+        rows = list(queryset[offset:offset + self.per_page + 1])
+        if not rows and number > 1:
+            # The count is out of date; show the last page that exists.
+            rows = list(queryset.reverse()[:self.per_page])[::-1]
+            return KeysetPage(rows, number, self, True, False)
+
+        return KeysetPage(rows[:self.per_page], number, self, number > 1,
+                          len(rows) > self.per_page)
+
+
+class KeysetPage(object):
+
+    """
+    A page of rows from KeysetPaginator. The next_query and previous_query
+    give the query strings of the links to the pages either side of it.
+    """
+
+    def __init__(self, object_list, number, paginator, previous, next):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self.previous = previous and bool(object_list)
+        self.next = next
+
+    def __repr__(self):
+        return '<Page %s of %s>' % (self.number, self.paginator.num_pages)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next
+
+    def has_previous(self):
+        return self.previous
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def position(self, row):
+        return encode_cursor([row.name, row.id])
+
+    def next_query(self):
+        return urlencode({'page': self.next_page_number(),
+                          'after': self.position(self.object_list[-1])})
+
+    def previous_query(self):
+        return urlencode({'page': self.previous_page_number(),
+                          'before': self.position(self.object_list[0])})
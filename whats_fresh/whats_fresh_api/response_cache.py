@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.decorators import available_attrs
+
+from functools import wraps
+import hashlib
+import time
+
+
+def version_key(model):
+    return 'api:version:%s' % model._meta.model_name
+
+
+def get_versions(cache, models):
+    """
+    Return the current version of each model's data in the cache.
+
+    Missing versions are started from the current time rather than from 1,
+    so that if a version is evicted from the cache, responses cached against
+    its earlier values can not become current again.
+    """
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            version = int(time.time() * 1000)
+            cache.add(key, version, None)
+            versions[key] = cache.get(key, version)
+
+    return [versions[key] for key in keys]
+
+
+def response_key(cache, request, models):
+    """
+    Build the cache key for a request: its path, its query parameters in a
+    normalized order, and the versions of the models the response is built
+    from.
+    """
+    params = sorted(
+        (key, request.GET.getlist(key)) for key in request.GET.keys())
+    versions = get_versions(cache, models)
+
+    key = repr((request.path, params, versions))
+    return 'api:response:%s' % hashlib.md5(key).hexdigest()
+
+
+def invalidate(model):
+    """
+    Bump the version of a model's data, so every cached response built from
+    that model is missed from now on.
+    """
+    if not settings.API_CACHE:
+        return
+
+    cache = caches[settings.API_CACHE]
+    try:
+        cache.incr(version_key(model))
+    except ValueError:
+        # The version has not been set (or has expired), so no responses
+        # can be cached against it
+        pass
+
+
+def cache_response(*models):
+    """
+    Cache the responses of a public API view in the API_CACHE cache for
+    API_CACHE_TIMEOUT seconds.
+
+    The models are those the view's responses are built from; saving or
+    deleting any of them invalidates the cached responses (see signals.py).
+    Streaming responses are not cached.
+    """
+    def decorator(view):
+        @wraps(view, assigned=available_attrs(view))
+        def wrapped_view(request, *args, **kwargs):
+            if not settings.API_CACHE or request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            cache = caches[settings.API_CACHE]
+            key = response_key(cache, request, models)
+
+            cached = cache.get(key)
+            if cached is not None:
+                status, content = cached
+                return HttpResponse(
+                    content, status=status, content_type="application/json")
+
+            response = view(request, *args, **kwargs)
+            if not response.streaming:
+                cache.set(key, (response.status_code, response.content),
+                          settings.API_CACHE_TIMEOUT)
+            return response
+        return wrapped_view
+    return decorator
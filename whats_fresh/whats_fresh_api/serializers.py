@@ -0,0 +1,148 @@
+"""
+Serialization of the API's model instances to the dictionaries the API
+returns, and their encoding to JSON. Used by the API views, and by the
+stored vendor documents, the offline bundle and the catalogue export.
+"""
+from django.conf import settings
+from django.core.serializers import python
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from whats_fresh.whats_fresh_api.models import (Vendor, Preparation,
+                                                ProductPreparation)
+from whats_fresh.whats_fresh_api import availability
+
+import json
+
+
+def vendor_products():
+    return Prefetch(
+        'products_preparations',
+        queryset=ProductPreparation.objects.select_related(
+            'product', 'preparation'))
+
+
+def prefetch_vendor_products(queryset, indexed=True):
+    """
+    Fetch the product preparations sold by each vendor in the queryset
+    (along with their products and preparations) in a single batched query,
+    rather than one query per vendor when the vendors are serialized.
+
+    If AVAILABILITY_INDEX is set, the vendors' products are serialized from
+    the availability index instead, so nothing is fetched unless indexed is
+    False.
+    """
+    if indexed and settings.AVAILABILITY_INDEX:
+        return queryset
+    return queryset.prefetch_related(vendor_products())
+
+
+class FreshSerializer(python.Serializer):
+
+    """
+    Serializes model instances to the dictionaries returned by the API.
+
+    Values are left as Python objects (datetimes included), so the response
+    is only encoded to JSON once, by encode().
+    """
+
+    def start_serialization(self):
+        super(FreshSerializer, self).start_serialization()
+        # Looked up once, rather than for each vendor
+        self.index = None
+        if settings.AVAILABILITY_INDEX and self.options.get('indexed', True):
+            self.index = availability.availability_index()
+
+    def get_dump_object(self, obj):
+        self._current['id'] = obj.id
+        ext = {}
+
+        if isinstance(obj, Vendor):
+            self._current['lat'] = obj.location.y
+            self._current['lng'] = obj.location.x
+            del self._current['location']
+            del self._current['location_pending']
+            del self._current['document']
+
+            if self.index is not None:
+                self._current['products'] = self.index.vendor_products(obj.id)
+            else:
+                self._current['products'] = [
+                    {
+                        'name': pp.product.name,
+                        'preparation': pp.preparation.name,
+                        'product_id': pp.product_id,
+                        'preparation_id': pp.preparation_id
+                    }
+                    for pp in obj.products_preparations.all()
+                ]
+
+            # Set by GeoQuerySet.distance() for nearest vendor queries
+            if hasattr(obj, 'distance'):
+                ext['distance'] = obj.distance.mi
+
+            # The address has changed, and lat and lng are from the old one
+            if obj.location_pending:
+                ext['location_pending'] = True
+
+        if isinstance(obj, Preparation):
+            # Only used to validate conditional requests
+            del self._current['modified']
+
+        self._current['ext'] = ext
+        return self._current
+
+
+def serialize(queryset, indexed=True):
+    """
+    Return the list of API dictionaries for the objects in the queryset.
+    Vendors' products are read from the availability index if it is
+    enabled, unless indexed is False.
+    """
+    return FreshSerializer().serialize(
+        queryset, use_natural_foreign_keys=True, indexed=indexed)
+
+
+def serialize_object(obj):
+    """
+    Return the API dictionary for a single object.
+    """
+    return serialize([obj])[0]
+
+
+def encode(data):
+    """
+    Encode a response (including its error block) to a JSON string, using
+    the same formatting for dates and times as Django's JSON serializer.
+    """
+    return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+def iterate_chunks(queryset, limit=None, chunk_size=None):
+    """
+    Yield the objects in the queryset as lists of at most chunk_size objects,
+    stopping after limit objects in total.
+
+    Each chunk is a separate query continuing from the last primary key
+    returned, so only one chunk is held in memory at a time and any
+    prefetch_related lookups on the queryset are applied chunk by chunk.
+    """
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    queryset = queryset.order_by('pk')
+    last_pk = None
+
+    while limit is None or limit > 0:
+        size = chunk_size if limit is None else min(chunk_size, limit)
+
+        if last_pk is not None:
+            chunk = list(queryset.filter(pk__gt=last_pk)[:size])
+        else:
+            chunk = list(queryset[:size])
+
+        if chunk:
+            yield chunk
+        if len(chunk) < size:
+            return
+
+        last_pk = chunk[-1].pk
+        if limit is not None:
+            limit -= len(chunk)
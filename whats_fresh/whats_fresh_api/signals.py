@@ -1,6 +1,14 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import User, Group
+from django.utils import timezone
+
+from whats_fresh.whats_fresh_api.models import (Vendor, Product, Story,
+                                                Preparation, Image, Video,
+                                                ProductPreparation,
+                                                VendorProduct, Tombstone)
+from whats_fresh.whats_fresh_api import (spatial, availability, documents,
+                                         response_cache, pagination)
 
 
 @receiver(post_save, sender=User)
@@ -12,3 +20,149 @@ def default_group_callback(sender, instance, *args, **kwargs):
         instance.groups.add(group)
         instance.save()
         return
+
+
+def tombstone_callback(sender, instance, *args, **kwargs):
+    Tombstone.objects.create(
+        model=sender._meta.model_name, object_id=instance.id)
+
+
+def response_cache_callback(sender, *args, **kwargs):
+    response_cache.invalidate(sender)
+
+
+def page_count_callback(sender, *args, **kwargs):
+    pagination.invalidate(sender)
+
+
+# Connected before the index callbacks below, which record the generation
+# of the data after these have moved it on
+for model in [Vendor, Product, Story, Preparation, Image, Video,
+              ProductPreparation, VendorProduct]:
+    post_save.connect(response_cache_callback, sender=model)
+    post_delete.connect(response_cache_callback, sender=model)
+    post_delete.connect(tombstone_callback, sender=model)
+    post_save.connect(page_count_callback, sender=model)
+    post_delete.connect(page_count_callback, sender=model)
+
+
+@receiver(post_save, sender=VendorProduct)
+@receiver(post_delete, sender=VendorProduct)
+def vendor_modified_callback(sender, instance, raw=False, *args, **kwargs):
+    # A vendor's products are part of its API dictionary, so changing them
+    # moves the vendor's modified time on, before its document is rebuilt
+    if not raw:
+        Vendor.objects.filter(id=instance.vendor_id).update(
+            modified=timezone.now())
+
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_delete, sender=Vendor)
+def vendor_index_callback(sender, instance, *args, **kwargs):
+    spatial.invalidate()
+
+
+@receiver(post_save, sender=VendorProduct)
+def vendor_product_saved_callback(sender, instance, *args, **kwargs):
+    availability.update(lambda index: index.set_offer(
+        instance.id, instance.vendor_id, instance.product_preparation_id,
+        instance.available, instance.vendor_price))
+
+
+@receiver(post_delete, sender=VendorProduct)
+def vendor_product_deleted_callback(sender, instance, *args, **kwargs):
+    availability.update(lambda index: index.remove_offer(instance.id))
+
+
+@receiver(post_save, sender=ProductPreparation)
+def product_preparation_saved_callback(sender, instance, *args, **kwargs):
+    availability.update(lambda index: index.set_product_preparation(
+        instance.id, instance.product_id, instance.preparation_id))
+
+
+@receiver(post_delete, sender=ProductPreparation)
+def product_preparation_deleted_callback(sender, instance, *args, **kwargs):
+    availability.update(
+        lambda index: index.remove_product_preparation(instance.id))
+
+
+@receiver(post_save, sender=Product)
+def product_name_callback(sender, instance, *args, **kwargs):
+    availability.update(
+        lambda index: index.set_product(instance.id, instance.name))
+
+
+@receiver(post_save, sender=Preparation)
+def preparation_name_callback(sender, instance, *args, **kwargs):
+    availability.update(
+        lambda index: index.set_preparation(instance.id, instance.name))
+
+
+@receiver(post_save, sender=Vendor)
+def vendor_document_callback(sender, instance, raw=False, *args, **kwargs):
+    # Fixtures are loaded before the rows the document is built from
+    if not raw:
+        documents.refresh_vendors([instance.id])
+
+
+@receiver(post_save, sender=VendorProduct)
+@receiver(post_delete, sender=VendorProduct)
+def vendor_product_document_callback(sender, instance, raw=False, *args,
+                                     **kwargs):
+    if not raw:
+        documents.refresh_vendors([instance.vendor_id])
+
+
+@receiver(post_save, sender=ProductPreparation)
+def product_preparation_document_callback(sender, instance, raw=False,
+                                          *args, **kwargs):
+    if not raw:
+        documents.refresh_selling(id=instance.id)
+
+
+@receiver(post_save, sender=Product)
+def product_document_callback(sender, instance, raw=False, *args, **kwargs):
+    if not raw:
+        documents.refresh_selling(product=instance.id)
+
+
+@receiver(post_save, sender=Preparation)
+def preparation_document_callback(sender, instance, raw=False, *args,
+                                  **kwargs):
+    if not raw:
+        documents.refresh_selling(preparation=instance.id)
+
+
+@receiver(post_save, sender=Story)
+def story_raw_callback(sender, instance, raw=False, *args, **kwargs):
+    # Fixtures set the media of the stories they load afterwards, which
+    # must not change the stories' modified times
+    instance._raw_save = raw
+
+
+@receiver(m2m_changed, sender=Story.images.through)
+@receiver(m2m_changed, sender=Story.videos.through)
+def story_media_callback(sender, instance, action, reverse, pk_set, *args,
+                         **kwargs):
+    """
+    Move the modified time of stories on when their images or videos are
+    changed, which does not save the stories themselves.
+    """
+    stories = []
+    if not reverse:
+        if (action in ('post_add', 'post_remove', 'post_clear') and
+                not getattr(instance, '_raw_save', False)):
+            stories = [instance.id]
+    elif action in ('post_add', 'post_remove'):
+        stories = pk_set
+    elif action == 'pre_clear':
+        stories = list(sender.objects.filter(**{
+            instance._meta.model_name: instance
+        }).values_list('story', flat=True))
+
+    if stories:
+        Story.objects.filter(id__in=stories).update(modified=timezone.now())
+
+    response_cache.invalidate(Story)
+    # The states of the media tables are cached against their versions
+    response_cache.invalidate(sender)
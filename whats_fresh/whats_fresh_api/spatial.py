@@ -0,0 +1,153 @@
+"""
+An in-process spatial index of vendor locations.
+
+When SPATIAL_INDEX is enabled, location searches on the vendor endpoints are
+answered from a grid of vendor coordinates held in memory by each worker,
+and only the matching vendors are then fetched from the database. The index
+is dropped whenever a vendor is saved or deleted in this process (see
+signals.py). Each index also records the generation of the vendor data it
+was built from, which is checked at most every SPATIAL_INDEX_CHECK_INTERVAL
+seconds, and is rebuilt when that has moved on, so that changes made by
+other workers are picked up, and at least every SPATIAL_INDEX_TTL seconds.
+Searches between checks do not touch the database.
+"""
+from django.conf import settings
+
+from whats_fresh.whats_fresh_api.models import Vendor
+from whats_fresh.whats_fresh_api.conditional import get_generation
+
+import math
+import threading
+import time
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * math.pi / 180
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """
+    Return the great-circle distance in miles between two coordinates.
+    """
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1, math.sqrt(a)))
+
+
+class GridIndex(object):
+
+    """
+    Buckets (id, lat, lng) points into square cells of cell_size degrees,
+    so a radius search only has to measure the points in the cells around
+    the search area.
+    """
+
+    def __init__(self, points, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        for id, lat, lng in points:
+            self.cells.setdefault(self.cell(lat, lng), []).append(
+                (id, lat, lng))
+
+    def __len__(self):
+        return sum(len(points) for points in self.cells.values())
+
+    def cell(self, lat, lng):
+        return (int(math.floor(lat / self.cell_size)),
+                int(math.floor(lng / self.cell_size)))
+
+    def candidates(self, lat, lng, miles):
+        """
+        Yield the points in every cell overlapping the bounding box of the
+        search circle.
+        """
+        lat_span = miles / MILES_PER_DEGREE
+        edge = min(90.0, abs(lat) + lat_span)
+        cos_edge = math.cos(math.radians(edge))
+
+        if (edge >= 90.0 or cos_edge <= 0 or
+                abs(lng) + lat_span / cos_edge > 180.0):
+            # Near the poles or the antimeridian the box wraps around, so
+            # just look at everything.
+            for points in self.cells.values():
+                for point in points:
+                    yield point
+            return
+
+        lng_span = lat_span / cos_edge
+        min_row, min_col = self.cell(lat - lat_span, lng - lng_span)
+        max_row, max_col = self.cell(lat + lat_span, lng + lng_span)
+
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                for point in self.cells.get((row, col), []):
+                    yield point
+
+    def within(self, lat, lng, miles):
+        """
+        Return a list of (distance, id) pairs for the points within miles of
+        the coordinate, closest first.
+        """
+        matches = []
+        for id, point_lat, point_lng in self.candidates(lat, lng, miles):
+            distance = haversine(lat, lng, point_lat, point_lng)
+            if distance <= miles:
+                matches.append((distance, id))
+        matches.sort()
+        return matches
+
+
+_lock = threading.Lock()
+_index = None
+_generation = None
+_expires = 0
+_checked = 0
+
+
+def build_index():
+    """
+    Build a GridIndex of every vendor's location.
+    """
+    points = Vendor.objects.filter(location__isnull=False).extra(
+        select={'lat': 'ST_Y("location")', 'lng': 'ST_X("location")'}
+    ).values_list('id', 'lat', 'lng')
+    return GridIndex(points, settings.SPATIAL_INDEX_CELL_SIZE)
+
+
+def vendor_index():
+    """
+    Return this worker's vendor index, building it if it has been
+    invalidated, if the vendors have changed since, or if it is older than
+    SPATIAL_INDEX_TTL.
+
+    Whether the vendors have changed is only checked once every
+    SPATIAL_INDEX_CHECK_INTERVAL seconds, without holding the lock, so
+    searches only wait for each other while the index is rebuilt.
+    """
+    global _index, _generation, _expires, _checked
+
+    index = _index
+    now = time.time()
+    if (index is not None and now < _expires and
+            now < _checked + settings.SPATIAL_INDEX_CHECK_INTERVAL):
+        return index
+
+    current = get_generation([Vendor])
+    with _lock:
+        if (_index is None or current != _generation or
+                time.time() >= _expires):
+            _index = build_index()
+            _generation = current
+            _expires = time.time() + settings.SPATIAL_INDEX_TTL
+        _checked = time.time()
+        return _index
+
+
+def invalidate():
+    """
+    Drop the vendor index, so it is rebuilt on the next search.
+    """
+    global _index
+
+    with _lock:
+        _index = None
@@ -0,0 +1,38 @@
+from django.test import TestCase
+
+from whats_fresh.whats_fresh_api.models import GeocodedAddress
+from django.contrib.gis.db import models
+
+
+class GeocodedAddressTestCase(TestCase):
+    def setUp(self):
+        self.expected_fields = {
+            'address': models.TextField,
+            'lat': models.FloatField,
+            'lng': models.FloatField,
+            'expires': models.DateTimeField,
+            'id': models.AutoField
+        }
+
+        self.null_fields = {
+            'lat',
+            'lng'
+        }
+
+    def test_fields_exist(self):
+        model = models.get_model('whats_fresh_api', 'GeocodedAddress')
+        for field, field_type in self.expected_fields.items():
+            self.assertEqual(
+                field_type, type(model._meta.get_field_by_name(field)[0]))
+
+    def test_no_additional_fields(self):
+        fields = GeocodedAddress._meta.get_all_field_names()
+        self.assertTrue(sorted(fields) == sorted(self.expected_fields.keys()))
+
+    def test_address_unique(self):
+        self.assertTrue(GeocodedAddress._meta.get_field('address').unique)
+
+    def test_null_fields(self):
+        for field in self.null_fields:
+            self.assertEqual(
+                GeocodedAddress._meta.get_field_by_name(field)[0].null, True)
@@ -11,6 +11,7 @@ class PreparationsTestCase(TestCase):
             'name': models.TextField,
             'description': models.TextField,
             'additional_info': models.TextField,
+            'modified': models.DateTimeField,
             'productpreparation': models.related.RelatedObject,
             'products': models.related.RelatedObject,
             'id': models.AutoField
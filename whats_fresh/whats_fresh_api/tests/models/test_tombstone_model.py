@@ -0,0 +1,32 @@
+from django.test import TestCase
+
+from whats_fresh.whats_fresh_api.models import Tombstone
+from django.contrib.gis.db import models
+
+
+class TombstoneTestCase(TestCase):
+    def setUp(self):
+        self.expected_fields = {
+            'model': models.TextField,
+            'object_id': models.IntegerField,
+            'deleted': models.DateTimeField,
+            'id': models.AutoField
+        }
+
+    def test_fields_exist(self):
+        model = models.get_model('whats_fresh_api', 'Tombstone')
+        for field, field_type in self.expected_fields.items():
+            self.assertEqual(
+                field_type, type(model._meta.get_field_by_name(field)[0]))
+
+    def test_no_additional_fields(self):
+        fields = Tombstone._meta.get_all_field_names()
+        self.assertTrue(sorted(fields) == sorted(self.expected_fields.keys()))
+
+    def test_deleted_field(self):
+        self.assertTrue(Tombstone._meta.get_field('deleted').auto_now_add)
+
+    def test_modified_indexed(self):
+        for name in ['Vendor', 'Product', 'Story']:
+            model = models.get_model('whats_fresh_api', name)
+            self.assertTrue(model._meta.get_field('modified').db_index)
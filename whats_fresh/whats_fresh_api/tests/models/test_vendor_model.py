@@ -24,6 +24,8 @@ class VendorTestCase(TestCase):
             'email': models.EmailField,
             'phone': PhoneNumberField,
             'location': models.PointField,
+            'location_pending': models.BooleanField,
+            'document': models.TextField,
             'story': models.ForeignKey,
             'story_id': models.ForeignKey,
             'created': models.DateTimeField,
@@ -41,7 +43,7 @@ class VendorTestCase(TestCase):
             'phone'
         }
 
-        self.null_fields = {'story', 'phone'}
+        self.null_fields = {'story', 'phone', 'location'}
 
     def test_fields_exist(self):
         model = models.get_model('whats_fresh_api', 'Vendor')
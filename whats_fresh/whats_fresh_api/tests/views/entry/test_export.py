@@ -0,0 +1,89 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.core.management import call_command
+from django.contrib.auth.models import User, Group
+
+from StringIO import StringIO
+import csv
+import json
+
+
+class ExportTestCase(TestCase):
+
+    """
+    Test exporting the vendor by product preparation matrix from the
+    /entry/export view and the export_catalogue command.
+    """
+    fixtures = ['test_fixtures']
+
+    def setUp(self):
+        user = User.objects.create_user(
+            'temporary', 'temporary@gmail.com', 'temporary')
+        admin_group = Group(name='Administration Users')
+        admin_group.save()
+        user.groups.add(admin_group)
+        self.client.login(username='temporary', password='temporary')
+
+        self.expected = [
+            {'vendor_id': 1, 'vendor_name': 'No Optional Null Fields Are Null',
+             'vendor_city': 'Sausalito', 'vendor_state': 'CA',
+             'lat': 37.833688, 'lng': -122.478002,
+             'product_id': 2, 'product_name': 'Starfish Voyager',
+             'preparation_id': 1, 'preparation_name': 'Live',
+             'vendor_price': '$12 per dozen', 'available': None},
+            {'vendor_id': 2,
+             'vendor_name': 'All Optional Null Fields Are Null',
+             'vendor_city': 'North Bend', 'vendor_state': 'OR',
+             'lat': 37.833688, 'lng': -122.478002,
+             'product_id': 1, 'product_name': 'Ezri Dax',
+             'preparation_id': 1, 'preparation_name': 'Live',
+             'vendor_price': '$6 per pound', 'available': False},
+            {'vendor_id': 1, 'vendor_name': 'No Optional Null Fields Are Null',
+             'vendor_city': 'Sausalito', 'vendor_state': 'CA',
+             'lat': 37.833688, 'lng': -122.478002,
+             'product_id': 1, 'product_name': 'Ezri Dax',
+             'preparation_id': 1, 'preparation_name': 'Live',
+             'vendor_price': 'Free!', 'available': False},
+        ]
+
+    def test_url_endpoint(self):
+        self.assertEqual(reverse('export-catalogue'), '/entry/export')
+
+    def test_not_logged_in(self):
+        self.client.logout()
+        response = self.client.get(reverse('export-catalogue'))
+        self.assertRedirects(response, '/login?next=/entry/export')
+
+    def test_ndjson(self):
+        response = self.client.get(reverse('export-catalogue'))
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="catalogue.ndjson"')
+
+        lines = ''.join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.expected)
+
+    def test_csv(self):
+        response = self.client.get(
+            '%s?format=csv' % reverse('export-catalogue'))
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        rows = list(csv.DictReader(
+            StringIO(''.join(response.streaming_content))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['vendor_price'], '$12 per dozen')
+        self.assertEqual(rows[0]['available'], '')
+        self.assertEqual(rows[1]['available'], 'False')
+        self.assertEqual(rows[2]['product_name'], 'Ezri Dax')
+
+    def test_unknown_format(self):
+        response = self.client.get(
+            '%s?format=xml' % reverse('export-catalogue'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_command(self):
+        stdout = StringIO()
+        call_command('export_catalogue', chunk_size=2, stdout=stdout)
+
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.expected)
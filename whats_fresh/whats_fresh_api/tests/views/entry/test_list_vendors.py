@@ -2,6 +2,9 @@ from django.test import TestCase
 from django.core.urlresolvers import reverse
 from whats_fresh.whats_fresh_api.models import Vendor
 from django.contrib.auth.models import User, Group
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 
 class ListVendorTestCase(TestCase):
@@ -71,3 +74,49 @@ class ListVendorTestCase(TestCase):
         self.assertEqual(
             list(page_1['item_list']),
             list(page_nan['item_list']))
+
+    def get_pages(self, query, link):
+        pages = []
+        while True:
+            page = self.client.get('{}?{}'.format(
+                reverse('list-vendors-edit'), query)).context['item_list']
+            pages.append(list(page))
+            if not getattr(page, 'has_' + link)():
+                return pages
+            query = getattr(page, link + '_query')()
+
+    def test_page_links(self):
+        """
+        Tests that the Next and Previous links, which carry the name and id
+        of the vendor they continue from, page through every vendor.
+        """
+        # Vendors with the same name are ordered by id
+        Vendor.objects.filter(id__in=[3, 4, 5]).update(name='Same Name')
+        vendors = list(Vendor.objects.order_by('name', 'id'))
+
+        pages = self.get_pages('', 'next')
+        self.assertEqual([len(page) for page in pages], [15, 15, 3])
+        self.assertEqual(sum(pages, []), vendors)
+
+        pages = self.get_pages('page=3', 'previous')
+        self.assertEqual(sum(reversed(pages), []), vendors)
+
+        page = self.client.get('{}?{}'.format(
+            reverse('list-vendors-edit'), 'page=3')).context['item_list']
+        self.assertEqual(page.previous_page_number(), 2)
+        self.assertFalse(page.paginator.estimated)
+        self.assertEqual(page.paginator.num_pages, 3)
+
+    def test_page_count_cached(self):
+        url = reverse('list-vendors-edit')
+        caches['default'].clear()
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('%s?page=2' % url)
+        self.assertFalse([query for query in queries.captured_queries
+                          if 'COUNT(' in query['sql']])
+
+        Vendor.objects.get(id=1).delete()
+        page = self.client.get(url).context['item_list']
+        self.assertEqual(page.paginator.count, 32)
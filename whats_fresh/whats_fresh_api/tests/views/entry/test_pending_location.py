@@ -0,0 +1,149 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+from django.contrib.auth.models import User, Group
+from django.contrib.gis.geos import fromstr
+from mock import patch
+
+from whats_fresh.whats_fresh_api.models import (Vendor, ProductPreparation,
+                                                Product, Preparation)
+from whats_fresh.whats_fresh_api import geocode_cache, geocode_queue
+
+import json
+
+FOUND = {
+    'status': 'OK',
+    'results': [{
+        'geometry': {
+            'location_type': 'ROOFTOP',
+            'location': {'lat': 44.6752643, 'lng': -124.072162}
+        }
+    }]
+}
+
+
+@override_settings(GEOCODE_ASYNC=True)
+@patch('whats_fresh.whats_fresh_api.geocoder.GeocoderClient.geocode')
+@patch('whats_fresh.whats_fresh_api.geocode_queue.enqueue')
+class PendingLocationTestCase(TestCase):
+
+    """
+    Test that with GEOCODE_ASYNC set, vendors are saved without waiting for
+    the geocoder, and their location is filled in by the background
+    geocoder.
+    """
+
+    def setUp(self):
+        geocode_cache.clear()
+
+        user = User.objects.create_user(
+            'temporary', 'temporary@gmail.com', 'temporary')
+        admin_group = Group(name='Administration Users')
+        admin_group.save()
+        user.groups.add(admin_group)
+        self.client.login(username='temporary', password='temporary')
+
+        product = Product.objects.create(id=1)
+        preparation = Preparation.objects.create(id=1)
+        ProductPreparation.objects.create(
+            id=1, product=product, preparation=preparation)
+
+        self.new_vendor = {
+            'zip': '97365', 'website': '', 'hours': '',
+            'street': '750 NW Lighthouse Dr', 'story': '',
+            'status': '', 'state': 'OR', 'preparation_ids': '1',
+            'phone': '', 'name': 'Test Name', 'location_description': '',
+            'email': '', 'description': 'Test Description',
+            'contact_name': 'Test Contact', 'city': 'Newport'}
+
+    def tearDown(self):
+        geocode_cache.clear()
+
+    def create_vendor(self, **fields):
+        values = {'name': 'Vendor', 'street': '750 NW Lighthouse Dr',
+                  'city': 'Newport', 'state': 'OR', 'zip': '97365'}
+        values.update(fields)
+        return Vendor.objects.create(**values)
+
+    def test_saved_without_geocoding(self, mock_enqueue, mock_geocode):
+        response = self.client.post(reverse('new-vendor'), self.new_vendor)
+        self.assertEqual(response.status_code, 302)
+
+        vendor = Vendor.objects.get(name='Test Name')
+        self.assertTrue(vendor.location_pending)
+        self.assertEqual(vendor.location, None)
+        self.assertEqual(vendor.vendorproduct_set.count(), 1)
+
+        mock_enqueue.assert_called_once_with(vendor.id)
+        self.assertFalse(mock_geocode.called)
+
+    def test_cached_address_not_pending(self, mock_enqueue, mock_geocode):
+        geocode_cache.store(
+            geocode_cache.normalize_address(
+                '750 NW Lighthouse Dr', 'Newport', 'OR', '97365'),
+            [44.6752643, -124.072162])
+
+        self.client.post(reverse('new-vendor'), self.new_vendor)
+
+        vendor = Vendor.objects.get(name='Test Name')
+        self.assertFalse(vendor.location_pending)
+        self.assertEqual(vendor.location.y, 44.6752643)
+        self.assertFalse(mock_enqueue.called)
+
+    def test_edit_keeps_location(self, mock_enqueue, mock_geocode):
+        vendor = self.create_vendor(
+            location=fromstr('POINT(-124.0 44.6)', srid=4326))
+
+        self.client.post(
+            reverse('edit-vendor', kwargs={'id': vendor.id}), self.new_vendor)
+
+        vendor = Vendor.objects.get(id=vendor.id)
+        self.assertTrue(vendor.location_pending)
+        self.assertEqual(vendor.location.y, 44.6)
+        mock_enqueue.assert_called_once_with(vendor.id)
+
+    def test_resolve(self, mock_enqueue, mock_geocode):
+        mock_geocode.return_value = FOUND
+        vendor = self.create_vendor(location_pending=True)
+
+        self.assertTrue(geocode_queue.resolve(vendor.id))
+
+        vendor = Vendor.objects.get(id=vendor.id)
+        self.assertFalse(vendor.location_pending)
+        self.assertEqual(vendor.location.y, 44.6752643)
+        self.assertEqual(vendor.location.x, -124.072162)
+
+    def test_resolve_bad_address(self, mock_enqueue, mock_geocode):
+        mock_geocode.return_value = {'status': 'ZERO_RESULTS', 'results': []}
+        vendor = self.create_vendor(location_pending=True)
+
+        self.assertFalse(geocode_queue.resolve(vendor.id))
+        self.assertTrue(Vendor.objects.get(id=vendor.id).location_pending)
+
+    def test_resolve_address_changed(self, mock_enqueue, mock_geocode):
+        vendor = self.create_vendor(location_pending=True)
+
+        def geocode(address):
+            Vendor.objects.filter(id=vendor.id).update(street='1 Other St')
+            return FOUND
+        mock_geocode.side_effect = geocode
+
+        self.assertFalse(geocode_queue.resolve(vendor.id))
+        vendor = Vendor.objects.get(id=vendor.id)
+        self.assertTrue(vendor.location_pending)
+        self.assertEqual(vendor.location, None)
+
+    def test_public_api(self, mock_enqueue, mock_geocode):
+        new = self.create_vendor(location_pending=True)
+        moved = self.create_vendor(
+            location_pending=True,
+            location=fromstr('POINT(-124.0 44.6)', srid=4326))
+
+        vendors = json.loads(
+            self.client.get(reverse('vendors-list')).content)['vendors']
+        self.assertEqual([vendor['id'] for vendor in vendors], [moved.id])
+        self.assertEqual(vendors[0]['ext'], {'location_pending': True})
+
+        response = self.client.get(
+            reverse('vendor-details', kwargs={'id': new.id}))
+        self.assertEqual(response.status_code, 404)
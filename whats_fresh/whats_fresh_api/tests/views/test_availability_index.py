@@ -0,0 +1,126 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+
+from whats_fresh.whats_fresh_api.models import (Product, ProductPreparation,
+                                                VendorProduct)
+from whats_fresh.whats_fresh_api import availability
+
+import json
+
+
+class AvailabilityIndexTestCase(TestCase):
+
+    """
+    Test the availability index on its own.
+    """
+
+    def setUp(self):
+        self.index = availability.AvailabilityIndex(
+            offers=[(1, 10, 100, True, '$1'),
+                    (2, 10, 101, None, ''),
+                    (3, 11, 100, False, '$2'),
+                    (4, 11, 100, False, '$2')],
+            product_preparations=[(100, 1, 1), (101, 1, 2), (102, 2, 1)],
+            products=[(1, 'Crab'), (2, 'Tuna')],
+            preparations=[(1, 'Live'), (2, 'Frozen')])
+
+    def test_lookups(self):
+        self.assertEqual(self.index.vendors_selling(1), [10, 11])
+        self.assertEqual(self.index.vendors_selling(2), [])
+        self.assertEqual(self.index.products_sold_by(10), [1])
+        self.assertEqual(self.index.products_sold_by(12), [])
+
+        self.assertEqual(self.index.vendor_products(10), [
+            {'name': 'Crab', 'preparation': 'Live',
+             'product_id': 1, 'preparation_id': 1},
+            {'name': 'Crab', 'preparation': 'Frozen',
+             'product_id': 1, 'preparation_id': 2}])
+
+    def test_changes(self):
+        # Vendor 11 offers product preparation 100 twice
+        self.index.remove_offer(3)
+        self.assertEqual(self.index.vendors_selling(1), [10, 11])
+        self.index.remove_offer(4)
+        self.assertEqual(self.index.vendors_selling(1), [10])
+
+        self.index.set_offer(1, 11, 102, True, '')
+        self.assertEqual(self.index.vendors_selling(2), [11])
+        self.assertEqual(self.index.products_sold_by(10), [1])
+
+        self.index.set_product(2, 'Albacore')
+        self.assertEqual(self.index.vendor_products(11)[0]['name'],
+                         'Albacore')
+
+        self.index.remove_product_preparation(102)
+        self.assertEqual(self.index.vendors_selling(2), [])
+        self.assertEqual(len(self.index), 2)
+
+
+@override_settings(AVAILABILITY_INDEX=True)
+class AvailabilityIndexViewTestCase(TestCase):
+
+    """
+    Test that the views using the availability index return the same
+    responses as the database, and follow changes to the data.
+    """
+    fixtures = ['test_fixtures']
+
+    def setUp(self):
+        availability.invalidate()
+
+    def tearDown(self):
+        availability.invalidate()
+
+    def get(self, url, **settings):
+        with self.settings(**settings):
+            data = json.loads(self.client.get(url).content)
+        for vendor in data.get('vendors', [data]):
+            vendor.get('products', []).sort(key=lambda product: (
+                product['product_id'], product['preparation_id']))
+        return data
+
+    def test_same_as_database(self):
+        for url in [reverse('vendors-list'),
+                    reverse('vendor-details', kwargs={'id': '1'}),
+                    reverse('vendors-products', kwargs={'id': '1'}),
+                    reverse('vendors-products', kwargs={'id': '3'}),
+                    reverse('product-vendor', kwargs={'id': '1'}),
+                    reverse('product-vendor', kwargs={'id': '3'})]:
+            self.assertEqual(self.get(url),
+                             self.get(url, AVAILABILITY_INDEX=False))
+
+    def test_index_updated_on_save(self):
+        url = reverse('vendors-products', kwargs={'id': '2'})
+        self.assertEqual(
+            [vendor['id'] for vendor in self.get(url)['vendors']], [1])
+
+        offer = VendorProduct.objects.create(
+            vendor_id=2, product_preparation_id=1)
+        self.assertEqual(
+            sorted(vendor['id'] for vendor in self.get(url)['vendors']),
+            [1, 2])
+
+        product = Product.objects.get(id=2)
+        product.name = 'Renamed'
+        product.save()
+        vendor = self.get(reverse('vendor-details', kwargs={'id': '2'}))
+        self.assertIn('Renamed', [listed['name']
+                                  for listed in vendor['products']])
+
+        offer.delete()
+        ProductPreparation.objects.get(id=1).delete()
+        self.assertEqual(self.get(url)['vendors'], [])
+
+    def test_other_workers_changes_picked_up(self):
+        url = reverse('vendors-products', kwargs={'id': '2'})
+        self.assertEqual(
+            [vendor['id'] for vendor in self.get(url)['vendors']], [1])
+
+        # Rows added without signals, as by another worker, change the
+        # generation of the data the index was built from
+        VendorProduct.objects.bulk_create([
+            VendorProduct(vendor_id=2, product_preparation_id=1)])
+        self.assertEqual(
+            sorted(vendor['id'] for vendor in self.get(url)['vendors']),
+            [1, 2])
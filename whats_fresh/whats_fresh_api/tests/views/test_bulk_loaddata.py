@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from django.test import TestCase
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from whats_fresh.whats_fresh_api.models import (Vendor, Product, Story,
+                                                Image, Video, Preparation,
+                                                ProductPreparation,
+                                                VendorProduct)
+from whats_fresh.whats_fresh_api.management.commands.bulk_loaddata import (
+    read_objects)
+
+from StringIO import StringIO
+import datetime
+import json
+import os
+import shutil
+import tempfile
+
+TESTDATA = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'testdata')
+
+
+class ReadObjectsTestCase(TestCase):
+
+    """
+    Test reading the objects of a fixture in chunks.
+    """
+
+    def test_chunks(self):
+        path = os.path.join(TESTDATA, 'test_fixtures.json')
+        with open(path, 'rb') as fixture:
+            expected = json.load(fixture)
+
+        for chunk_size in (1, 7, 64 * 1024):
+            with open(path, 'rb') as fixture:
+                self.assertEqual(
+                    list(read_objects(fixture, chunk_size)), expected)
+
+    def test_unicode(self):
+        fixture = StringIO(u'[{"name": "Crème"}, {}]'.encode('utf-8'))
+        self.assertEqual(list(read_objects(fixture, 1)),
+                         [{'name': u'Crème'}, {}])
+
+    def test_empty(self):
+        self.assertEqual(list(read_objects(StringIO(' [ ] '))), [])
+
+    def test_invalid(self):
+        for fixture in ('{"pk": 1}', '[{"pk": 1}', '[{"pk": 1} {"pk": 2}]',
+                        '[{"pk": '):
+            with self.assertRaises(ValueError):
+                list(read_objects(StringIO(fixture), 2))
+
+
+class BulkLoaddataTestCase(TestCase):
+
+    """
+    Test that the bulk_loaddata command loads fixtures as loaddata does.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_command(self, *paths, **options):
+        stdout = StringIO()
+        call_command('bulk_loaddata', *paths, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_fixture(self):
+        stdout = self.run_command(
+            os.path.join(TESTDATA, 'test_fixtures.json'), batch_size=2)
+
+        self.assertEqual(Vendor.objects.count(), 2)
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(ProductPreparation.objects.count(), 3)
+        self.assertEqual(VendorProduct.objects.count(), 3)
+        self.assertEqual(Preparation.objects.count(), 2)
+        self.assertEqual(Image.objects.count(), 2)
+        self.assertEqual(Video.objects.count(), 2)
+        self.assertIn('whats_fresh_api.Vendor: 2', stdout)
+
+        vendor = Vendor.objects.get(id=1)
+        self.assertEqual(vendor.location.x, -122.478002)
+        self.assertEqual(vendor.location.y, 37.833688)
+        self.assertEqual(vendor.location.srid, 4326)
+        self.assertEqual(
+            vendor.modified,
+            datetime.datetime(2014, 8, 8, 23, 27, 5, 568395,
+                              tzinfo=timezone.utc))
+
+        self.assertEqual(
+            list(Story.objects.get(id=1).images.values_list('id', flat=True)),
+            [1])
+
+    def test_sequences_reset(self):
+        self.run_command(os.path.join(TESTDATA, 'test_fixtures.json'))
+
+        image = Image.objects.create(image='/media/new.jpg', name='New')
+        self.assertTrue(image.id > 2)
+
+    def test_bad_object(self):
+        path = os.path.join(self.directory, 'bad.json')
+        with open(path, 'wb') as fixture:
+            fixture.write(json.dumps([{
+                'model': 'whats_fresh_api.Vendor', 'pk': 1,
+                'fields': {'location': 'POINT (nowhere)'}}]))
+
+        with self.assertRaises(CommandError):
+            self.run_command(path)
+        self.assertEqual(Vendor.objects.count(), 0)
+
+    def test_existing_objects(self):
+        path = os.path.join(TESTDATA, 'test_fixtures.json')
+        self.run_command(path)
+
+        with self.assertRaises(CommandError):
+            self.run_command(path)
+        self.assertEqual(Vendor.objects.count(), 2)
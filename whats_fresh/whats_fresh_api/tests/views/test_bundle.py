@@ -0,0 +1,116 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+
+from whats_fresh.whats_fresh_api.models import Product
+from whats_fresh.whats_fresh_api import bundle
+
+from StringIO import StringIO
+import glob
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+
+class BundleTestCase(TestCase):
+
+    """
+    Test building and serving the offline bundle of the public dataset.
+    """
+    fixtures = ['test_fixtures']
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(BUNDLE_ROOT=self.directory)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.directory)
+
+    def download(self):
+        response = self.client.get(reverse('bundle'))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        response = self.client.get(response['Location'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        return response
+
+    def read(self, response):
+        content = ''.join(response.streaming_content)
+        return json.loads(gzip.GzipFile(fileobj=StringIO(content)).read())
+
+    def test_url_endpoint(self):
+        self.assertEqual(reverse('bundle'), '/1/bundle')
+        self.assertEqual(
+            reverse('bundle-download', kwargs={'version': '0' * 16}),
+            '/1/bundle/' + '0' * 16)
+
+    def test_sections(self):
+        data = self.read(self.download())
+
+        for name, url_name in [('vendors', 'vendors-list'),
+                               ('products', 'products-list'),
+                               ('stories', 'stories-list'),
+                               ('locations', 'locations')]:
+            self.assertEqual(
+                data[name],
+                json.loads(self.client.get(reverse(url_name)).content))
+
+    def test_caching(self):
+        response = self.download()
+        version = self.read(response)['version']
+
+        self.assertEqual(response['ETag'], '"%s"' % version)
+        self.assertEqual(response['Cache-Control'],
+                         'public, max-age=31536000')
+
+        response = self.client.get(
+            reverse('bundle-download', kwargs={'version': version}),
+            HTTP_IF_NONE_MATCH='"%s"' % version)
+        self.assertEqual(response.status_code, 304)
+
+    def test_rebuilt_on_save(self):
+        first = bundle.current()
+        self.assertEqual(bundle.current(), first)
+
+        product = Product.objects.get(id=1)
+        product.name = 'Renamed'
+        product.save()
+
+        second = bundle.current()
+        self.assertNotEqual(second, first)
+
+        data = self.read(self.client.get(
+            reverse('bundle-download', kwargs={'version': second})))
+        self.assertIn('Renamed', [listed['name']
+                                  for listed in data['products']['products']])
+
+        # Stories do not include products, so were not rendered again
+        self.assertEqual(
+            len(glob.glob(os.path.join(
+                self.directory, 'sections', 'stories-*'))), 1)
+        self.assertEqual(
+            len(glob.glob(os.path.join(
+                self.directory, 'sections', 'products-*'))), 2)
+
+    @override_settings(BUNDLE_KEEP=1)
+    def test_prune(self):
+        first = bundle.current()
+        os.utime(bundle.bundle_path(first), (0, 0))
+        Product.objects.get(id=1).save()
+        second = bundle.current()
+
+        self.assertFalse(os.path.exists(bundle.bundle_path(first)))
+        self.assertTrue(os.path.exists(bundle.bundle_path(second)))
+
+    def test_not_found(self):
+        response = self.client.get(
+            reverse('bundle-download', kwargs={'version': '0' * 16}))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content)['error']['name'],
+                         'Bundle Not Found')
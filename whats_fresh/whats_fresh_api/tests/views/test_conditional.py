@@ -0,0 +1,180 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.core.cache import caches
+from django.test.utils import override_settings
+
+from whats_fresh.whats_fresh_api.models import (Product, Preparation,
+                                                ProductPreparation, Story,
+                                                Image)
+
+
+class ConditionalRequestTestCase(TestCase):
+
+    """
+    Test that public API responses carry ETag and Last-Modified validators,
+    and that requests repeating them are answered with 304 Not Modified
+    until the underlying data changes.
+    """
+    fixtures = ['test_fixtures']
+
+    def test_validators_set(self):
+        response = self.client.get(reverse('products-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertEqual(response['Last-Modified'],
+                         'Fri, 08 Aug 2014 23:27:05 GMT')
+
+    def test_if_none_match(self):
+        url = reverse('products-list')
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, '')
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_none_match_wildcard(self):
+        response = self.client.get(
+            reverse('stories-list'), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        url = reverse('product-details', kwargs={'id': 1})
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 08 Aug 2014 23:27:05 GMT')
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Thu, 07 Aug 2014 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_none_match_takes_precedence(self):
+        response = self.client.get(
+            reverse('products-list'),
+            HTTP_IF_NONE_MATCH='"other"',
+            HTTP_IF_MODIFIED_SINCE='Fri, 08 Aug 2014 23:27:05 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_parameters_change_etag(self):
+        url = reverse('products-list')
+        self.assertNotEqual(self.client.get(url)['ETag'],
+                            self.client.get('%s?limit=1' % url)['ETag'])
+
+    def test_save_changes_etag(self):
+        url = reverse('products-list')
+        etag = self.client.get(url)['ETag']
+
+        product = Product.objects.get(id=1)
+        product.name = 'Renamed'
+        product.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertNotEqual(response['Last-Modified'],
+                            'Fri, 08 Aug 2014 23:27:05 GMT')
+
+    def test_delete_changes_etag(self):
+        url = reverse('vendor-details', kwargs={'id': 1})
+        etag = self.client.get(url)['ETag']
+
+        # Join rows have no modified time, so are tracked by count
+        ProductPreparation.objects.filter(id=3).delete()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete_moves_last_modified(self):
+        url = reverse('products-list')
+        # Leaves the products' modified times as they were
+        Product.objects.filter(image=1).update(image=None)
+        Image.objects.get(id=1).delete()
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 08 Aug 2014 23:27:05 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_story_media_changes_etag(self):
+        for url in [reverse('stories-list'),
+                    reverse('story-details', kwargs={'id': 1})]:
+            etag = self.client.get(url)['ETag']
+            story = Story.objects.get(id=1)
+            story.images.remove(Image.objects.get(id=1))
+            story.images.add(Image.objects.get(id=2))
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+
+    def test_missing_detail_not_found(self):
+        response = self.client.get(
+            reverse('product-details', kwargs={'id': 999}),
+            HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+    def test_detail_ignores_other_objects(self):
+        url = reverse('preparation-details', kwargs={'id': 1})
+        etag = self.client.get(url)['ETag']
+
+        preparation = Preparation.objects.get(id=2)
+        preparation.name = 'Renamed'
+        preparation.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse('vendors-list'),
+                HTTP_IF_MODIFIED_SINCE='Fri, 08 Aug 2014 23:27:05 GMT')
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(
+    API_CACHE='api',
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'api': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'test-api-cache',
+        }
+    })
+class CachedConditionalRequestTestCase(TestCase):
+
+    """
+    Test that validators are cached with the API responses, and invalidated
+    with them.
+    """
+    fixtures = ['test_fixtures']
+
+    def setUp(self):
+        caches['api'].clear()
+
+    def tearDown(self):
+        caches['api'].clear()
+
+    def test_cached_without_queries(self):
+        url = reverse('products-list')
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_save_changes_etag(self):
+        url = reverse('product-details', kwargs={'id': 1})
+        etag = self.client.get(url)['ETag']
+
+        product = Product.objects.get(id=1)
+        product.name = 'Renamed'
+        product.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,97 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.core.cache import caches
+from django.test.utils import override_settings
+from mock import patch
+
+from whats_fresh.whats_fresh_api.models import Product, Story, Image
+from whats_fresh.whats_fresh_api.views import serializer
+from whats_fresh.whats_fresh_api import response_cache
+
+import json
+
+
+@override_settings(
+    API_CACHE='api',
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'api': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'test-fragment-cache',
+        }
+    })
+class FragmentCacheTestCase(TestCase):
+
+    """
+    Test that product and story lists are joined from cached fragments,
+    and that only the changed objects are serialized again.
+    """
+    fixtures = ['test_fixtures']
+
+    def setUp(self):
+        caches['api'].clear()
+
+    def tearDown(self):
+        caches['api'].clear()
+
+    def get(self, url):
+        return json.loads(self.client.get(url).content)
+
+    def serialized_ids(self, url):
+        """
+        Return the ids of the objects serialized for a request, rather than
+        joined from cached fragments.
+        """
+        with patch.object(serializer, 'serialize',
+                          wraps=serializer.serialize) as serialize:
+            self.get(url)
+        return sorted(obj.id for call in serialize.call_args_list
+                      for obj in call[0][0])
+
+    def test_same_as_serialized(self):
+        for url in [reverse('products-list'), reverse('stories-list'),
+                    reverse('product-vendor', kwargs={'id': 1})]:
+            with self.settings(API_CACHE=None):
+                serialized = self.get(url)
+            self.assertEqual(self.get(url), serialized)
+            # Joined from the fragments cached by the first request
+            response_cache.invalidate(Product)
+            response_cache.invalidate(Story)
+            self.assertEqual(self.get(url), serialized)
+
+    def test_only_changed_serialized(self):
+        url = reverse('products-list')
+        self.assertEqual(self.serialized_ids(url), [1, 2])
+
+        product = Product.objects.get(id=1)
+        product.name = 'Renamed'
+        product.save()
+
+        self.assertEqual(self.serialized_ids(url), [1])
+        self.assertIn('Renamed',
+                      [listed['name'] for listed in self.get(url)['products']])
+
+    def test_embedded_changes(self):
+        self.assertEqual(self.serialized_ids(reverse('products-list')),
+                         [1, 2])
+        self.assertEqual(self.serialized_ids(reverse('stories-list')),
+                         [1, 2])
+
+        # Only the product and story embedding the image are serialized
+        image = Image.objects.get(id=2)
+        image.caption = 'Changed'
+        image.save()
+        self.assertEqual(self.serialized_ids(reverse('products-list')), [1])
+        self.assertEqual(self.serialized_ids(reverse('stories-list')), [2])
+        products = self.get(reverse('products-list'))['products']
+        self.assertIn('Changed', [listed['image']['caption']
+                                  for listed in products])
+
+        url = reverse('stories-list')
+        images = len(self.get(url)['stories'][0]['images'])
+        Story.objects.get(id=1).images.add(image)
+        self.assertEqual(self.serialized_ids(url), [1])
+        self.assertEqual(len(self.get(url)['stories'][0]['images']),
+                         images + 1)
@@ -0,0 +1,128 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import patch
+
+from whats_fresh.whats_fresh_api.functions import (coordinates_from_address,
+                                                   BadAddressException)
+from whats_fresh.whats_fresh_api.geocoder import GeocoderError
+from whats_fresh.whats_fresh_api import gazetteer, geocode_cache
+
+import os
+
+GAZETTEER_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'testdata', 'gazetteer.csv')
+
+FOUND = {
+    'status': 'OK',
+    'results': [{
+        'geometry': {
+            'location_type': 'ROOFTOP',
+            'location': {'lat': 44.6188, 'lng': -124.0460}
+        }
+    }]
+}
+
+
+class GazetteerTestCase(TestCase):
+
+    """
+    Test looking up ZIP code and city centroids in the gazetteer.
+    """
+
+    def setUp(self):
+        self.gazetteer = gazetteer.load(GAZETTEER_FILE)
+
+    def test_zip(self):
+        self.assertEqual(self.gazetteer.lookup('Newport', 'OR', '97365'),
+                         [44.6368, -124.0535])
+        self.assertEqual(self.gazetteer.lookup('', '', ' 97365-1234'),
+                         [44.6368, -124.0535])
+
+    def test_city_precision(self):
+        self.assertEqual(
+            self.gazetteer.lookup('Newport', 'OR', '00000'), None)
+        self.assertEqual(
+            self.gazetteer.lookup('newport', 'or', '00000', 'city'),
+            [44.6368, -124.0535])
+
+    def test_city_centroid(self):
+        lat, lng = self.gazetteer.lookup('Portland', 'OR', '', 'city')
+        self.assertAlmostEqual(lat, 45.5195)
+        self.assertAlmostEqual(lng, -122.68695)
+
+    def test_unknown(self):
+        self.assertEqual(
+            self.gazetteer.lookup('Nowhere', 'OR', '00000', 'city'), None)
+
+
+@override_settings(GAZETTEER_FILE=GAZETTEER_FILE)
+@patch('whats_fresh.whats_fresh_api.geocoder.GeocoderClient.geocode')
+class GazetteerPolicyTestCase(TestCase):
+
+    """
+    Test that coordinates_from_address uses the gazetteer as set by
+    GAZETTEER_POLICY and GAZETTEER_PRECISION.
+    """
+
+    def setUp(self):
+        gazetteer.reset()
+        geocode_cache.clear()
+        self.address = ('2030 SE Marine Science Dr', 'Newport', 'OR', '97365')
+
+    def tearDown(self):
+        gazetteer.reset()
+        geocode_cache.clear()
+
+    @override_settings(GAZETTEER_POLICY='first')
+    def test_first(self, mock_geocode):
+        self.assertEqual(coordinates_from_address(*self.address),
+                         [44.6368, -124.0535])
+        self.assertFalse(mock_geocode.called)
+
+    @override_settings(GAZETTEER_POLICY='first')
+    def test_first_unknown_zip(self, mock_geocode):
+        mock_geocode.return_value = FOUND
+
+        self.assertEqual(
+            coordinates_from_address('1 Main St', 'Newport', 'OR', '00000'),
+            [44.6188, -124.0460])
+        self.assertTrue(mock_geocode.called)
+
+    @override_settings(GAZETTEER_POLICY='fallback')
+    def test_fallback_not_used(self, mock_geocode):
+        mock_geocode.return_value = FOUND
+
+        self.assertEqual(coordinates_from_address(*self.address),
+                         [44.6188, -124.0460])
+
+    @override_settings(GAZETTEER_POLICY='fallback')
+    def test_fallback_geocoder_down(self, mock_geocode):
+        mock_geocode.side_effect = GeocoderError('Connection refused')
+
+        self.assertEqual(coordinates_from_address(*self.address),
+                         [44.6368, -124.0535])
+
+    @override_settings(GAZETTEER_POLICY='fallback')
+    def test_fallback_not_found(self, mock_geocode):
+        mock_geocode.return_value = {'status': 'ZERO_RESULTS', 'results': []}
+
+        self.assertEqual(coordinates_from_address(*self.address),
+                         [44.6368, -124.0535])
+
+        with self.assertRaises(BadAddressException):
+            coordinates_from_address('1 Main St', 'Newport', 'OR', '00000')
+
+    @override_settings(GAZETTEER_POLICY='fallback',
+                       GAZETTEER_PRECISION='city')
+    def test_fallback_city(self, mock_geocode):
+        mock_geocode.side_effect = GeocoderError('Connection refused')
+
+        self.assertEqual(
+            coordinates_from_address('1 Main St', 'Newport', 'OR', '00000'),
+            [44.6368, -124.0535])
+
+    def test_no_policy(self, mock_geocode):
+        mock_geocode.side_effect = GeocoderError('Connection refused')
+
+        with self.assertRaises(BadAddressException):
+            coordinates_from_address(*self.address)
@@ -0,0 +1,134 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from mock import patch
+
+from whats_fresh.whats_fresh_api.models import GeocodedAddress
+from whats_fresh.whats_fresh_api.functions import (coordinates_from_address,
+                                                   BadAddressException)
+from whats_fresh.whats_fresh_api import geocode_cache
+from whats_fresh.whats_fresh_api.geocoder import GeocoderError
+
+from datetime import timedelta
+
+
+FOUND = {
+    'status': 'OK',
+    'results': [{
+        'geometry': {
+            'location_type': 'ROOFTOP',
+            'location': {'lat': 44.6188, 'lng': -124.0460}
+        }
+    }]
+}
+
+APPROXIMATE = {
+    'status': 'OK',
+    'results': [{
+        'geometry': {
+            'location_type': 'APPROXIMATE',
+            'location': {'lat': 44.6, 'lng': -124.0}
+        }
+    }]
+}
+
+NOT_FOUND = {'status': 'ZERO_RESULTS', 'results': []}
+
+OVER_LIMIT = {'status': 'OVER_QUERY_LIMIT', 'results': []}
+
+
+@patch('whats_fresh.whats_fresh_api.geocoder.GeocoderClient.geocode')
+class GeocodeCacheTestCase(TestCase):
+
+    """
+    Test that coordinates_from_address caches geocoder results, so the same
+    address is only looked up once.
+    """
+
+    def setUp(self):
+        geocode_cache.clear()
+        self.address = ('2030 SE Marine Science Dr', 'Newport', 'OR', '97365')
+
+    def tearDown(self):
+        geocode_cache.clear()
+
+    def test_normalize_address(self, mock_get):
+        self.assertEqual(
+            geocode_cache.normalize_address(
+                ' 2030 S.E.  Marine Science Dr.', 'NEWPORT', 'Or', '97365'),
+            '2030 s e marine science dr, newport, or, 97365')
+
+    def test_cached(self, mock_get):
+        mock_get.return_value = FOUND
+
+        self.assertEqual(coordinates_from_address(*self.address),
+                         [44.6188, -124.0460])
+        self.assertEqual(coordinates_from_address(*self.address),
+                         [44.6188, -124.0460])
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_normalized_address_cached(self, mock_get):
+        mock_get.return_value = FOUND
+
+        coordinates_from_address(*self.address)
+        coordinates_from_address(
+            '2030 se marine science dr.', 'Newport ', 'or', '97365')
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_shared_through_database(self, mock_get):
+        mock_get.return_value = FOUND
+
+        coordinates_from_address(*self.address)
+        geocode_cache.clear()
+
+        self.assertEqual(coordinates_from_address(*self.address),
+                         [44.6188, -124.0460])
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_not_found_cached(self, mock_get):
+        for response in [NOT_FOUND, APPROXIMATE]:
+            geocode_cache.clear()
+            GeocodedAddress.objects.all().delete()
+            mock_get.reset_mock()
+            mock_get.return_value = response
+
+            for attempt in range(2):
+                with self.assertRaises(BadAddressException):
+                    coordinates_from_address(*self.address)
+            self.assertEqual(mock_get.call_count, 1)
+
+    def test_failures_not_cached(self, mock_get):
+        mock_get.side_effect = GeocoderError('Connection refused')
+        with self.assertRaises(BadAddressException):
+            coordinates_from_address(*self.address)
+
+        mock_get.side_effect = None
+        mock_get.return_value = OVER_LIMIT
+        with self.assertRaises(BadAddressException):
+            coordinates_from_address(*self.address)
+
+        mock_get.return_value = FOUND
+        self.assertEqual(coordinates_from_address(*self.address),
+                         [44.6188, -124.0460])
+        self.assertEqual(mock_get.call_count, 3)
+
+    def test_expired(self, mock_get):
+        mock_get.return_value = FOUND
+
+        coordinates_from_address(*self.address)
+        geocode_cache.clear()
+        GeocodedAddress.objects.update(
+            expires=timezone.now() - timedelta(seconds=1))
+
+        coordinates_from_address(*self.address)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(GeocodedAddress.objects.count(), 1)
+
+    @override_settings(GEOCODE_CACHE_SIZE=1)
+    def test_least_recently_used_dropped(self, mock_get):
+        geocode_cache.store('first', [1.0, 1.0])
+        geocode_cache.store('second', [2.0, 2.0])
+
+        self.assertEqual(list(geocode_cache._recent.keys()), ['second'])
+        # Still cached in the database
+        self.assertEqual(geocode_cache.lookup('first'), [1.0, 1.0])
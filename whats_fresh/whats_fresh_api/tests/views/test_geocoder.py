@@ -0,0 +1,185 @@
+from django.test import TestCase
+
+from whats_fresh.whats_fresh_api.geocoder import (GeocoderClient,
+                                                  GeocoderError,
+                                                  CircuitBreaker)
+
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from urlparse import urlparse, parse_qs
+import json
+import threading
+import time
+
+
+class StandInGeocoder(BaseHTTPRequestHandler):
+
+    """
+    Answer each request with the next (status, body, delay) in replies,
+    repeating the last one, and record the address looked up.
+    """
+    protocol_version = 'HTTP/1.1'
+    replies = []
+    addresses = []
+
+    def do_GET(self):
+        self.addresses.append(
+            parse_qs(urlparse(self.path).query)['address'][0])
+        if len(self.replies) > 1:
+            status, body, delay = self.replies.pop(0)
+        else:
+            status, body, delay = self.replies[0]
+
+        content = json.dumps(body)
+        time.sleep(delay)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(HTTPServer):
+
+    def handle_error(self, request, client_address):
+        # Clients that time out close the connection before the reply
+        pass
+
+
+FOUND = {
+    'status': 'OK',
+    'results': [{
+        'geometry': {
+            'location_type': 'ROOFTOP',
+            'location': {'lat': 44.6188, 'lng': -124.0460}
+        }
+    }]
+}
+
+
+class GeocoderClientTestCase(TestCase):
+
+    """
+    Test the geocoder client's timeouts, retries, circuit breaker and
+    metrics against a stand-in geocoder on a local port.
+    """
+
+    def setUp(self):
+        StandInGeocoder.replies = [(200, FOUND, 0)]
+        StandInGeocoder.addresses = []
+
+        self.server = StandInServer(('127.0.0.1', 0), StandInGeocoder)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.url = 'http://127.0.0.1:%s/geocode/json' % (
+            self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def make_client(self, **kwargs):
+        options = {'connect_timeout': 1, 'read_timeout': 1}
+        options.update(kwargs)
+        return GeocoderClient(self.url, **options)
+
+    def test_geocode(self):
+        client = self.make_client()
+
+        self.assertEqual(client.geocode('2030 SE Marine Science Dr'), FOUND)
+        self.assertEqual(StandInGeocoder.addresses,
+                         ['2030 SE Marine Science Dr'])
+
+    def test_connections_reused(self):
+        client = self.make_client()
+        client.geocode('first')
+        client.geocode('second')
+
+        adapter = client.session.get_adapter(self.url)
+        pool = adapter.poolmanager.connection_from_url(self.url)
+        self.assertEqual(pool.num_connections, 1)
+
+    def test_read_timeout(self):
+        StandInGeocoder.replies = [(200, FOUND, 0.5)]
+        client = self.make_client(read_timeout=0.1)
+
+        start = time.time()
+        with self.assertRaises(GeocoderError):
+            client.geocode('slow')
+        self.assertTrue(time.time() - start < 0.5)
+
+    def test_retries_server_errors(self):
+        StandInGeocoder.replies = [(500, {}, 0), (503, {}, 0), (200, FOUND, 0)]
+        client = self.make_client(retries=2, backoff=0.01)
+
+        self.assertEqual(client.geocode('flaky'), FOUND)
+        self.assertEqual(len(StandInGeocoder.addresses), 3)
+        self.assertEqual(client.metrics.snapshot()['retries'], 2)
+
+    def test_retries_exhausted(self):
+        StandInGeocoder.replies = [(500, {}, 0)]
+        client = self.make_client(retries=1, backoff=0.01)
+
+        with self.assertRaises(GeocoderError):
+            client.geocode('down')
+        self.assertEqual(len(StandInGeocoder.addresses), 2)
+        self.assertEqual(client.metrics.snapshot()['failures'], 1)
+
+    def test_client_errors_not_retried(self):
+        StandInGeocoder.replies = [(400, {}, 0)]
+        client = self.make_client(retries=2, backoff=0.01)
+
+        with self.assertRaises(GeocoderError):
+            client.geocode('bad request')
+        self.assertEqual(len(StandInGeocoder.addresses), 1)
+
+    def test_connection_refused(self):
+        self.server.shutdown()
+        self.server.server_close()
+        client = self.make_client()
+
+        with self.assertRaises(GeocoderError):
+            client.geocode('nobody home')
+
+    def test_circuit_breaker(self):
+        StandInGeocoder.replies = [(500, {}, 0)]
+        client = self.make_client(breaker=CircuitBreaker(2, 60))
+
+        for attempt in range(2):
+            with self.assertRaises(GeocoderError):
+                client.geocode('down')
+        self.assertTrue(client.breaker.is_open)
+
+        # Fails fast, without asking the geocoder
+        with self.assertRaises(GeocoderError):
+            client.geocode('down')
+        self.assertEqual(len(StandInGeocoder.addresses), 2)
+        self.assertEqual(client.metrics.snapshot()['rejected'], 1)
+
+    def test_circuit_breaker_recovers(self):
+        StandInGeocoder.replies = [(500, {}, 0), (200, FOUND, 0)]
+        client = self.make_client(breaker=CircuitBreaker(1, 0.1))
+
+        with self.assertRaises(GeocoderError):
+            client.geocode('down')
+        self.assertTrue(client.breaker.is_open)
+
+        time.sleep(0.1)
+        self.assertEqual(client.geocode('up again'), FOUND)
+        self.assertFalse(client.breaker.is_open)
+
+    def test_metrics(self):
+        StandInGeocoder.replies = [(200, FOUND, 0.05)]
+        client = self.make_client()
+        client.geocode('first')
+        client.geocode('second')
+
+        metrics = client.metrics.snapshot()
+        self.assertEqual(metrics['requests'], 2)
+        self.assertEqual(metrics['failures'], 0)
+        self.assertTrue(0.05 <= metrics['mean_latency'] <= metrics[
+            'max_latency'])
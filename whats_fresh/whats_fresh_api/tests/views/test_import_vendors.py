@@ -0,0 +1,161 @@
+from django.test import TransactionTestCase
+from django.core.management import call_command
+from mock import patch
+
+from whats_fresh.whats_fresh_api.models import (Vendor, ProductPreparation,
+                                                Product, Preparation)
+from whats_fresh.whats_fresh_api import geocode_cache
+from whats_fresh.whats_fresh_api.management.commands.import_vendors import (
+    Command)
+
+from StringIO import StringIO
+import json
+import os
+import shutil
+import tempfile
+
+FOUND = {
+    'status': 'OK',
+    'results': [{
+        'geometry': {
+            'location_type': 'ROOFTOP',
+            'location': {'lat': 44.6752643, 'lng': -124.072162}
+        }
+    }]
+}
+
+
+@patch('whats_fresh.whats_fresh_api.geocoder.GeocoderClient.geocode')
+class ImportVendorsTestCase(TransactionTestCase):
+
+    """
+    Test importing vendors from CSV and JSON files with the import_vendors
+    management command.
+    """
+
+    def setUp(self):
+        geocode_cache.clear()
+        self.directory = tempfile.mkdtemp()
+
+        for id in (1, 2):
+            ProductPreparation.objects.create(
+                id=id, product=Product.objects.create(id=id),
+                preparation=Preparation.objects.create(id=id))
+
+    def tearDown(self):
+        geocode_cache.clear()
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as vendor_file:
+            vendor_file.write(content)
+        return path
+
+    def run_import(self, *paths, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_vendors', *paths, stdout=stdout, stderr=stderr,
+                     **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv(self, mock_geocode):
+        mock_geocode.return_value = FOUND
+        path = self.write('vendors.csv', (
+            'name,description,contact_name,street,city,state,zip,'
+            'preparation_ids\n'
+            'Fish Market,Fresh fish,Ann,750 NW Lighthouse Dr,Newport,OR,'
+            '97365,"1,2"\n'
+            'Dock Sales,Off the boat,Bob,1 Bay Blvd,Newport,OR,97365,2\n'))
+
+        stdout, stderr = self.run_import(path, workers=2)
+
+        self.assertIn('Imported 2 vendors and 3 products from 2 rows', stdout)
+        self.assertEqual(stderr, '')
+
+        vendor = Vendor.objects.get(name='Fish Market')
+        self.assertEqual(vendor.location.y, 44.6752643)
+        self.assertEqual(
+            sorted(vendor.vendorproduct_set.values_list(
+                'product_preparation_id', flat=True)), [1, 2])
+        self.assertEqual(Vendor.objects.get(
+            name='Dock Sales').vendorproduct_set.count(), 1)
+
+    def test_json_with_coordinates(self, mock_geocode):
+        path = self.write('vendors.json', json.dumps([{
+            'name': 'Fish Market', 'description': 'Fresh fish',
+            'contact_name': 'Ann', 'street': '750 NW Lighthouse Dr',
+            'city': 'Newport', 'state': 'OR', 'zip': '97365',
+            'lat': 44.6, 'lng': -124.0, 'preparation_ids': [1]}]))
+
+        self.run_import(path)
+
+        vendor = Vendor.objects.get(name='Fish Market')
+        self.assertEqual(vendor.location.y, 44.6)
+        self.assertEqual(vendor.location.x, -124.0)
+        self.assertFalse(mock_geocode.called)
+
+    def test_row_errors(self, mock_geocode):
+        mock_geocode.return_value = {'status': 'ZERO_RESULTS', 'results': []}
+        path = self.write('vendors.csv', (
+            'name,description,contact_name,street,city,state,zip,lat,lng,'
+            'preparation_ids\n'
+            'Good,Fresh fish,Ann,1 Bay Blvd,Newport,OR,97365,44.6,-124.0,1\n'
+            'Lost,Fresh fish,Ann,Nowhere,Newport,OR,97365,,,1\n'
+            'No Products,Fresh fish,Ann,1 Bay Blvd,Newport,OR,97365,44.6,'
+            '-124.0,\n'
+            'Unknown,Fresh fish,Ann,1 Bay Blvd,Newport,OR,97365,44.6,-124.0,'
+            '9\n'
+            ',Fresh fish,Ann,1 Bay Blvd,Newport,OR,97365,44.6,-124.0,1\n'))
+
+        stdout, stderr = self.run_import(path)
+
+        self.assertIn('Imported 1 vendors', stdout)
+        self.assertIn('4 rows failed', stdout)
+        self.assertIn('vendors.csv:2: Address not found', stderr)
+        self.assertIn('vendors.csv:3: You must choose at least one product.',
+                      stderr)
+        self.assertIn('vendors.csv:4: Unknown product preparations: 9',
+                      stderr)
+        self.assertIn('vendors.csv:5: name:', stderr)
+        self.assertEqual(
+            list(Vendor.objects.values_list('name', flat=True)), ['Good'])
+
+    def test_valid_row(self, mock_geocode):
+        vendor, ids = Command().validate({
+            'name': 'Fish Market', 'description': 'Fresh fish',
+            'contact_name': 'Ann', 'street': '750 NW Lighthouse Dr',
+            'city': 'Newport', 'state': 'OR', 'zip': '97365',
+            'preparation_ids': '1,2'}, set([1, 2]))
+
+        self.assertEqual(vendor.name, 'Fish Market')
+        self.assertEqual(vendor.city, 'Newport')
+        self.assertIsNone(vendor.location)
+        self.assertEqual(ids, [1, 2])
+
+    def test_invalid_rows_not_geocoded(self, mock_geocode):
+        mock_geocode.return_value = FOUND
+        path = self.write('vendors.csv', (
+            'name,description,contact_name,street,city,state,zip,'
+            'preparation_ids\n'
+            ',Fresh fish,Ann,1 Bay Blvd,Newport,OR,97365,1\n'
+            'Unknown,Fresh fish,Ann,1 Bay Blvd,Newport,OR,97365,9\n'))
+
+        stdout, stderr = self.run_import(path)
+
+        self.assertIn('2 rows failed', stdout)
+        self.assertFalse(mock_geocode.called)
+
+    def test_batches(self, mock_geocode):
+        path = self.write('vendors.json', json.dumps([{
+            'name': 'Vendor %d' % number, 'description': 'Fresh fish',
+            'contact_name': 'Ann', 'street': '1 Bay Blvd', 'city': 'Newport',
+            'state': 'OR', 'zip': '97365', 'lat': 44.6, 'lng': -124.0,
+            'preparation_ids': [1, 2]} for number in range(5)]))
+
+        self.run_import(path, batch_size=2)
+
+        self.assertEqual(Vendor.objects.count(), 5)
+        self.assertEqual(
+            len(set(Vendor.objects.values_list('id', flat=True))), 5)
+        for vendor in Vendor.objects.all():
+            self.assertEqual(vendor.vendorproduct_set.count(), 2)
@@ -0,0 +1,128 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+
+from whats_fresh.whats_fresh_api.models import (Vendor, Product, Story,
+                                                Preparation, Image, Video,
+                                                VendorProduct, Tombstone)
+
+import json
+
+
+class ModifiedSinceTestCase(TestCase):
+
+    """
+    Test that ?modified_since= restricts the vendor, product and story lists
+    to the rows changed since then, and lists the ids of those deleted.
+
+    Every object in test_fixtures was last modified on 2014-08-08.
+    """
+    fixtures = ['test_fixtures']
+
+    def setUp(self):
+        self.since = '2014-08-09T00:00:00Z'
+
+    def get(self, name, since=None):
+        return json.loads(self.client.get('%s?modified_since=%s' % (
+            reverse(name), since or self.since)).content)
+
+    def ids(self, data, name):
+        return sorted(row['id'] for row in data[name])
+
+    def rename(self, obj):
+        obj.name = 'Renamed'
+        obj.save()
+
+    def test_nothing_changed(self):
+        for name, key in [('products-list', 'products'),
+                          ('vendors-list', 'vendors'),
+                          ('stories-list', 'stories')]:
+            data = self.get(name)
+
+            self.assertEqual(data[key], [])
+            self.assertEqual(data['ext']['deleted'], [])
+            self.assertEqual(data['error']['status'], False)
+
+    def test_everything_changed(self):
+        data = self.get('products-list', '2014-08-08T00:00:00Z')
+        self.assertEqual(self.ids(data, 'products'), [1, 2])
+
+    def test_without_modified_since(self):
+        data = json.loads(
+            self.client.get(reverse('products-list')).content)
+
+        self.assertEqual(len(data['products']), 2)
+        self.assertFalse('ext' in data)
+
+    def test_bad_modified_since(self):
+        data = self.get('products-list', 'yesterday')
+
+        self.assertEqual(len(data['products']), 2)
+        self.assertEqual(data['error']['name'], 'Bad Modified Since')
+        self.assertFalse('ext' in data)
+
+    def test_http_date(self):
+        self.rename(Product.objects.get(id=1))
+
+        data = self.get('products-list', 'Sat, 09 Aug 2014 00:00:00 GMT')
+        self.assertEqual(self.ids(data, 'products'), [1])
+
+    def test_changed_products(self):
+        self.rename(Product.objects.get(id=1))
+        self.assertEqual(self.ids(self.get('products-list'), 'products'), [1])
+
+    def test_changed_product_image(self):
+        self.rename(Image.objects.get(id=1))
+        self.assertEqual(self.ids(self.get('products-list'), 'products'), [2])
+
+    def test_changed_stories(self):
+        self.rename(Video.objects.get(id=2))
+        self.assertEqual(self.ids(self.get('stories-list'), 'stories'), [2])
+
+    def test_changed_vendors(self):
+        self.rename(Vendor.objects.get(id=2))
+        self.assertEqual(self.ids(self.get('vendors-list'), 'vendors'), [2])
+
+    def test_changed_vendor_products(self):
+        self.rename(Product.objects.get(id=2))
+        self.assertEqual(self.ids(self.get('vendors-list'), 'vendors'), [1])
+
+        self.rename(Preparation.objects.get(id=1))
+        self.assertEqual(
+            self.ids(self.get('vendors-list'), 'vendors'), [1, 2])
+
+    def test_changed_story_media(self):
+        Story.objects.get(id=2).videos.add(Video.objects.get(id=1))
+        self.assertEqual(self.ids(self.get('stories-list'), 'stories'), [2])
+
+    def test_deleted_vendor_products(self):
+        VendorProduct.objects.filter(vendor_id=2).delete()
+        self.assertEqual(self.ids(self.get('vendors-list'), 'vendors'), [2])
+
+    def test_deleted(self):
+        Product.objects.get(id=2).delete()
+        Vendor.objects.filter(id=1).delete()
+
+        self.assertEqual(self.get('products-list')['ext']['deleted'], [2])
+        self.assertEqual(self.get('vendors-list')['ext']['deleted'], [1])
+        self.assertEqual(self.get('stories-list')['ext']['deleted'], [])
+
+        # Tombstones older than modified_since are left out
+        data = self.get('products-list', '2100-01-01T00:00:00Z')
+        self.assertEqual(data['ext']['deleted'], [])
+
+    def test_cascaded_delete(self):
+        Story.objects.get(id=1).delete()
+
+        self.assertEqual(self.get('stories-list')['ext']['deleted'], [1])
+        self.assertEqual(self.get('vendors-list')['ext']['deleted'], [1])
+        self.assertEqual(
+            Tombstone.objects.filter(model='vendor', object_id=1).count(), 1)
+
+    def test_deleted_moves_last_modified(self):
+        url = reverse('products-list')
+        last_modified = self.client.get(url)['Last-Modified']
+
+        Product.objects.get(id=2).delete()
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
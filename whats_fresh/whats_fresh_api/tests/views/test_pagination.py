@@ -0,0 +1,136 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+from django.contrib.gis.geos import Point
+
+from whats_fresh.whats_fresh_api.models import Vendor
+from whats_fresh.whats_fresh_api import spatial
+
+import json
+
+
+@override_settings(MAX_PAGE_SIZE=10)
+class PaginationTestCase(TestCase):
+
+    """
+    Test paging through the public lists with ?after= cursors. The
+    thirtythree fixtures have 33 of each object, which span four pages of
+    ten.
+    """
+    fixtures = ['thirtythree']
+
+    def get_pages(self, url, name):
+        pages = []
+        while url:
+            data = json.loads(self.client.get(url).content)
+            pages.append([obj['id'] for obj in data[name]])
+            url = data.get('next')
+        return pages
+
+    def assert_paged(self, url, name, size=10):
+        pages = self.get_pages(url, name)
+        ids = sum(pages, [])
+
+        self.assertEqual([len(page) for page in pages[:-1]],
+                         [size] * (len(pages) - 1))
+        self.assertEqual(len(set(ids)), 33)
+        return ids
+
+    def test_products(self):
+        ids = self.assert_paged(reverse('products-list'), 'products')
+        self.assertEqual(ids, sorted(ids))
+
+    def test_stories(self):
+        ids = self.assert_paged(reverse('stories-list'), 'stories')
+        self.assertEqual(ids, sorted(ids))
+
+    def test_vendors(self):
+        ids = self.assert_paged(reverse('vendors-list'), 'vendors')
+        self.assertEqual(ids, sorted(ids))
+
+    def test_limit(self):
+        self.assert_paged(
+            '%s?limit=4' % reverse('products-list'), 'products', 4)
+
+        data = json.loads(self.client.get(
+            '%s?limit=4' % reverse('products-list')).content)
+        self.assertIn('limit=4', data['next'])
+
+    def test_max_page_size(self):
+        data = json.loads(self.client.get(
+            '%s?limit=33' % reverse('products-list')).content)
+        self.assertEqual(len(data['products']), 10)
+
+        data = json.loads(self.client.get(
+            '%s?limit=40' % reverse('stories-list')).content)
+        self.assertIn('next', data)
+
+        with self.settings(MAX_PAGE_SIZE=100):
+            data = json.loads(self.client.get(
+                reverse('stories-list')).content)
+        self.assertNotIn('next', data)
+
+    def test_bad_cursor(self):
+        data = json.loads(self.client.get(
+            '%s?after=nonsense' % reverse('products-list')).content)
+
+        self.assertEqual(data['error']['name'], 'Bad Cursor')
+        self.assertEqual(len(data['products']), 10)
+        self.assertIn('next', data)
+
+    def test_streamed(self):
+        with self.settings(STREAM_RESPONSES=True, STREAM_CHUNK_SIZE=4):
+            url = reverse('vendors-list')
+            ids = []
+            while url:
+                response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                data = json.loads(''.join(response.streaming_content))
+                ids += [vendor['id'] for vendor in data['vendors']]
+                url = data.get('next')
+
+        self.assertEqual(ids, sorted(Vendor.objects.values_list(
+            'id', flat=True)))
+
+    def assert_paged_by_distance(self):
+        url = '%s?lat=44.609079&lng=-124.052538&proximity=1000' % (
+            reverse('vendors-list'))
+
+        with self.settings(MAX_PAGE_SIZE=100):
+            expected = [vendor['id'] for vendor in json.loads(
+                self.client.get(url).content)['vendors']]
+
+        self.assertEqual(sum(self.get_pages(url, 'vendors'), []), expected)
+
+    def test_vendors_by_distance(self):
+        self.assert_paged_by_distance()
+
+    @override_settings(SPATIAL_INDEX=True)
+    def test_vendors_by_distance_indexed(self):
+        spatial.invalidate()
+        self.assert_paged_by_distance()
+
+    def test_vendors_by_true_distance(self):
+        # At this latitude, a degree of longitude is about 0.7 of a degree
+        # of latitude, so the vendor to the east is closer
+        east, north = Vendor.objects.order_by('id')[:2]
+        Vendor.objects.filter(id=east.id).update(
+            location=Point(-119.1, 45.0, srid=4326))
+        Vendor.objects.filter(id=north.id).update(
+            location=Point(-120.0, 45.75, srid=4326))
+        url = '%s?lat=45.0&lng=-120.0&proximity=60' % reverse('vendors-list')
+
+        for indexed in (False, True):
+            spatial.invalidate()
+            with self.settings(SPATIAL_INDEX=indexed):
+                data = json.loads(self.client.get(url).content)
+            self.assertEqual([vendor['id'] for vendor in data['vendors']],
+                             [east.id, north.id])
+
+    def test_nearest(self):
+        data = json.loads(self.client.get(
+            '%s?lat=44.609079&lng=-124.052538&nearest=15' % (
+                reverse('vendors-list'))).content)
+
+        self.assertEqual(len(data['vendors']), 10)
+        self.assertNotIn('next', data)
@@ -1,13 +1,19 @@
 from django.test import TestCase
-from whats_fresh.whats_fresh_api.functions import get_lat_long_prox, get_limit
+from whats_fresh.whats_fresh_api.functions import (get_lat_long_prox,
+                                                   get_limit, get_nearest,
+                                                   get_modified_since,
+                                                   get_cursor, encode_cursor)
 from mock import Mock, patch
 from django.contrib.gis.geos import fromstr
+from django.utils import timezone
+
+from datetime import datetime
 
 
 class ParameterTestCase(TestCase):
     """
-    Test that the parameter parsing functions get_lat_long_prox and get_limit
-    work as expected.
+    Test that the parameter parsing functions get_lat_long_prox, get_limit,
+    get_nearest, get_modified_since and get_cursor work as expected.
 
     1. get_limit with valid limit
     2. get_limit with invalid limit
@@ -18,6 +24,20 @@ class ParameterTestCase(TestCase):
     3. get_lat_long_prox with valid lat, not valid long
     4. get_lat_long_prox with valid lat, no long
     5. get_lat_long_prox with valid lat, long, prox, and limit
+
+    1. get_nearest with valid nearest
+    2. get_nearest with invalid nearest
+    3. get_nearest with non-positive nearest
+
+    1. get_modified_since with an ISO 8601 time
+    2. get_modified_since with an ISO 8601 time without a time zone
+    3. get_modified_since with an HTTP date
+    4. get_modified_since with an invalid time
+
+    1. get_cursor with a cursor of an id
+    2. get_cursor with a cursor of a distance and id
+    3. get_cursor with a cursor of the wrong length
+    4. get_cursor with an invalid cursor
     """
 
     def setUp(self):
@@ -174,3 +194,141 @@ class ParameterTestCase(TestCase):
         self.assertEqual(expected_result[1:], actual_result[1:])
         self.assertEqual(expected_result[0].x, actual_result[0].x)
         self.assertEqual(expected_result[0].y, actual_result[0].y)
+
+    @patch('django.http.request')
+    def test_get_nearest_valid_nearest(self, mock_request):
+        mock_request = Mock()
+        mock_request.GET = {'nearest': '10'}
+
+        expected_result = [10, self.base_error]
+        actual_result = get_nearest(mock_request, self.base_error)
+
+        self.assertEqual(expected_result, actual_result)
+
+    @patch('django.http.request')
+    def test_get_nearest_invalid_nearest(self, mock_request):
+        mock_request = Mock()
+        mock_request.GET = {'nearest': 'all of them'}
+
+        expected_error = {
+            'debug': "ValueError: invalid literal for int() "
+                     "with base 10: 'all of them'",
+            'status': True,
+            'level': 'Warning',
+            'text': 'Invalid nearest. Returning all results.',
+            'name': 'Bad Nearest'
+        }
+
+        expected_result = [None, expected_error]
+        actual_result = get_nearest(mock_request, self.base_error)
+
+        self.assertEqual(expected_result, actual_result)
+
+    @patch('django.http.request')
+    def test_get_nearest_zero_nearest(self, mock_request):
+        mock_request = Mock()
+        mock_request.GET = {'nearest': '0'}
+
+        nearest, error = get_nearest(mock_request, self.base_error)
+
+        self.assertEqual(nearest, None)
+        self.assertEqual(error['name'], 'Bad Nearest')
+
+    @patch('django.http.request')
+    def test_get_modified_since_iso(self, mock_request):
+        mock_request = Mock()
+        mock_request.GET = {'modified_since': '2014-08-08T23:27:05.568Z'}
+
+        expected_result = [
+            datetime(2014, 8, 8, 23, 27, 5, 568000, tzinfo=timezone.utc),
+            self.base_error]
+        actual_result = get_modified_since(mock_request, self.base_error)
+
+        self.assertEqual(expected_result, actual_result)
+
+    @patch('django.http.request')
+    def test_get_modified_since_naive(self, mock_request):
+        mock_request = Mock()
+        mock_request.GET = {'modified_since': '2014-08-08T23:27:05'}
+
+        modified_since, error = get_modified_since(
+            mock_request, self.base_error)
+
+        self.assertEqual(
+            modified_since,
+            datetime(2014, 8, 8, 23, 27, 5, tzinfo=timezone.utc))
+
+    @patch('django.http.request')
+    def test_get_modified_since_http_date(self, mock_request):
+        mock_request = Mock()
+        mock_request.GET = {'modified_since': 'Fri, 08 Aug 2014 23:27:05 GMT'}
+
+        modified_since, error = get_modified_since(
+            mock_request, self.base_error)
+
+        self.assertEqual(
+            modified_since,
+            datetime(2014, 8, 8, 23, 27, 5, tzinfo=timezone.utc))
+        self.assertEqual(error, self.base_error)
+
+    @patch('django.http.request')
+    def test_get_modified_since_invalid(self, mock_request):
+        mock_request = Mock()
+        mock_request.GET = {'modified_since': 'yesterday'}
+
+        expected_error = {
+            'debug': "ValueError: yesterday is not a valid time",
+            'status': True,
+            'level': 'Warning',
+            'text': 'Invalid modified_since. Returning all results.',
+            'name': 'Bad Modified Since'
+        }
+
+        expected_result = [None, expected_error]
+        actual_result = get_modified_since(mock_request, self.base_error)
+
+        self.assertEqual(expected_result, actual_result)
+
+    @patch('django.http.request')
+    def test_get_cursor_id(self, mock_request):
+        mock_request = Mock()
+        mock_request.GET = {'after': encode_cursor([33])}
+
+        expected_result = [[33], self.base_error]
+        actual_result = get_cursor(mock_request, self.base_error)
+
+        self.assertEqual(expected_result, actual_result)
+
+    @patch('django.http.request')
+    def test_get_cursor_distance(self, mock_request):
+        mock_request = Mock()
+        mock_request.GET = {'after': encode_cursor([0.0123456789, 7])}
+
+        expected_result = [[0.0123456789, 7], self.base_error]
+        actual_result = get_cursor(mock_request, self.base_error, 2)
+
+        self.assertEqual(expected_result, actual_result)
+
+    @patch('django.http.request')
+    def test_get_cursor_wrong_length(self, mock_request):
+        mock_request = Mock()
+        mock_request.GET = {'after': encode_cursor([33])}
+
+        cursor, error = get_cursor(mock_request, self.base_error, 2)
+
+        self.assertEqual(cursor, None)
+        self.assertEqual(error['name'], 'Bad Cursor')
+
+    @patch('django.http.request')
+    def test_get_cursor_invalid(self, mock_request):
+        mock_request = Mock()
+        mock_request.GET = {'after': 'nonsense'}
+
+        cursor, error = get_cursor(mock_request, self.base_error)
+
+        self.assertEqual(cursor, None)
+        self.assertEqual(error['status'], True)
+        self.assertEqual(error['level'], 'Warning')
+        self.assertEqual(error['text'],
+                         'Invalid cursor. Returning the first page.')
+        self.assertEqual(error['name'], 'Bad Cursor')
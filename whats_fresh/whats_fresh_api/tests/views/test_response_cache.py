@@ -0,0 +1,121 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.core.cache import caches
+from django.test.utils import override_settings
+
+from whats_fresh.whats_fresh_api.models import (Vendor, Product, Story,
+                                                Preparation, Image,
+                                                VendorProduct)
+
+import json
+
+
+@override_settings(
+    API_CACHE='api',
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'api': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'test-api-cache',
+        }
+    })
+class ResponseCacheTestCase(TestCase):
+
+    """
+    Test that public API responses are cached, and that saving or deleting
+    the objects they are built from invalidates them.
+    """
+    fixtures = ['test_fixtures']
+
+    def setUp(self):
+        caches['api'].clear()
+
+    def tearDown(self):
+        caches['api'].clear()
+
+    def get(self, url):
+        return json.loads(self.client.get(url).content)
+
+    def test_cached_without_queries(self):
+        url = reverse('vendors-list')
+        self.get(url)
+
+        with self.assertNumQueries(0):
+            self.get(url)
+
+    def test_query_parameters_normalized(self):
+        self.get('%s?limit=1&lat=37.8&lng=-122.4' % reverse('vendors-list'))
+
+        with self.assertNumQueries(0):
+            self.get('%s?lng=-122.4&lat=37.8&limit=1' % reverse(
+                'vendors-list'))
+
+        with self.assertNumQueries(2):
+            self.get('%s?limit=2&lat=37.8&lng=-122.4' % reverse(
+                'vendors-list'))
+
+    def test_vendor_save_invalidates(self):
+        url = reverse('vendor-details', kwargs={'id': 1})
+        self.get(url)
+
+        vendor = Vendor.objects.get(id=1)
+        vendor.name = 'Renamed'
+        vendor.save()
+
+        self.assertEqual(self.get(url)['name'], 'Renamed')
+
+    def test_product_rename_invalidates_vendors(self):
+        url = reverse('vendors-list')
+        self.get(url)
+
+        product = Product.objects.get(id=1)
+        product.name = 'Renamed'
+        product.save()
+
+        names = [sold['name'] for vendor in self.get(url)['vendors']
+                 for sold in vendor['products']]
+        self.assertTrue('Renamed' in names)
+
+    def test_join_delete_invalidates(self):
+        url = reverse('vendor-details', kwargs={'id': 2})
+        self.assertEqual(len(self.get(url)['products']), 1)
+
+        VendorProduct.objects.filter(vendor_id=2).delete()
+
+        self.assertEqual(self.get(url)['products'], [])
+
+    def test_story_media_invalidates(self):
+        url = reverse('story-details', kwargs={'id': 1})
+        images = len(self.get(url)['images'])
+
+        Story.objects.get(id=1).images.add(Image.objects.get(id=2))
+
+        self.assertEqual(len(self.get(url)['images']), images + 1)
+
+    def test_unrelated_save_keeps_cache(self):
+        url = reverse('stories-list')
+        self.get(url)
+
+        preparation = Preparation.objects.get(id=1)
+        preparation.name = 'Renamed'
+        preparation.save()
+
+        with self.assertNumQueries(0):
+            self.get(url)
+
+    def test_not_found_cached(self):
+        url = reverse('product-details', kwargs={'id': 999})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    @override_settings(API_CACHE=None)
+    def test_disabled(self):
+        url = reverse('vendors-list')
+        self.get(url)
+
+        with self.assertNumQueries(3):
+            self.get(url)
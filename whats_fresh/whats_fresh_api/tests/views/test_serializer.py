@@ -0,0 +1,46 @@
+from django.test import TestCase
+from django.core.serializers import json as json_serializer
+
+from whats_fresh.whats_fresh_api.models import (Vendor, Product, Story,
+                                                Preparation)
+from whats_fresh.whats_fresh_api.serializers import (FreshSerializer,
+                                                     serialize,
+                                                     serialize_object,
+                                                     encode)
+
+import datetime
+import json
+
+
+class StringSerializer(json_serializer.Serializer):
+
+    """
+    The API's previous serializer, which wrote each object to a JSON string
+    that the views then had to parse back.
+    """
+    get_dump_object = FreshSerializer.__dict__['get_dump_object']
+
+
+class SerializerTestCase(TestCase):
+    fixtures = ['test_fixtures']
+
+    def test_values_are_not_pre_encoded(self):
+        vendor = serialize_object(Vendor.objects.get(id=1))
+
+        self.assertIsInstance(vendor['created'], datetime.datetime)
+        self.assertIsInstance(vendor['lat'], float)
+        self.assertNotIn('location', vendor)
+        self.assertEqual(vendor['ext'], {})
+
+    def test_dates_encoded_as_before(self):
+        data = json.loads(encode(serialize_object(Product.objects.get(id=1))))
+        self.assertEqual(data['created'], '2014-08-08T23:27:05.568Z')
+
+    def test_matches_string_serializer(self):
+        for model in [Vendor, Product, Story, Preparation]:
+            queryset = model.objects.all()
+            expected = json.loads(StringSerializer().serialize(
+                queryset, use_natural_foreign_keys=True))
+
+            self.assertEqual(json.loads(encode(serialize(queryset))),
+                             expected)
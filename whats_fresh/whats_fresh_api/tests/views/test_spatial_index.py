@@ -0,0 +1,153 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+from django.contrib.gis.geos import fromstr
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from whats_fresh.whats_fresh_api.models import Vendor
+from whats_fresh.whats_fresh_api import spatial
+
+import json
+
+
+class GridIndexTestCase(TestCase):
+
+    """
+    Test the grid index on its own, using the Newport, Waldport and Portland
+    vendors from location_fixtures.
+    """
+
+    def setUp(self):
+        self.index = spatial.GridIndex([
+            (1, 45.518962, -122.679630),
+            (3, 44.631592, -124.050122),
+            (4, 44.646006, -124.052868),
+            (5, 44.427761, -124.066166),
+        ], 0.25)
+
+    def test_haversine(self):
+        # Newport to Portland is about 90 miles as the crow flies
+        distance = spatial.haversine(44.631592, -124.050122,
+                                     45.518962, -122.679630)
+        self.assertTrue(85 < distance < 95)
+        self.assertEqual(spatial.haversine(44.6, -124.0, 44.6, -124.0), 0)
+
+    def test_within(self):
+        matches = self.index.within(44.609079, -124.052538, 20)
+        self.assertEqual([id for distance, id in matches], [3, 4, 5])
+        self.assertEqual(matches, sorted(matches))
+
+    def test_within_small_radius(self):
+        matches = self.index.within(44.609079, -124.052538, 2)
+        self.assertEqual([id for distance, id in matches], [3])
+
+    def test_within_large_radius(self):
+        matches = self.index.within(44.609079, -124.052538, 200)
+        self.assertEqual(len(matches), 4)
+
+    def test_nothing_nearby(self):
+        self.assertEqual(self.index.within(0, 0, 20), [])
+
+
+@override_settings(SPATIAL_INDEX=True)
+class SpatialIndexViewTestCase(TestCase):
+
+    """
+    Test that location searches answered by the spatial index return the
+    same vendors as the database.
+    """
+    fixtures = ['location_fixtures']
+
+    def setUp(self):
+        spatial.invalidate()
+
+    def tearDown(self):
+        spatial.invalidate()
+
+    def get_ids(self, url, **settings):
+        with self.settings(**settings):
+            data = json.loads(self.client.get(url).content)
+        return [vendor['id'] for vendor in data['vendors']]
+
+    def test_same_as_database(self):
+        for url in [
+                '%s?lat=44.609079&lng=-124.052538' % reverse('vendors-list'),
+                '%s?lat=44.609079&lng=-124.052538&proximity=50' % reverse(
+                    'vendors-list'),
+                '%s?lat=44.609079&lng=-124.052538&limit=3' % reverse(
+                    'vendors-list'),
+                '%s?lat=44.609079&lng=-124.052538&nearest=2' % reverse(
+                    'vendors-list'),
+                '%s?lat=44.609079&lng=-124.052538' % reverse(
+                    'vendors-products', kwargs={'id': '1'})]:
+            self.assertEqual(self.get_ids(url),
+                             self.get_ids(url, SPATIAL_INDEX=False))
+
+    def test_nearest_distance(self):
+        data = json.loads(self.client.get(
+            '%s?lat=44.609079&lng=-124.052538&nearest=1' % reverse(
+                'vendors-list')).content)
+
+        self.assertEqual(data['vendors'][0]['id'], 3)
+        self.assertTrue(1 < data['vendors'][0]['ext']['distance'] < 2)
+
+    def test_index_invalidated_on_save(self):
+        url = '%s?lat=44.609079&lng=-124.052538&proximity=5' % reverse(
+            'vendors-list')
+        self.assertEqual(self.get_ids(url), [3, 4])
+
+        vendor = Vendor.objects.get(id=5)
+        vendor.location = fromstr(
+            'POINT(-124.052538 44.609079)', srid=4326)
+        vendor.save()
+
+        self.assertEqual(self.get_ids(url), [5, 3, 4])
+
+        Vendor.objects.get(id=3).delete()
+
+        self.assertEqual(self.get_ids(url), [5, 4])
+
+    @override_settings(SPATIAL_INDEX_CHECK_INTERVAL=0)
+    def test_other_workers_changes_picked_up(self):
+        url = '%s?lat=44.609079&lng=-124.052538&proximity=5' % reverse(
+            'vendors-list')
+        self.assertEqual(self.get_ids(url), [3, 4])
+
+        # Moved without signals, as by another worker
+        Vendor.objects.filter(id=5).update(
+            location=fromstr('POINT(-124.052538 44.609079)', srid=4326),
+            modified=timezone.now())
+
+        self.assertEqual(self.get_ids(url), [5, 3, 4])
+
+    def test_searches_between_checks(self):
+        url = '%s?lat=44.609079&lng=-124.052538&proximity=5' % reverse(
+            'vendors-list')
+        self.assertEqual(self.get_ids(url), [3, 4])
+
+        Vendor.objects.filter(id=5).update(
+            location=fromstr('POINT(-124.052538 44.609079)', srid=4326),
+            modified=timezone.now())
+
+        # The index is not checked again until the interval is up
+        with CaptureQueriesContext(connection) as queries:
+            spatial.vendor_index()
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(self.get_ids(url), [3, 4])
+
+    def test_page_fetched_alone(self):
+        url = '%s?lat=44.609079&lng=-124.052538&proximity=100&limit=1' % (
+            reverse('vendors-list'))
+        self.assertTrue(len(spatial.vendor_index().within(
+            44.609079, -124.052538, 100)) > 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        fetched = [query['sql'].split('IN (')[1].split(')')[0].split(',')
+                   for query in queries.captured_queries
+                   if 'whats_fresh_api_vendor"."id" IN (' in query['sql']]
+
+        # The page's vendor, and the next to tell whether there are more
+        self.assertEqual([len(ids) for ids in fetched], [2])
@@ -0,0 +1,68 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+
+from whats_fresh.whats_fresh_api.models import Vendor
+from whats_fresh.whats_fresh_api.serializers import iterate_chunks
+
+import json
+
+
+class StreamingTestCase(TestCase):
+
+    """
+    Test that the streamed list endpoints return the same data as the
+    regular ones. The thirtythree fixtures have 33 of each object, which
+    span several chunks of ten.
+    """
+    fixtures = ['thirtythree']
+
+    def get_streamed(self, url):
+        with self.settings(STREAM_RESPONSES=True, STREAM_CHUNK_SIZE=10):
+            response = self.client.get(url)
+
+        self.assertTrue(response.streaming)
+        return json.loads(''.join(response.streaming_content))
+
+    def assert_same_list(self, url, name):
+        streamed = self.get_streamed(url)
+        expected = json.loads(self.client.get(url).content)
+
+        self.assertEqual(streamed['error'], expected['error'])
+        self.assertEqual(
+            sorted(streamed[name], key=lambda obj: obj['id']),
+            sorted(expected[name], key=lambda obj: obj['id']))
+
+    def test_vendors(self):
+        self.assert_same_list(reverse('vendors-list'), 'vendors')
+
+    def test_products(self):
+        self.assert_same_list(reverse('products-list'), 'products')
+
+    def test_stories(self):
+        self.assert_same_list(reverse('stories-list'), 'stories')
+
+    def test_limit(self):
+        streamed = self.get_streamed('%s?limit=15' % reverse('vendors-list'))
+        self.assertEqual(len(streamed['vendors']), 15)
+        self.assertFalse(streamed['error']['status'])
+
+    def test_empty(self):
+        Vendor.objects.all().delete()
+
+        streamed = self.get_streamed(reverse('vendors-list'))
+        self.assertEqual(streamed['vendors'], [])
+        self.assertEqual(streamed['error']['name'], 'No Vendors')
+
+    @override_settings(STREAM_CHUNK_SIZE=10)
+    def test_iterate_chunks(self):
+        chunks = list(iterate_chunks(Vendor.objects.all()))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 10, 3])
+
+        ids = [vendor.id for chunk in chunks for vendor in chunk]
+        self.assertEqual(
+            ids, list(Vendor.objects.order_by('pk').values_list(
+                'id', flat=True)))
+
+        chunks = list(iterate_chunks(Vendor.objects.all(), limit=25))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
@@ -0,0 +1,90 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+
+from whats_fresh.whats_fresh_api.models import (Vendor, Product,
+                                                Preparation, VendorProduct)
+from whats_fresh.whats_fresh_api import documents
+
+import json
+
+
+class VendorDocumentTestCase(TestCase):
+
+    """
+    Test that vendors' stored documents match what the serializer makes,
+    and are refreshed when the data they are built from changes.
+    """
+    fixtures = ['test_fixtures']
+
+    def get(self, url):
+        data = json.loads(self.client.get(url).content)
+        for vendor in data.get('vendors', [data]):
+            vendor['products'].sort(key=lambda product: (
+                product['product_id'], product['preparation_id']))
+        return data
+
+    def document(self, id):
+        return json.loads(Vendor.objects.get(id=id).document)
+
+    def test_same_as_serialized(self):
+        urls = [reverse('vendors-list'),
+                reverse('vendor-details', kwargs={'id': '1'}),
+                reverse('vendors-products', kwargs={'id': '1'}),
+                '%s?lat=37.833688&lng=-122.478002&nearest=2' % reverse(
+                    'vendors-list')]
+
+        # Fixtures are loaded without documents
+        self.assertEqual(Vendor.objects.exclude(document='').count(), 0)
+        serialized = [self.get(url) for url in urls]
+
+        self.assertEqual(documents.refresh_all(), 2)
+        self.assertEqual(Vendor.objects.filter(document='').count(), 0)
+        self.assertEqual([self.get(url) for url in urls], serialized)
+
+    def test_streamed(self):
+        documents.refresh_all()
+        url = reverse('vendors-list')
+        with self.settings(STREAM_RESPONSES=True):
+            response = self.client.get(url)
+            self.assertTrue(response.streaming)
+            streamed = json.loads(''.join(response.streaming_content))
+        self.assertEqual(streamed, json.loads(self.client.get(url).content))
+
+    def test_details_not_decoded(self):
+        documents.refresh_all()
+        document = Vendor.objects.get(id=1).document
+        content = self.client.get(
+            reverse('vendor-details', kwargs={'id': '1'})).content
+
+        # The stored document is sent as it is, with the error block added
+        self.assertTrue(content.startswith(document[:-1]))
+        self.assertEqual(json.loads(content)['error']['status'], False)
+
+    def test_refreshed_on_save(self):
+        vendor = Vendor.objects.get(id=2)
+        vendor.name = 'Renamed vendor'
+        vendor.save()
+        self.assertEqual(self.document(2)['name'], 'Renamed vendor')
+        self.assertEqual(len(self.document(2)['products']), 1)
+
+        product = Product.objects.get(id=1)
+        product.name = 'Renamed product'
+        product.save()
+        self.assertEqual(self.document(2)['products'][0]['name'],
+                         'Renamed product')
+        # Vendor 1 had no document, and sells product 1 too
+        self.assertIn('Renamed product', [
+            listed['name'] for listed in self.document(1)['products']])
+
+        preparation = Preparation.objects.get(id=1)
+        preparation.name = 'Renamed preparation'
+        preparation.save()
+        self.assertEqual(self.document(2)['products'][0]['preparation'],
+                         'Renamed preparation')
+
+        VendorProduct.objects.filter(vendor_id=2)[0].delete()
+        self.assertEqual(self.document(2)['products'], [])
+
+        VendorProduct.objects.create(vendor_id=2, product_preparation_id=2)
+        self.assertEqual(self.document(2)['products'][0]['preparation_id'],
+                         2)
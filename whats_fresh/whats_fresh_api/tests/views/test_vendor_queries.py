@@ -0,0 +1,113 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from whats_fresh.whats_fresh_api.models import (Vendor, Product, Preparation,
+                                                ProductPreparation,
+                                                VendorProduct)
+
+import json
+
+
+class VendorQueryCountTestCase(TestCase):
+
+    """
+    Test that the vendor views fetch vendors, their products and their
+    preparations in a fixed number of queries, no matter how many vendors
+    are returned.
+
+    The thirtythree fixtures have no product/vendor joins, so every vendor
+    is given three product preparations here.
+    """
+    fixtures = ['thirtythree']
+
+    def setUp(self):
+        product_preparations = [
+            ProductPreparation.objects.create(
+                product=product,
+                preparation=Preparation.objects.get(id=product.id))
+            for product in Product.objects.order_by('id')[:3]]
+
+        for vendor in Vendor.objects.all():
+            for product_preparation in product_preparations:
+                VendorProduct.objects.create(
+                    vendor=vendor, product_preparation=product_preparation)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), json.loads(response.content)
+
+    def test_vendor_list_query_count(self):
+        limited_count, limited = self.count_queries(
+            '%s?limit=1' % reverse('vendors-list'))
+        full_count, full = self.count_queries(reverse('vendors-list'))
+
+        self.assertEqual(len(limited['vendors']), 1)
+        self.assertEqual(len(full['vendors']), 33)
+        for vendor in full['vendors']:
+            self.assertEqual(len(vendor['products']), 3)
+
+        self.assertEqual(limited_count, full_count)
+        # One query for the ETag and Last-Modified validators, and one for
+        # the vendors, whose stored documents include their products
+        self.assertEqual(full_count, 2)
+
+    def test_vendor_list_without_documents(self):
+        Vendor.objects.update(document='')
+        full_count, full = self.count_queries(reverse('vendors-list'))
+
+        for vendor in full['vendors']:
+            self.assertEqual(len(vendor['products']), 3)
+        # Their product preparations are fetched in one more query
+        self.assertEqual(full_count, 3)
+
+    def test_vendors_products_query_count(self):
+        product_id = Product.objects.order_by('id')[0].id
+        url = reverse('vendors-products', kwargs={'id': product_id})
+
+        limited_count, limited = self.count_queries('%s?limit=1' % url)
+        full_count, full = self.count_queries(url)
+
+        self.assertEqual(len(limited['vendors']), 1)
+        self.assertEqual(len(full['vendors']), 33)
+        self.assertEqual(limited_count, full_count)
+        self.assertEqual(full_count, 2)
+
+    def test_several_preparations_listed_once(self):
+        """
+        Vendors selling a product in several preparations are only listed
+        once for the product, and the product once for the vendor.
+        """
+        product = Product.objects.order_by('id')[0]
+        second = ProductPreparation.objects.create(
+            product=product,
+            preparation=Preparation.objects.order_by('-id')[0])
+        for vendor in Vendor.objects.all():
+            VendorProduct.objects.create(
+                vendor=vendor, product_preparation=second)
+
+        vendors = json.loads(self.client.get('%s?limit=33' % reverse(
+            'vendors-products', kwargs={'id': product.id})).content)
+        ids = [vendor['id'] for vendor in vendors['vendors']]
+        self.assertEqual(sorted(ids), sorted(
+            Vendor.objects.values_list('id', flat=True)))
+
+        vendor = Vendor.objects.order_by('id')[0]
+        products = json.loads(self.client.get(reverse(
+            'product-vendor', kwargs={'id': vendor.id})).content)
+        self.assertEqual(
+            [listed['id'] for listed in products['products']],
+            list(Product.objects.order_by('id').values_list(
+                'id', flat=True)[:3]))
+
+    def test_vendor_details_query_count(self):
+        vendor = Vendor.objects.all()[0]
+
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('vendor-details', kwargs={'id': vendor.id}))
+
+        self.assertEqual(len(json.loads(response.content)['products']), 3)
@@ -1805,3 +1805,69 @@ returned from GEOS C function \\"GEOSWKTReader_read_r\\"."
 
         expected_answer = json.loads(self.expected_nearby_all_vendors)
         self.assertEqual(all_vendors_data, expected_answer)
+
+
+class VendorsNearestTestCase(TestCase):
+
+    """
+    Test that ?nearest=<int> returns the closest vendors to a location, in
+    order, along with their distance in miles.
+
+    The location_fixtures vendors closest to the coordinates used here are
+    3 and 4 in Newport, then 5 and 6 in Waldport.
+    """
+    fixtures = ['location_fixtures']
+
+    def test_nearest_vendors(self):
+        data = json.loads(self.client.get(
+            '%s?lat=44.609079&lng=-124.052538&nearest=3' % reverse(
+                'vendors-list')).content)
+
+        self.assertFalse(data['error']['status'])
+        self.assertEqual([vendor['id'] for vendor in data['vendors']],
+                         [3, 4, 5])
+
+        distances = [vendor['ext']['distance'] for vendor in data['vendors']]
+        self.assertEqual(distances, sorted(distances))
+        # Newport vendor 3 is about a mile and a half north
+        self.assertTrue(1 < distances[0] < 2)
+
+    def test_nearest_with_smaller_limit(self):
+        data = json.loads(self.client.get(
+            '%s?lat=44.609079&lng=-124.052538&nearest=3&limit=1' % reverse(
+                'vendors-list')).content)
+
+        self.assertEqual([vendor['id'] for vendor in data['vendors']], [3])
+
+    def test_nearest_within_proximity(self):
+        data = json.loads(self.client.get(
+            '%s?lat=44.609079&lng=-124.052538&nearest=10&proximity=5' % (
+                reverse('vendors-list'))).content)
+
+        self.assertEqual([vendor['id'] for vendor in data['vendors']],
+                         [3, 4])
+
+    def test_bad_nearest(self):
+        data = json.loads(self.client.get(
+            '%s?lat=44.609079&lng=-124.052538&nearest=cat' % reverse(
+                'vendors-list')).content)
+
+        self.assertEqual(data['error']['name'], 'Bad Nearest')
+        self.assertEqual([vendor['id'] for vendor in data['vendors']],
+                         [3, 4, 5, 6])
+        for vendor in data['vendors']:
+            self.assertEqual(vendor['ext'], {})
+
+    def test_nearest_without_location(self):
+        data = json.loads(self.client.get(
+            '%s?nearest=2' % reverse('vendors-list')).content)
+
+        self.assertEqual(len(data['vendors']), 8)
+
+    def test_nearest_vendors_products(self):
+        data = json.loads(self.client.get(
+            '%s?lat=44.609079&lng=-124.052538&nearest=1' % reverse(
+                'vendors-products', kwargs={'id': '1'})).content)
+
+        self.assertEqual(len(data['vendors']), 1)
+        self.assertTrue('distance' in data['vendors'][0]['ext'])
@@ -0,0 +1,67 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+
+from whats_fresh.whats_fresh_api.models import VendorProduct
+
+import json
+
+
+class VendorsByProductsTestCase(TestCase):
+
+    """
+    Test searching the vendors list for vendors selling several products.
+
+    In the test fixtures, vendor 1 sells products 1 and 2, and vendor 2 only
+    product 1, all in preparation 1.
+    """
+    fixtures = ['test_fixtures']
+
+    def get_vendors(self, query):
+        data = json.loads(self.client.get(
+            '%s?%s' % (reverse('vendors-list'), query)).content)
+        return sorted(vendor['id'] for vendor in data['vendors']), data
+
+    def test_match_all(self):
+        self.assertEqual(self.get_vendors('products=1,2')[0], [1])
+        self.assertEqual(self.get_vendors('products=2,1&match=all')[0], [1])
+        self.assertEqual(self.get_vendors('products=1')[0], [1, 2])
+
+    def test_match_any(self):
+        self.assertEqual(
+            self.get_vendors('products=1,2&match=any')[0], [1, 2])
+        self.assertEqual(self.get_vendors('products=2&match=any')[0], [1])
+
+    def test_several_preparations(self):
+        # Selling product 1 in a second preparation does not count it twice
+        VendorProduct.objects.create(vendor_id=2, product_preparation_id=2)
+
+        self.assertEqual(self.get_vendors('products=1,2')[0], [1])
+        self.assertEqual(
+            self.get_vendors('products=1,2&match=any')[0], [1, 2])
+
+    def test_preparations(self):
+        self.assertEqual(
+            self.get_vendors('products=1&preparations=1')[0], [1, 2])
+        self.assertEqual(
+            self.get_vendors('products=1&preparations=2')[0], [])
+
+        VendorProduct.objects.create(vendor_id=2, product_preparation_id=2)
+        self.assertEqual(
+            self.get_vendors('products=1&preparations=2,3')[0], [2])
+
+    def test_with_location(self):
+        location = 'lat=37.833688&lng=-122.478002&proximity=5'
+        self.assertEqual(
+            self.get_vendors('products=1,2&' + location)[0], [1])
+        self.assertEqual(
+            self.get_vendors('products=1,2&lat=44.6&lng=-124.0')[0], [])
+
+    def test_bad_products(self):
+        vendors, data = self.get_vendors('products=1,crab')
+        self.assertEqual(vendors, [1, 2])
+        self.assertEqual(data['error']['name'], 'Bad Products')
+
+    def test_bad_match(self):
+        vendors, data = self.get_vendors('products=1,2&match=some')
+        self.assertEqual(vendors, [1])
+        self.assertEqual(data['error']['name'], 'Bad Match')
@@ -0,0 +1,116 @@
+from django.test import TestCase
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings, CaptureQueriesContext
+from django.db import connection
+
+from whats_fresh.whats_fresh_api import spatial
+
+import json
+
+
+class VendorsNearbyTestCase(TestCase):
+
+    """
+    Test the /vendors/nearby batch search, using the location_fixtures
+    vendors: 3 and 4 in Newport, 5 and 6 in Waldport, and 1 and 2 in
+    Portland.
+    """
+    fixtures = ['location_fixtures']
+
+    def setUp(self):
+        spatial.invalidate()
+        self.base_error = {
+            'status': False,
+            'name': None,
+            'text': None,
+            'level': None,
+            'debug': None
+        }
+
+    def tearDown(self):
+        spatial.invalidate()
+
+    def get(self, query):
+        return json.loads(self.client.get(
+            '%s?%s' % (reverse('vendors-nearby'), query)).content)
+
+    def test_url_endpoint(self):
+        self.assertEqual(reverse('vendors-nearby'), '/1/vendors/nearby')
+
+    def test_several_locations(self):
+        data = self.get('lat=44.609079&lng=-124.052538'
+                        '&lat=44.427761&lng=-124.066166'
+                        '&lat=45.518962&lng=-122.679630&proximity=5')
+
+        self.assertEqual(data['error'], self.base_error)
+        self.assertEqual([point['vendors'] for point in data['points']],
+                         [[3, 4], [5, 6], [1, 2]])
+        self.assertEqual(data['points'][0]['lat'], 44.609079)
+        self.assertEqual(data['points'][0]['lng'], -124.052538)
+
+    def test_limit(self):
+        data = self.get('lat=44.609079&lng=-124.052538'
+                        '&lat=44.427761&lng=-124.066166&limit=1')
+
+        self.assertEqual([point['vendors'] for point in data['points']],
+                         [[3], [5]])
+
+    def test_matches_vendor_list(self):
+        query = 'lat=44.609079&lng=-124.052538&proximity=50'
+        vendors = json.loads(self.client.get(
+            '%s?%s' % (reverse('vendors-list'), query)).content)['vendors']
+
+        self.assertEqual(self.get(query)['points'][0]['vendors'],
+                         [vendor['id'] for vendor in vendors])
+
+    def test_spatial_index(self):
+        query = ('lat=44.609079&lng=-124.052538'
+                 '&lat=45.518962&lng=-122.679630&proximity=50&limit=3')
+        with self.settings(SPATIAL_INDEX=False):
+            searched = self.get(query)['points']
+        with self.settings(SPATIAL_INDEX=True):
+            indexed = self.get(query)['points']
+
+        self.assertEqual(indexed, searched)
+
+    @override_settings(SPATIAL_INDEX=True)
+    def test_index_fetched_once(self):
+        def queries(query):
+            spatial.invalidate()
+            with CaptureQueriesContext(connection) as captured:
+                self.get(query)
+            return len(captured)
+
+        self.assertEqual(queries('lat=44.609079&lng=-124.052538'
+                                 '&lat=44.427761&lng=-124.066166'
+                                 '&lat=45.518962&lng=-122.679630'),
+                         queries('lat=44.609079&lng=-124.052538'))
+
+    def test_bad_location(self):
+        data = self.get('lat=44.609079&lng=-124.052538'
+                        '&lat=not_a_latitude&lng=-124.066166')
+
+        self.assertEqual(data['error']['name'], 'Bad location')
+        self.assertEqual(data['points'][0]['vendors'], [3, 4, 5, 6])
+        self.assertEqual(data['points'][1]['vendors'], [])
+
+    def test_missing_longitude(self):
+        data = self.get('lat=44.609079&lng=-124.052538&lat=44.427761')
+
+        self.assertEqual(data['error']['name'], 'Bad location')
+        self.assertEqual(len(data['points']), 2)
+
+    def test_no_locations(self):
+        data = self.get('proximity=5')
+
+        self.assertEqual(data['points'], [])
+        self.assertEqual(data['error']['name'], 'No Locations')
+
+    @override_settings(NEARBY_MAX_LOCATIONS=2)
+    def test_too_many_locations(self):
+        data = self.get('lat=44.609079&lng=-124.052538'
+                        '&lat=44.427761&lng=-124.066166'
+                        '&lat=45.518962&lng=-122.679630')
+
+        self.assertEqual(len(data['points']), 2)
+        self.assertEqual(data['error']['name'], 'Too Many Locations')
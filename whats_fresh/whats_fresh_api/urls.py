@@ -29,6 +29,9 @@ urlpatterns = patterns(
     url(r'^1/vendors/products/(?P<id>\d+)/?$',
         'whats_fresh.whats_fresh_api.views.vendor.vendors_products',
         name='vendors-products'),
+    url(r'^1/vendors/nearby/?$',
+        'whats_fresh.whats_fresh_api.views.vendor.vendors_nearby',
+        name='vendors-nearby'),
 
     url(r'^1/preparations/(?P<id>\d+)/?$',
         'whats_fresh.whats_fresh_api.views.preparation.preparation_details',
@@ -38,6 +41,13 @@ urlpatterns = patterns(
         'whats_fresh.whats_fresh_api.views.location.locations',
         name='locations'),
 
+    url(r'^1/bundle/?$',
+        'whats_fresh.whats_fresh_api.views.bundle.bundle_current',
+        name='bundle'),
+    url(r'^1/bundle/(?P<version>[0-9a-f]{16})/?$',
+        'whats_fresh.whats_fresh_api.views.bundle.bundle_download',
+        name='bundle-download'),
+
     url(r'^entry/vendors/new/?$',
         'whats_fresh.whats_fresh_api.views.entry.vendors.vendor',
         name='new-vendor'),
@@ -110,6 +120,10 @@ urlpatterns = patterns(
         'whats_fresh.whats_fresh_api.views.entry.videos.video',
         name='new-video'),
 
+    url(r'^entry/export/?$',
+        'whats_fresh.whats_fresh_api.views.entry.export.export_catalogue',
+        name='export-catalogue'),
+
     url(r'^login/?$',
         'whats_fresh.whats_fresh_api.views.entry.login.login_user',
         name='login'),
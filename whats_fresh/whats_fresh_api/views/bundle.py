@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.servers.basehttp import FileWrapper
+from django.core.urlresolvers import reverse
+from django.http import (HttpResponseRedirect, HttpResponseNotFound,
+                         HttpResponseNotModified, StreamingHttpResponse)
+from django.utils.cache import quote_etag
+
+from whats_fresh.whats_fresh_api import bundle
+from whats_fresh.whats_fresh_api.conditional import not_modified
+
+from whats_fresh.whats_fresh_api.serializers import encode
+
+import os
+
+
+def bundle_current(request):
+    """
+    */bundle/*
+
+    Redirects to the offline bundle of the current data, building it first
+    if the data has changed since the last bundle was built.
+    """
+    version = bundle.current()
+    response = HttpResponseRedirect(
+        reverse('bundle-download', kwargs={'version': version}))
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def bundle_download(request, version=None):
+    """
+    */bundle/<version>*
+
+    Returns the gzipped offline bundle <version>. Bundles never change, so
+    they may be cached for BUNDLE_MAX_AGE seconds.
+    """
+    try:
+        bundle_file = open(bundle.bundle_path(version), 'rb')
+    except IOError as e:
+        data = {
+            'error': {
+                'status': True,
+                'name': 'Bundle Not Found',
+                'text': 'Bundle %s was not found.' % version,
+                'level': 'Error',
+                'debug': '{0}: {1}'.format(type(e).__name__, str(e))
+            }
+        }
+        return HttpResponseNotFound(
+            encode(data),
+            content_type="application/json"
+        )
+
+    if not_modified(request, version, None):
+        bundle_file.close()
+        response = HttpResponseNotModified()
+    else:
+        response = StreamingHttpResponse(
+            FileWrapper(bundle_file), content_type='application/gzip')
+        response['Content-Length'] = os.fstat(bundle_file.fileno()).st_size
+        response['Content-Disposition'] = (
+            'attachment; filename="whats-fresh-%s.json.gz"' % version)
+
+    response['ETag'] = quote_etag(version)
+    response['Cache-Control'] = 'public, max-age=%d' % (
+        settings.BUNDLE_MAX_AGE)
+    return response
@@ -0,0 +1,29 @@
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.contrib.auth.decorators import login_required
+
+from whats_fresh.whats_fresh_api.functions import group_required
+from whats_fresh.whats_fresh_api import export
+
+
+@login_required
+@group_required('Administration Users', 'Data Entry Users')
+def export_catalogue(request):
+    """
+    */entry/export*
+
+    Stream the vendor by product preparation availability matrix as a file
+    download, in the format given by the format parameter: ndjson (the
+    default) or csv.
+    """
+    format = request.GET.get('format', 'ndjson')
+    if format not in export.FORMATS:
+        return HttpResponseBadRequest(
+            'Unknown export format %s; use one of %s' % (
+                format, ', '.join(sorted(export.FORMATS))))
+
+    encoder, content_type = export.FORMATS[format]
+    response = StreamingHttpResponse(
+        export.export(format), content_type=content_type)
+    response['Content-Disposition'] = (
+        'attachment; filename="catalogue.%s"' % format)
+    return response
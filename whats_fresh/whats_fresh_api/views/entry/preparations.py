@@ -4,12 +4,12 @@ from django.shortcuts import render
 from django.core.urlresolvers import reverse
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.conf import settings
 
 from whats_fresh.whats_fresh_api.models import Preparation
 from whats_fresh.whats_fresh_api.forms import PreparationForm
 from whats_fresh.whats_fresh_api.functions import group_required
+from whats_fresh.whats_fresh_api.pagination import KeysetPaginator
 
 
 @login_required
@@ -29,18 +29,8 @@ def prep_list(request):
     elif request.GET.get('saved') == 'true':
         message = "Preparation saved successfully!"
 
-    paginator = Paginator(Preparation.objects.order_by('name'),
-                          settings.PAGE_LENGTH)
-    page = request.GET.get('page')
-
-    try:
-        preparations = paginator.page(page)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page.
-        preparations = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range (e.g. 9999), deliver last page of results.
-        preparations = paginator.page(paginator.num_pages)
+    paginator = KeysetPaginator(Preparation, settings.PAGE_LENGTH)
+    preparations = paginator.page(request.GET)
 
     return render(request, 'list.html', {
         'message': message,
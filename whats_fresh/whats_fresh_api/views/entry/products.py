@@ -4,7 +4,6 @@ from django.core.urlresolvers import reverse
 from django.utils.datastructures import MultiValueDictKeyError
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.conf import settings
 from django.forms.models import save_instance
 
@@ -12,6 +11,7 @@ from whats_fresh.whats_fresh_api.models import (Product, Preparation,
                                                 ProductPreparation, Image)
 from whats_fresh.whats_fresh_api.forms import ProductForm
 from whats_fresh.whats_fresh_api.functions import group_required
+from whats_fresh.whats_fresh_api.pagination import KeysetPaginator
 
 import json
 
@@ -169,18 +169,8 @@ def product_list(request):
     elif request.GET.get('saved') == 'true':
         message = "Product saved successfully!"
 
-    paginator = Paginator(Product.objects.order_by('name'),
-                          settings.PAGE_LENGTH)
-    page = request.GET.get('page')
-
-    try:
-        products = paginator.page(page)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page.
-        products = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range (e.g. 9999), deliver last page of results.
-        products = paginator.page(paginator.num_pages)
+    paginator = KeysetPaginator(Product, settings.PAGE_LENGTH)
+    products = paginator.page(request.GET)
 
     return render(request, 'list.html', {
         'message': message,
@@ -1,13 +1,13 @@
 from django.http import HttpResponse, HttpResponseRedirect
 from whats_fresh.whats_fresh_api.models import Story, Image, Video
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from whats_fresh.whats_fresh_api.functions import group_required
 from django.conf import settings
 from django.shortcuts import render
 from django.core.urlresolvers import reverse
 from django.shortcuts import get_object_or_404
 from whats_fresh.whats_fresh_api.forms import StoryForm
+from whats_fresh.whats_fresh_api.pagination import KeysetPaginator
 import json
 
 
@@ -26,17 +26,8 @@ def story_list(request):
     if request.GET.get('success') == 'true':
         message = "Story deleted successfully!"
 
-    paginator = Paginator(Story.objects.order_by('name'), settings.PAGE_LENGTH)
-    page = request.GET.get('page')
-
-    try:
-        stories = paginator.page(page)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page.
-        stories = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range (e.g. 9999), deliver last page of results.
-        stories = paginator.page(paginator.num_pages)
+    paginator = KeysetPaginator(Story, settings.PAGE_LENGTH)
+    stories = paginator.page(request.GET)
 
     return render(request, 'list.html', {
         'message': message,
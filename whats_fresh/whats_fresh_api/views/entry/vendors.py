@@ -4,7 +4,6 @@ from django.core.urlresolvers import reverse
 from django.utils.datastructures import MultiValueDictKeyError
 from django.contrib.gis.geos import fromstr
 from django.shortcuts import get_object_or_404
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
 
@@ -12,9 +11,11 @@ from whats_fresh.whats_fresh_api.models import (Vendor, Product,
                                                 ProductPreparation,
                                                 VendorProduct)
 from whats_fresh.whats_fresh_api.forms import VendorForm
+from whats_fresh.whats_fresh_api import geocode_queue
 from whats_fresh.whats_fresh_api.functions import (group_required,
                                                    coordinates_from_address,
                                                    BadAddressException)
+from whats_fresh.whats_fresh_api.pagination import KeysetPaginator
 
 import json
 
@@ -42,15 +43,21 @@ def vendor(request, id=None):
     if request.method == 'POST':
         post_data = request.POST.copy()
         errors = []
+        location_pending = False
 
         try:
+            # With GEOCODE_ASYNC, addresses not already geocoded are left
+            # for the background geocoder rather than waited for here
             coordinates = coordinates_from_address(
                 post_data['street'], post_data['city'], post_data['state'],
-                post_data['zip'])
+                post_data['zip'], cached_only=settings.GEOCODE_ASYNC)
 
-            post_data['location'] = fromstr(
-                'POINT(%s %s)' % (coordinates[1], coordinates[0]),
-                srid=4326)
+            if coordinates is None:
+                location_pending = True
+            else:
+                post_data['location'] = fromstr(
+                    'POINT(%s %s)' % (coordinates[1], coordinates[0]),
+                    srid=4326)
         # Bad Address will be thrown if Google does not return coordinates for
         # the address, and MultiValueDictKeyError will be thrown if the POST
         # data being passed in is empty.
@@ -73,8 +80,15 @@ def vendor(request, id=None):
             prod_preps = []
 
         vendor_form = VendorForm(post_data)
+        if location_pending:
+            vendor_form.fields['location'].required = False
+
         if vendor_form.is_valid() and not errors:
             del vendor_form.cleaned_data['products_preparations']
+            if location_pending:
+                # Keep any existing location until the new one is found
+                del vendor_form.cleaned_data['location']
+            vendor_form.cleaned_data['location_pending'] = location_pending
             if id:
                 vendor = Vendor.objects.get(id=id)
 
@@ -104,6 +118,10 @@ def vendor(request, id=None):
                         product_preparation=ProductPreparation.objects.get(
                             id=product_preparation))
                 vendor.save()
+
+            if location_pending:
+                geocode_queue.enqueue(vendor.id)
+
             return HttpResponseRedirect(
                 "%s?saved=true" % reverse('list-vendors-edit'))
 
@@ -193,18 +211,8 @@ def vendor_list(request):
     elif request.GET.get('saved') == 'true':
         message = "Vendor saved successfully!"
 
-    paginator = Paginator(Vendor.objects.order_by('name'),
-                          settings.PAGE_LENGTH)
-    page = request.GET.get('page')
-
-    try:
-        vendors = paginator.page(page)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page.
-        vendors = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range (e.g. 9999), deliver last page of results.
-        vendors = paginator.page(paginator.num_pages)
+    paginator = KeysetPaginator(Vendor, settings.PAGE_LENGTH)
+    vendors = paginator.page(request.GET)
 
     return render(request, 'list.html', {
         'parent_url': reverse('home'),
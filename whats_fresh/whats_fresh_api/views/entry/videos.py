@@ -4,12 +4,12 @@ from django.shortcuts import render
 from django.core.urlresolvers import reverse
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.conf import settings
 
 from whats_fresh.whats_fresh_api.models import Video
 from whats_fresh.whats_fresh_api.forms import VideoForm
 from whats_fresh.whats_fresh_api.functions import group_required
+from whats_fresh.whats_fresh_api.pagination import KeysetPaginator
 
 
 @login_required
@@ -29,17 +29,8 @@ def video_list(request):
     elif request.GET.get('saved') == 'true':
         message = "Video saved successfully!"
 
-    paginator = Paginator(Video.objects.order_by('name'), settings.PAGE_LENGTH)
-    page = request.GET.get('page')
-
-    try:
-        videos = paginator.page(page)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page.
-        videos = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range (e.g. 9999), deliver last page of results.
-        videos = paginator.page(paginator.num_pages)
+    paginator = KeysetPaginator(Video, settings.PAGE_LENGTH)
+    videos = paginator.page(request.GET)
 
     return render(request, 'list.html', {
         'message': message,
@@ -1,8 +1,12 @@
 from django.http import HttpResponse
 from whats_fresh.whats_fresh_api.models import Vendor
+from whats_fresh.whats_fresh_api.response_cache import cache_response
+from whats_fresh.whats_fresh_api.conditional import conditional_list
 import json
 
 
+@conditional_list(Vendor)
+@cache_response(Vendor)
 def locations(request):
     """
     */locations/*
@@ -10,8 +14,7 @@ def locations(request):
     Returns a list of city names for all vendors. Useful for populating
     selection lists.
     """
-    vendor_list = Vendor.objects.all()
-    cities = [vendor.city for vendor in vendor_list]
+    cities = Vendor.objects.values_list('city', flat=True).distinct()
     unique_cities = [
         {'location': city[0], 'name': city[1]}
         for city in enumerate(set(cities))]
@@ -1,11 +1,14 @@
 from django.http import (HttpResponse,
                          HttpResponseNotFound)
 from whats_fresh.whats_fresh_api.models import Preparation
+from whats_fresh.whats_fresh_api.response_cache import cache_response
+from whats_fresh.whats_fresh_api.conditional import conditional_detail
 
-import json
-from .serializer import FreshSerializer
+from whats_fresh.whats_fresh_api.serializers import serialize_object, encode
 
 
+@conditional_detail(Preparation)
+@cache_response(Preparation)
 def preparation_details(request, id=None):
     """
     */preparations/<id>*
@@ -33,21 +36,12 @@ def preparation_details(request, id=None):
             'debug': '{0}: {1}'.format(type(e).__name__, str(e))
         }
         return HttpResponseNotFound(
-            json.dumps(data),
+            encode(data),
             content_type="application/json"
         )
 
-    serializer = FreshSerializer()
-
-    data = json.loads(
-        serializer.serialize(
-            [preparation],
-            use_natural_foreign_keys=True
-        )[1:-1]  # Serializer can only serialize lists,
-        # so we have to chop off the list brackets
-        # to get the serialized string without the list
-    )
+    data = serialize_object(preparation)
 
     data['error'] = error
 
-    return HttpResponse(json.dumps(data), content_type="application/json")
+    return HttpResponse(encode(data), content_type="application/json")
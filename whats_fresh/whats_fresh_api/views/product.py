@@ -1,18 +1,38 @@
 from django.http import (HttpResponse,
                          HttpResponseNotFound)
-from whats_fresh.whats_fresh_api.models import Product
-from whats_fresh.whats_fresh_api.functions import get_limit
-
-import json
-from .serializer import FreshSerializer
-
-
+from django.conf import settings
+from whats_fresh.whats_fresh_api.models import (Product, Image,
+                                                ProductPreparation,
+                                                VendorProduct)
+from whats_fresh.whats_fresh_api.response_cache import cache_response
+from whats_fresh.whats_fresh_api import availability
+from whats_fresh.whats_fresh_api.conditional import (conditional_list,
+                                                     conditional_detail)
+from whats_fresh.whats_fresh_api.functions import (get_limit,
+                                                   get_modified_since,
+                                                   filter_modified_since,
+                                                   get_deleted, get_cursor,
+                                                   get_page_size, order_by_id,
+                                                   paginate, next_link)
+
+from whats_fresh.whats_fresh_api.serializers import serialize_object, encode
+from .serializer import encode_objects, encode_documents, stream_list
+
+
+@conditional_list(Product, Image)
+@cache_response(Product, Image)
 def product_list(request):
     """
     */products/*
 
     Returns a list of all products in the database. The ?limit=<int> parameter
-    limits the number of products returned.
+    limits the number of products returned. The ?modified_since=<time>
+    parameter returns only the products changed since then, along with the
+    ids of those deleted.
+
+    No more than MAX_PAGE_SIZE products are returned at once, in order of id.
+    If there are more, the next link fetches them, with the ?after=<cursor>
+    parameter.
     """
     error = {
         'status': False,
@@ -23,32 +43,50 @@ def product_list(request):
     }
 
     limit, error = get_limit(request, error)
+    modified_since, error = get_modified_since(request, error)
+    after, error = get_cursor(request, error)
+    page_size = get_page_size(limit)
+
+    no_products = {
+        "status": True,
+        "name": "No Products",
+        "text": "No Products found",
+        "level": "Information",
+        "debug": ""
+    }
 
-    serializer = FreshSerializer()
-    queryset = Product.objects.all()[:limit]
+    queryset = order_by_id(Product.objects.all(), after)
 
-    if not queryset:
-        error = {
-            "status": True,
-            "name": "No Products",
-            "text": "No Products found",
-            "level": "Information",
-            "debug": ""
-        }
+    if settings.STREAM_RESPONSES and not modified_since:
+        return stream_list(
+            'products', queryset, page_size, error, no_products,
+            lambda cursor: next_link(request, cursor), encode_objects)
+
+    if modified_since:
+        queryset = filter_modified_since(queryset, modified_since, 'image')
+    product_list, cursor = paginate(queryset, page_size)
+
+    if not product_list and not modified_since:
+        error = no_products
 
     data = {
-        "products": json.loads(
-            serializer.serialize(
-                queryset,
-                use_natural_foreign_keys=True
-            )
-        ),
         "error": error
     }
 
-    return HttpResponse(json.dumps(data), content_type="application/json")
+    if cursor:
+        data['next'] = next_link(request, cursor)
+
+    if modified_since:
+        data['ext'] = {
+            'deleted': get_deleted(Product, modified_since)}
 
+    return HttpResponse(
+        encode_documents(data, 'products', encode_objects(product_list)),
+        content_type="application/json")
 
+
+@conditional_detail(Product, Image)
+@cache_response(Product, Image)
 def product_details(request, id=None):
     """
     */products/<id>*
@@ -68,7 +106,7 @@ def product_details(request, id=None):
             'debug': '{0}: {1}'.format(type(e).__name__, str(e))
         }
         return HttpResponseNotFound(
-            json.dumps(data),
+            encode(data),
             content_type="application/json"
         )
 
@@ -80,20 +118,15 @@ def product_details(request, id=None):
         'debug': None
     }
 
-    serializer = FreshSerializer()
-
-    data = json.loads(
-        serializer.serialize(
-            [product],
-            use_natural_foreign_keys=True
-        )[1:-1]
-    )
+    data = serialize_object(product)
 
     data['error'] = error
 
-    return HttpResponse(json.dumps(data), content_type="application/json")
+    return HttpResponse(encode(data), content_type="application/json")
 
 
+@conditional_list(Product, Image, ProductPreparation, VendorProduct)
+@cache_response(Product, Image, ProductPreparation, VendorProduct)
 def product_vendor(request, id=None):
     """
     */products/vendors/<id>*
@@ -101,6 +134,8 @@ def product_vendor(request, id=None):
     List all products sold by vendor <id>. This information includes the
     details of the products, rather than only the product name/id and
     preparation name/id returned by */vendors/<id>*.
+
+    Products are paged as in */products/*.
     """
     data = {}
     error = {
@@ -111,10 +146,20 @@ def product_vendor(request, id=None):
         'debug': None
     }
     limit, error = get_limit(request, error)
+    after, error = get_cursor(request, error)
 
     try:
-        product_list = Product.objects.filter(
-            productpreparation__vendorproduct__vendor__id__exact=id)[:limit]
+        if settings.AVAILABILITY_INDEX:
+            sold = availability.availability_index().products_sold_by(int(id))
+        else:
+            # A semi-join, so products the vendor sells in several
+            # preparations are only listed once
+            sold = ProductPreparation.objects.filter(
+                vendorproduct__vendor=id).values('product')
+
+        product_list, cursor = paginate(
+            order_by_id(Product.objects.filter(id__in=sold), after),
+            get_page_size(limit))
     except Exception as e:
         data['error'] = {
             'status': True,
@@ -125,12 +170,10 @@ def product_vendor(request, id=None):
         }
         data['products'] = []
         return HttpResponse(
-            json.dumps(data),
+            encode(data),
             content_type="application/json"
         )
 
-    serializer = FreshSerializer()
-
     if not product_list:
         error = {
             "status": True,
@@ -141,13 +184,12 @@ def product_vendor(request, id=None):
         }
 
     data = {
-        "products": json.loads(
-            serializer.serialize(
-                product_list,
-                use_natural_foreign_keys=True
-            )
-        ),
         "error": error
     }
 
-    return HttpResponse(json.dumps(data), content_type="application/json")
+    if cursor:
+        data['next'] = next_link(request, cursor)
+
+    return HttpResponse(
+        encode_documents(data, 'products', encode_objects(product_list)),
+        content_type="application/json")
@@ -1,26 +1,179 @@
-from django.core.serializers import json
-from whats_fresh.whats_fresh_api.models import Vendor
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.query import prefetch_related_objects
+from django.http import StreamingHttpResponse
+from whats_fresh.whats_fresh_api.models import Product, Story
+from whats_fresh.whats_fresh_api.functions import encode_cursor
+from whats_fresh.whats_fresh_api.serializers import (vendor_products,
+                                                     serialize, encode,
+                                                     iterate_chunks)
 
+import hashlib
+import json
 
-class FreshSerializer(json.Serializer):
 
-    def get_dump_object(self, obj):
-        self._current['id'] = obj.id
+# The related objects embedded in each model's API dictionaries, such as a
+# product's image. Their ids and modified times are part of the keys of the
+# model's cached fragments (see encode_objects()).
+FRAGMENT_SOURCES = {
+    Product: ['image'],
+    Story: ['images', 'videos'],
+}
 
-        if isinstance(obj, Vendor):
-            self._current['lat'] = obj.location.y
-            self._current['lng'] = obj.location.x
-            del self._current['location']
 
-            self._current['products'] = [
-                {
-                    'name': pp.product.name,
-                    'preparation': pp.preparation.name,
-                    'product_id': pp.product.id,
-                    'preparation_id': pp.preparation_id
-                }
-                for pp in obj.products_preparations.all()
-            ]
+def vendor_documents(vendors):
+    """
+    Return the encoded API dictionaries of a list of vendors, using the
+    document stored with each vendor (see documents.py). Vendors without a
+    document are serialized, with their products fetched in one query.
+    """
+    vendors = list(vendors)
+    missing = [vendor for vendor in vendors if not vendor.document]
+    if missing and not settings.AVAILABILITY_INDEX:
+        prefetch_related_objects(missing, [vendor_products()])
+    serialized = dict(
+        (vendor.id, data) for vendor, data in zip(missing, serialize(missing)))
 
-        self._current['ext'] = {}
-        return self._current
+    documents = []
+    for vendor in vendors:
+        if vendor.id in serialized:
+            documents.append(encode(serialized[vendor.id]))
+        elif hasattr(vendor, 'distance'):
+            # Set by GeoQuerySet.distance() for nearest vendor queries
+            data = json.loads(vendor.document)
+            data['ext']['distance'] = vendor.distance.mi
+            documents.append(encode(data))
+        else:
+            documents.append(vendor.document)
+    return documents
+
+
+def embedded_objects(obj, lookups):
+    """
+    Return the ids and modified times of the related objects embedded in an
+    object's API dictionary, which have been fetched with
+    prefetch_related_objects().
+    """
+    embedded = []
+    for lookup in lookups:
+        related = getattr(obj, lookup)
+        if related is None:
+            related = []
+        elif hasattr(related, 'all'):
+            related = related.all()
+        else:
+            related = [related]
+        embedded.append(sorted(
+            (other.pk, other.modified.isoformat()) for other in related))
+    return embedded
+
+
+def fragment_key(obj, lookups):
+    key = repr((obj.pk, obj.modified.isoformat(),
+                embedded_objects(obj, lookups)))
+    return 'api:fragment:%s:%s' % (obj._meta.model_name,
+                                   hashlib.md5(key).hexdigest())
+
+
+def encode_objects(objects):
+    """
+    Return the encoded API dictionaries of a list of products or stories.
+
+    If API_CACHE is set, each object's encoded dictionary is cached there as
+    a fragment, keyed by its model, id and modified time and the ids and
+    modified times of the images and videos it embeds, which are fetched in
+    one query for each relation. Saving an object only replaces its own
+    fragment, so a list is joined from the cached fragments of the objects
+    which have not changed, and only the others are serialized.
+    """
+    objects = list(objects)
+    if not objects or not settings.API_CACHE:
+        return [encode(data) for data in serialize(objects)]
+
+    cache = caches[settings.API_CACHE]
+    lookups = FRAGMENT_SOURCES[type(objects[0])]
+    prefetch_related_objects(objects, lookups)
+    keys = [fragment_key(obj, lookups) for obj in objects]
+
+    fragments = cache.get_many(keys)
+    missing = [(key, obj) for key, obj in zip(keys, objects)
+               if key not in fragments]
+    if missing:
+        serialized = serialize([obj for key, obj in missing])
+        fresh = dict((key, encode(data))
+                     for (key, obj), data in zip(missing, serialized))
+        cache.set_many(fresh, settings.FRAGMENT_CACHE_TIMEOUT)
+        fragments.update(fresh)
+
+    return [fragments[key] for key in keys]
+
+
+def encode_documents(data, name, documents):
+    """
+    Encode a response like encode(), with a list of documents which are
+    already encoded, such as those from vendor_documents() or
+    encode_objects(), under name.
+    """
+    rest = encode(data)[1:-1]
+    return '{"%s": [%s]%s}' % (
+        name, ', '.join(documents), ', ' + rest if rest else '')
+
+
+def encode_document(document, data):
+    """
+    Encode a response like encode(), made of a document which is already
+    encoded, such as one from vendor_documents(), with the keys of data
+    added to it.
+    """
+    rest = encode(data)[1:-1]
+    return '%s%s}' % (document.rstrip()[:-1], ', ' + rest if rest else '')
+
+
+def stream_list(name, queryset, limit, error, empty_error, next_page=None,
+                render=None):
+    """
+    Return a StreamingHttpResponse listing the objects in the queryset under
+    the key name, followed by the error block.
+
+    The objects are fetched, serialized and encoded a chunk at a time. The
+    error block comes last so that empty_error can be sent in its place if
+    the queryset turns out to be empty.
+
+    If next_page is given and there are more than limit objects, it is
+    called with the cursor of the last object listed, and the link it
+    returns is sent as next.
+
+    Each chunk is encoded by render, which returns the encoded objects, such
+    as vendor_documents() or encode_objects(), or else by serializing them.
+    """
+    render = render or (lambda chunk: [encode(obj)
+                                       for obj in serialize(chunk)])
+
+    def content():
+        yield '{"%s": [' % name
+
+        listed = 0
+        last = None
+        more = False
+        fetch = limit + 1 if next_page and limit is not None else limit
+
+        for chunk in iterate_chunks(queryset, fetch):
+            if limit is not None and listed + len(chunk) > limit:
+                chunk = chunk[:limit - listed]
+                more = True
+
+            for obj in render(chunk):
+                if listed:
+                    yield ', '
+                yield obj
+                listed += 1
+            if chunk:
+                last = chunk[-1]
+
+        yield ']'
+        if more and last is not None:
+            yield ', "next": %s' % encode(
+                next_page(encode_cursor([last.pk])))
+        yield ', "error": %s}' % encode(empty_error if not listed else error)
+
+    return StreamingHttpResponse(content(), content_type="application/json")
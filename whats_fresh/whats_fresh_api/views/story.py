@@ -1,12 +1,24 @@
 from django.http import (HttpResponse,
                          HttpResponseNotFound)
-from whats_fresh.whats_fresh_api.models import Story
-from whats_fresh.whats_fresh_api.functions import get_limit
-
-import json
-from .serializer import FreshSerializer
-
-
+from django.conf import settings
+from whats_fresh.whats_fresh_api.models import Story, Image, Video
+from whats_fresh.whats_fresh_api.response_cache import cache_response
+from whats_fresh.whats_fresh_api.conditional import (conditional_list,
+                                                     conditional_detail)
+from whats_fresh.whats_fresh_api.functions import (get_limit,
+                                                   get_modified_since,
+                                                   filter_modified_since,
+                                                   get_deleted, get_cursor,
+                                                   get_page_size, order_by_id,
+                                                   paginate, next_link)
+
+from whats_fresh.whats_fresh_api.serializers import serialize_object, encode
+from .serializer import encode_objects, encode_documents, stream_list
+
+
+@conditional_detail(Story, Image, Video, Story.images.through,
+                    Story.videos.through)
+@cache_response(Story, Image, Video)
 def story_details(request, id=None):
     """
     */stories/<id>*
@@ -34,32 +46,32 @@ def story_details(request, id=None):
             'debug': '{0}: {1}'.format(type(e).__name__, str(e))
         }
         return HttpResponseNotFound(
-            json.dumps(data),
+            encode(data),
             content_type="application/json"
         )
 
-    serializer = FreshSerializer()
-
-    data = json.loads(
-        serializer.serialize(
-            [story],
-            use_natural_foreign_keys=True
-        )[1:-1]  # Serializer can only serialize lists,
-                 # so we have to chop off the list brackets
-                 # to get the serialized string without the list
-        )
+    data = serialize_object(story)
 
     data['error'] = error
 
-    return HttpResponse(json.dumps(data), content_type="application/json")
+    return HttpResponse(encode(data), content_type="application/json")
 
 
+@conditional_list(Story, Image, Video, Story.images.through,
+                  Story.videos.through)
+@cache_response(Story, Image, Video)
 def story_list(request):
     """
     */stories/*
 
     Returns a list of all stories in the database. The ?limit=<int> parameter
-    limits the number of stories returned.
+    limits the number of stories returned. The ?modified_since=<time>
+    parameter returns only the stories changed since then, along with the
+    ids of those deleted.
+
+    No more than MAX_PAGE_SIZE stories are returned at once, in order of id.
+    If there are more, the next link fetches them, with the ?after=<cursor>
+    parameter.
     """
     error = {
         'status': False,
@@ -70,25 +82,40 @@ def story_list(request):
     }
 
     limit, error = get_limit(request, error)
+    modified_since, error = get_modified_since(request, error)
+    after, error = get_cursor(request, error)
+    page_size = get_page_size(limit)
+
+    no_stories = {
+        "status": True,
+        "name": "No Stories",
+        "text": "No Stories found",
+        "level": "Information",
+        "debug": ""
+    }
 
-    serializer = FreshSerializer()
-    queryset = Story.objects.all()[:limit]
+    queryset = order_by_id(Story.objects.all(), after)
 
-    if not queryset:
-        error = {
-            "status": True,
-            "name": "No Stories",
-            "text": "No Stories found",
-            "level": "Information",
-            "debug": ""
-        }
+    if settings.STREAM_RESPONSES and not modified_since:
+        return stream_list(
+            'stories', queryset, page_size, error, no_stories,
+            lambda cursor: next_link(request, cursor), encode_objects)
+
+    if modified_since:
+        queryset = filter_modified_since(
+            queryset, modified_since, 'images', 'videos')
+    story_list, cursor = paginate(queryset, page_size)
+
+    if not story_list and not modified_since:
+        error = no_stories
     data = {
-        "stories": json.loads(
-            serializer.serialize(
-                queryset,
-                use_natural_foreign_keys=True
-            )
-        ),
         "error": error
     }
-    return HttpResponse(json.dumps(data), content_type="application/json")
+    if cursor:
+        data['next'] = next_link(request, cursor)
+    if modified_since:
+        data['ext'] = {
+            'deleted': get_deleted(Story, modified_since)}
+    return HttpResponse(
+        encode_documents(data, 'stories', encode_objects(story_list)),
+        content_type="application/json")
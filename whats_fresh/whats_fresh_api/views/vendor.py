@@ -1,19 +1,129 @@
 from django.http import (HttpResponse,
                          HttpResponseNotFound)
+from django.conf import settings
 from django.contrib.gis.measure import D
-from whats_fresh.whats_fresh_api.models import Vendor
-from whats_fresh.whats_fresh_api.functions import get_lat_long_prox
+from whats_fresh.whats_fresh_api.models import (Vendor, VendorProduct,
+                                                ProductPreparation, Product,
+                                                Preparation)
+from whats_fresh.whats_fresh_api.response_cache import cache_response
+from whats_fresh.whats_fresh_api.conditional import (conditional_list,
+                                                     conditional_detail)
+from whats_fresh.whats_fresh_api import spatial, availability
+from whats_fresh.whats_fresh_api.functions import (get_lat_long_prox,
+                                                   get_limit, get_point,
+                                                   get_proximity, get_nearest,
+                                                   filter_by_proximity,
+                                                   order_by_distance,
+                                                   get_modified_since,
+                                                   filter_modified_since,
+                                                   get_deleted, get_cursor,
+                                                   get_page_size, order_by_id,
+                                                   paginate, next_link,
+                                                   get_ids, get_match,
+                                                   filter_by_products)
 
-import json
-from .serializer import FreshSerializer
+from itertools import izip_longest
 
+from whats_fresh.whats_fresh_api.serializers import encode
+from .serializer import (vendor_documents, encode_document, encode_documents,
+                         stream_list)
 
+
+def indexed_vendors(vendors, point, proximity, nearest, after=None,
+                    count=None):
+    """
+    Find the vendors within proximity miles of the point using this worker's
+    spatial index, then fetch those of them which are in the vendors
+    queryset. Returns a list of at most count vendors, closest first,
+    starting after the (distance, id) position given by a cursor.
+
+    The matches are fetched count at a time, so a page costs one query
+    however deep into the search it is, unless the queryset leaves some of
+    the matches out.
+    """
+    matches = spatial.vendor_index().within(point.y, point.x, float(proximity))
+    if after:
+        matches = [match for match in matches if list(match) > after]
+
+    chunk_size = count or len(matches)
+    results = []
+    for start in range(0, len(matches), chunk_size or 1):
+        if count is not None and len(results) >= count:
+            break
+
+        chunk = matches[start:start + chunk_size]
+        found = dict(
+            (vendor.id, vendor)
+            for vendor in vendors.filter(id__in=[id for miles, id in chunk]))
+
+        for miles, id in chunk:
+            if id in found:
+                if nearest:
+                    found[id].distance = D(mi=miles)
+                # The sort key, as order_by_distance() selects it
+                found[id].knn = miles
+                results.append(found.pop(id))
+
+    return results[:count]
+
+
+def nearby_vendors(vendors, point, proximity, nearest, limit, after=None,
+                   paged=False):
+    """
+    Restrict vendors to those within proximity miles of the point, ordered
+    by distance, starting after the position given by a cursor. If nearest
+    is given, the distance to each vendor is also fetched, and the limit is
+    lowered to nearest.
+
+    If SPATIAL_INDEX is set, the search is answered by indexed_vendors()
+    and the vendors are returned as a list rather than a queryset. Only the
+    vendors the caller can use are fetched: limit of them, or if paged, a
+    page of them and one more to tell whether there is a next page.
+
+    Returns the vendors and the new limit.
+    """
+    if nearest and (limit is None or nearest < limit):
+        limit = nearest
+
+    if settings.SPATIAL_INDEX:
+        count = get_page_size(limit) + 1 if paged else limit
+        return indexed_vendors(
+            vendors, point, proximity, nearest, after, count), limit
+
+    vendors = order_by_distance(
+        filter_by_proximity(vendors, point, proximity), point, after)
+
+    if nearest:
+        vendors = vendors.distance(point)
+
+    return vendors, limit
+
+
+@conditional_list(Vendor, VendorProduct, ProductPreparation,
+                  Product, Preparation)
+@cache_response(Vendor, VendorProduct, ProductPreparation, Product,
+                Preparation)
 def vendor_list(request):
     """
     */vendors/*
 
-    List all vendors in the database. There is no order to this list,
-    only whatever is returned by the database.
+    List all vendors in the database. If a location is given, vendors are
+    ordered by their distance from it, and ?nearest=<int> returns only the
+    closest vendors along with their distance. Otherwise there is no order to
+    this list, only whatever is returned by the database. New vendors whose
+    address has not been geocoded yet are left out.
+
+    The ?modified_since=<time> parameter returns only the vendors changed
+    since then, along with the ids of those deleted.
+
+    The ?products=<id>,<id> parameter returns only the vendors selling all
+    of the products, or with ?match=any, any of them. With
+    ?preparations=<id>,<id>, the products must be sold in one of those
+    preparations.
+
+    At most ?limit=<int> vendors, and no more than MAX_PAGE_SIZE, are
+    returned at once, in order of id if no location is given. If there are
+    more, the next link fetches them, with the ?after=<cursor> parameter.
     """
     error = {
         'status': False,
@@ -25,43 +135,80 @@ def vendor_list(request):
     data = {}
 
     point, proximity, limit, error = get_lat_long_prox(request, error)
+    nearest, error = get_nearest(request, error)
+    modified_since, error = get_modified_since(request, error)
+    after, error = get_cursor(request, error, 2 if point else 1)
+    products, error = get_ids(request, 'products', error)
+    preparations, error = get_ids(request, 'preparations', error)
+    match, error = get_match(request, error)
+
+    vendors = Vendor.objects.filter(location__isnull=False)
+
+    if products:
+        vendors = filter_by_products(vendors, products, preparations, match)
+
+    if modified_since:
+        vendors = filter_modified_since(
+            vendors, modified_since, 'products_preparations__product',
+            'products_preparations__preparation')
 
     if point:
-        vendor_list = Vendor.objects.filter(
-            location__distance_lte=(point, D(mi=proximity)))[:limit]
+        vendors, limit = nearby_vendors(
+            vendors, point, proximity, nearest, limit, after, paged=True)
     else:
-        vendor_list = Vendor.objects.all()[:limit]
+        vendors = order_by_id(vendors, after)
 
-    if not vendor_list:
-        error = {
-            "status": True,
-            "name": "No Vendors",
-            "text": "No Vendors found",
-            "level": "Information",
-            "debug": ""
-        }
+    page_size = get_page_size(limit)
+
+    no_vendors = {
+        "status": True,
+        "name": "No Vendors",
+        "text": "No Vendors found",
+        "level": "Information",
+        "debug": ""
+    }
+
+    if settings.STREAM_RESPONSES and not point and not modified_since:
+        return stream_list(
+            'vendors', vendors, page_size, error, no_vendors,
+            lambda cursor: next_link(request, cursor), vendor_documents)
+
+    if point:
+        vendor_list, cursor = paginate(
+            vendors, page_size, lambda vendor: [vendor.knn, vendor.id])
+    else:
+        vendor_list, cursor = paginate(vendors, page_size)
 
-    serializer = FreshSerializer()
+    if not vendor_list and not modified_since:
+        error = no_vendors
 
     data = {
-        "vendors": json.loads(
-            serializer.serialize(
-                vendor_list,
-                use_natural_foreign_keys=True
-            )
-        ),
         "error": error
     }
 
-    return HttpResponse(json.dumps(data), content_type="application/json")
+    # ?nearest= asks for only the nearest vendors, so there are no more
+    if cursor and not nearest:
+        data['next'] = next_link(request, cursor)
 
+    if modified_since:
+        data['ext'] = {
+            'deleted': get_deleted(Vendor, modified_since)}
 
+    return HttpResponse(
+        encode_documents(data, 'vendors', vendor_documents(vendor_list)),
+        content_type="application/json")
+
+
+@conditional_list(Vendor, VendorProduct, ProductPreparation,
+                  Product, Preparation)
+@cache_response(Vendor, VendorProduct, ProductPreparation, Product,
+                Preparation)
 def vendors_products(request, id=None):
     """
     */vendors/products/<id>*
 
-    List all vendors in the database that sell product <id>.
-    There is no order to this list, only whatever is returned by the database.
+    List all vendors in the database that sell product <id>. Locations and
+    ?nearest=<int> are handled as in */vendors/*.
     """
     error = {
         'status': False,
@@ -73,15 +220,23 @@ def vendors_products(request, id=None):
     data = {}
 
     point, proximity, limit, error = get_lat_long_prox(request, error)
+    nearest, error = get_nearest(request, error)
+
+    vendors = Vendor.objects.filter(location__isnull=False)
+
     try:
-        if point:
-            vendor_list = Vendor.objects.filter(
-                vendorproduct__product_preparation__product__id__exact=id,
-                location__distance_lte=(point, D(mi=proximity)))[:limit]
+        if settings.AVAILABILITY_INDEX:
+            vendors = vendors.filter(id__in=availability.availability_index(
+            ).vendors_selling(int(id)))
         else:
-            vendor_list = Vendor.objects.filter(
-                vendorproduct__product_preparation__product__id__exact=id
-            )[:limit]
+            # A semi-join, so vendors selling several preparations of the
+            # product are only listed once
+            vendors = vendors.filter(id__in=VendorProduct.objects.filter(
+                product_preparation__product=id).values('vendor'))
+
+        if point:
+            vendors, limit = nearby_vendors(
+                vendors, point, proximity, nearest, limit)
 
     except Exception as e:
         error = {
@@ -92,34 +247,40 @@ def vendors_products(request, id=None):
             'debug': "{0}: {1}".format(type(e).__name__, str(e))
         }
         return HttpResponseNotFound(
-            json.dumps(data),
+            encode(data),
             content_type="application/json"
         )
 
-    if not vendor_list:
-        error = {
-            "status": True,
-            "name": "No Vendors",
-            "text": "No Vendors found for product %s" % id,
-            "level": "Information",
-            "debug": ""
-        }
+    no_vendors = {
+        "status": True,
+        "name": "No Vendors",
+        "text": "No Vendors found for product %s" % id,
+        "level": "Information",
+        "debug": ""
+    }
+
+    if settings.STREAM_RESPONSES and not point:
+        return stream_list('vendors', vendors, limit, error, no_vendors,
+                           render=vendor_documents)
 
-    serializer = FreshSerializer()
+    vendor_list = vendors[:limit]
+
+    if not vendor_list:
+        error = no_vendors
 
     data = {
-        "vendors": json.loads(
-            serializer.serialize(
-                vendor_list,
-                use_natural_foreign_keys=True
-            )
-        ),
         "error": error
     }
 
-    return HttpResponse(json.dumps(data), content_type="application/json")
+    return HttpResponse(
+        encode_documents(data, 'vendors', vendor_documents(vendor_list)),
+        content_type="application/json")
 
 
+@conditional_detail(Vendor, VendorProduct, ProductPreparation,
+                    Product, Preparation)
+@cache_response(Vendor, VendorProduct, ProductPreparation, Product,
+                Preparation)
 def vendor_details(request, id=None):
     """
     */vendors/<id>*
@@ -137,7 +298,7 @@ def vendor_details(request, id=None):
     }
 
     try:
-        vendor = Vendor.objects.get(id=id)
+        vendor = Vendor.objects.filter(location__isnull=False).get(id=id)
     except Exception as e:
         data['error'] = {
             'status': True,
@@ -147,21 +308,91 @@ def vendor_details(request, id=None):
             'debug': "{0}: {1}".format(type(e).__name__, str(e))
         }
         return HttpResponseNotFound(
-            json.dumps(data),
+            encode(data),
             content_type="application/json"
         )
 
-    serializer = FreshSerializer()
+    return HttpResponse(
+        encode_document(vendor_documents([vendor])[0], {'error': error}),
+        content_type="application/json")
+
 
-    data = json.loads(
-        serializer.serialize(
-            [vendor],
-            use_natural_foreign_keys=True
-        )[1:-1]  # Serializer can only serialize lists,
-        # so we have to chop off the list brackets
-        # to get the serialized string without the list
-    )
+@conditional_list(Vendor)
+@cache_response(Vendor)
+def vendors_nearby(request):
+    """
+    */vendors/nearby*
+
+    For each of several locations, list the ids of the vendors within the
+    proximity of it, closest first. Locations are given as repeated lat and
+    lng parameters (?lat=44.6&lng=-124.0&lat=44.4&lng=-124.1), and the
+    ?proximity=<int> and ?limit=<int> parameters apply to every location.
 
-    data['error'] = error
+    If SPATIAL_INDEX is set, distances are measured against this worker's
+    spatial index of vendor locations, which is looked up once for the
+    whole request, so the number of queries does not grow with the number
+    of locations. Otherwise each location is searched in the database.
+    """
+    error = {
+        'status': False,
+        'name': None,
+        'text': None,
+        'level': None,
+        'debug': None
+    }
+
+    limit, error = get_limit(request, error)
+    proximity, error = get_proximity(request.GET.get('proximity', None), error)
+
+    locations = list(izip_longest(
+        request.GET.getlist('lat'), request.GET.getlist('lng')))
+
+    if len(locations) > settings.NEARBY_MAX_LOCATIONS:
+        error = {
+            'status': True,
+            'name': 'Too Many Locations',
+            'text': 'Only the first %d locations were searched' % (
+                settings.NEARBY_MAX_LOCATIONS),
+            'level': 'Warning',
+            'debug': ''
+        }
+        locations = locations[:settings.NEARBY_MAX_LOCATIONS]
+
+    index = spatial.vendor_index() if settings.SPATIAL_INDEX else None
+
+    points = []
+    for lat, lng in locations:
+        point, error = get_point(lat, lng, error)
+
+        if point:
+            if index is not None:
+                ids = [id for miles, id in index.within(
+                    point.y, point.x, float(proximity))[:limit]]
+            else:
+                vendors = nearby_vendors(
+                    Vendor.objects.filter(location__isnull=False).only('id'),
+                    point, proximity, None, limit)[0]
+                ids = [vendor.id for vendor in vendors[:limit]]
+            points.append({
+                'lat': point.y,
+                'lng': point.x,
+                'vendors': ids
+            })
+        else:
+            points.append({'lat': lat, 'lng': lng, 'vendors': []})
+
+    if not points:
+        error = {
+            'status': True,
+            'name': 'No Locations',
+            'text': 'No locations were given',
+            'level': 'Error',
+            'debug': ''
+        }
+
+    data = {
+        'points': points,
+        'error': error
+    }
 
-    return HttpResponse(json.dumps(data), content_type="application/json")
+    return HttpResponse(encode(data), content_type="application/json")